@@ -30,9 +30,9 @@ from .services import (
 from .utils import (
     async_ConnectCharger,
     async_DisconnectCharger,
+    async_LoadWattpilotModule,
     async_ProgrammingDebug,
     PropertyUpdateHandler,
-    wattpilot,
 )
 
 _LOGGER: Final = logging.getLogger(__name__)
@@ -98,6 +98,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             charger.register_property_callback(lambda identifier, value: PropertyUpdateHandler(hass, entry.entry_id, identifier, value))
         elif hasattr(charger, 'add_event_handler') and callable(charger.add_event_handler):
             entry_data[FUNC_PROPERTY_UPDATES_CALLBACK] = lambda _, identifier, value: PropertyUpdateHandler(hass, entry.entry_id, identifier, value)
+            wattpilot = await async_LoadWattpilotModule()
             charger.add_event_handler(wattpilot.Event.WP_PROPERTY, entry_data[FUNC_PROPERTY_UPDATES_CALLBACK])
         else:
             _LOGGER.warning("%s - async_setup_entry: charger does not provide roperties updater handler", entry.entry_id)
@@ -163,6 +164,7 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
                 if hasattr(charger, 'unregister_property_callback') and callable(charger.unregister_property_callback):
                     charger.unregister_property_callback()
                 elif hasattr(charger, 'remove_event_handler') and callable(charger.remove_event_handler):
+                    wattpilot = await async_LoadWattpilotModule()
                     charger.remove_event_handler(wattpilot.Event.WP_PROPERTY,entry_data[FUNC_PROPERTY_UPDATES_CALLBACK])
             except Exception as e:
                 _LOGGER.error("%s - async_unload_entry: failed to remove registered event handlers: %s (%s.%s)", entry.entry_id, str(e), e.__class__.__module__, type(e).__name__)
@@ -22,6 +22,7 @@ import homeassistant.helpers.config_validation as cv
 from .const import (
     CONF_CONNECTION,
     CONF_CLOUD,
+    CONF_FAILOVER,
     CONF_LOCAL,
     CONF_SERIAL,
     DEFAULT_NAME,
@@ -41,6 +42,8 @@ LOCAL_SCHEMA: Final = vol.Schema({
     vol.Required(CONF_IP_ADDRESS, default=None): cv.string,
     vol.Required(CONF_PASSWORD, default=None): cv.string,
     vol.Optional(CONF_TIMEOUT, default=DEFAULT_TIMEOUT): cv.positive_int,
+    vol.Optional(CONF_SERIAL): cv.string,
+    vol.Optional(CONF_FAILOVER, default=False): cv.boolean,
 })
 
 
@@ -61,6 +64,8 @@ async def async_get_OPTIONS_LOCAL_SCHEMA(current_data):
             vol.Required(CONF_IP_ADDRESS, default=current_data.get(CONF_IP_ADDRESS,None)): cv.string,
             vol.Required(CONF_PASSWORD, default=current_data.get(CONF_PASSWORD,None)): cv.string,
             vol.Optional(CONF_TIMEOUT, default=current_data.get(CONF_TIMEOUT,DEFAULT_TIMEOUT)): cv.positive_int,
+            vol.Optional(CONF_SERIAL, description={"suggested_value": current_data.get(CONF_SERIAL,None)}): cv.string,
+            vol.Optional(CONF_FAILOVER, default=current_data.get(CONF_FAILOVER,False)): cv.boolean,
         })
         await asyncio.sleep(0)
         return OPTIONS_LOCAL_SCHEMA
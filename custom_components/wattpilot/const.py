@@ -15,6 +15,7 @@ CONF_CHARGER: Final = 'charger'
 CONF_CLOUD_API: Final = 'cloud_api'
 CONF_CLOUD: Final = 'cloud'
 CONF_CONNECTION: Final = 'connection'
+CONF_FAILOVER: Final = 'failover'
 CONF_LOCAL: Final = 'local'
 CONF_PUSH_ENTITIES: Final = 'push_entities'
 CONF_SERIAL: Final = 'serial'
@@ -23,6 +24,7 @@ DEFAULT_TIMEOUT: Final = 15
 
 EVENT_PROPS_ID: Final = DOMAIN + '_property_message'
 EVENT_PROPS: Final = ["ftt", "cak"]
+LAZY_PROPS: Final = ["wifis", "scan", "data", "dll", "ocppck", "ocppcc", "ocppsc"]
 
 CLOUD_API_URL_PREFIX: Final = 'https://'
 CLOUD_API_URL_POSTFIX: Final = '.api.v3.go-e.io/api/'
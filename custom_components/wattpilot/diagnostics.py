@@ -23,7 +23,7 @@ from .const import (
 )
 
 from .utils import (
-    wattpilot,
+    async_LoadWattpilotModule,
 )
 
 REDACT_CONFIG = {CONF_IP_ADDRESS, CONF_PASSWORD}
@@ -56,10 +56,22 @@ async def async_get_config_entry_diagnostics( hass: HomeAssistant, entry: Config
         _LOGGER.error("%s - async_get_config_entry_diagnostics %s: Adding charger properties to output failed: %s (%s.%s)", entry.entry_id, platform, str(e), e.__class__.__module__, type(e).__name__)
         return diag
 
+    try:
+        if hasattr(charger, 'property_sizes') and callable(charger.property_sizes):
+            _LOGGER.debug("%s - async_get_config_entry_diagnostics %s: Add charger property memory usage to output", entry.entry_id, platform)
+            sizes = charger.property_sizes()
+            diag["charger_properties_size"] = {
+                "total": sum(sizes.values()),
+                "lazy": sorted(charger.allProps.lazy),
+                "largest": dict(sorted(sizes.items(), key=lambda i: i[1], reverse=True)[:20]),
+            }
+    except Exception as e:
+        _LOGGER.error("%s - async_get_config_entry_diagnostics %s: Adding charger property memory usage to output failed: %s (%s.%s)", entry.entry_id, platform, str(e), e.__class__.__module__, type(e).__name__)
+
     try:
         _LOGGER.debug("%s - async_get_config_entry_diagnostics %s: Add python modules version", entry.entry_id, platform)
         diag["wattpilot_module"] = version('wattpilot')
-        diag["wattpilot_file"] = wattpilot.__file__
+        diag["wattpilot_file"] = (await async_LoadWattpilotModule()).__file__
         diag["pyyaml_module"] = version('pyyaml')
         diag["importlib_metadata_module"] = version('importlib_metadata')
         diag["aiofiles_module"] = version('aiofiles')
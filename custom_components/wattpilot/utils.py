@@ -22,6 +22,7 @@ from .const import (
     CONF_CONNECTION,
     CONF_CLOUD,
     CONF_DBG_PROPS,
+    CONF_FAILOVER,
     CONF_LOCAL,
     CONF_PUSH_ENTITIES,
     CONF_SERIAL,
@@ -30,12 +31,15 @@ from .const import (
     DOMAIN,
     EVENT_PROPS_ID,
     EVENT_PROPS,
+    LAZY_PROPS,
 )
 
 _LOGGER: Final = logging.getLogger(__name__)
 
 import os
 import sys
+wattpilot=None # imported on first use - see LoadWattpilotModule
+
 def _dynamic_load_module(modulename,subfolder='src',initfile='__init__.py'):
     """Try to load a module from local custom component - if not load from system."""
     try:
@@ -56,8 +60,21 @@ def _dynamic_load_module(modulename,subfolder='src',initfile='__init__.py'):
         raise ImportError("failed to import module %s", modulename)
     return wattpilot
 
-wattpilot=_dynamic_load_module('wattpilot')
-_LOGGER.debug("%s - utils: imported module from: %s (%s)", DOMAIN, wattpilot.__file__, getattr(wattpilot,'__version__','0.2.2?'))
+
+def LoadWattpilotModule():
+    """Return the wattpilot module and import it on first use (keeps it off the integration import path)"""
+    global wattpilot
+    if wattpilot is None:
+        wattpilot=_dynamic_load_module('wattpilot')
+        _LOGGER.debug("%s - utils: imported module from: %s (%s)", DOMAIN, wattpilot.__file__, getattr(wattpilot,'__version__','0.2.2?'))
+    return wattpilot
+
+
+async def async_LoadWattpilotModule():
+    """Async: return the wattpilot module - the first import is done in the executor to not block the event loop"""
+    if wattpilot is None:
+        return await asyncio.get_running_loop().run_in_executor(None, LoadWattpilotModule)
+    return wattpilot
 
 async def async_ProgrammingDebug(obj, show_all:bool=False) -> None:
     """Async: return all attributes of a specific objec""" 
@@ -265,15 +282,25 @@ async def async_GetChargerFromDeviceID(hass: HomeAssistant, device_id: str):
 async def async_ConnectCharger(entry_or_device_id, data, charger=None):
     """Async: connect charger and handle connection errors"""
     try:
+        wattpilot = await async_LoadWattpilotModule()
         con = data.get(CONF_CONNECTION,CONF_LOCAL)
+        store_kwargs = {}
+        if hasattr(wattpilot, 'PropertyStore'):
+            store_kwargs['lazy_props'] = LAZY_PROPS
         if charger is None and con == CONF_LOCAL:
             id = data.get(CONF_IP_ADDRESS, None)
             _LOGGER.debug("%s - async_ConnectCharger: Connecting %s charger by ip: %s", entry_or_device_id, CONF_LOCAL, id)     
-            charger=wattpilot.Wattpilot(ip=id, password=data.get(CONF_PASSWORD, None), serial=id, cloud=False)
+            if data.get(CONF_FAILOVER, False) and not data.get(CONF_SERIAL, None):
+                _LOGGER.warning("%s - async_ConnectCharger: %s requires the serial number of the charger - connecting locally only", entry_or_device_id, CONF_FAILOVER)
+            if data.get(CONF_FAILOVER, False) and data.get(CONF_SERIAL, None) and hasattr(wattpilot, 'HedgedWattpilot'):
+                _LOGGER.debug("%s - async_ConnectCharger: Using %s connection of charger %s as failover", entry_or_device_id, CONF_CLOUD, data[CONF_SERIAL])
+                charger=wattpilot.HedgedWattpilot(ip=id, password=data.get(CONF_PASSWORD, None), serial=data[CONF_SERIAL], **store_kwargs)
+            else:
+                charger=wattpilot.Wattpilot(ip=id, password=data.get(CONF_PASSWORD, None), serial=id, cloud=False, **store_kwargs)
         elif charger is None and con == CONF_CLOUD:
             id = data.get(CONF_SERIAL, None)
             _LOGGER.debug("%s - async_ConnectCharger: Connecting %s charger by serial: %s", entry_or_device_id, CONF_CLOUD, id)     
-            charger=wattpilot.Wattpilot(ip=id, password=data.get(CONF_PASSWORD, None), serial=id, cloud=True)
+            charger=wattpilot.Wattpilot(ip=id, password=data.get(CONF_PASSWORD, None), serial=id, cloud=True, **store_kwargs)
         elif charger is not None:
             _LOGGER.debug("%s - async_ConnectCharger: Reconnect existing charger: %s", entry_or_device_id, charger.name)
             id = charger.name
@@ -1,8 +1,31 @@
 
 from setuptools import setup, find_packages
+from setuptools.command.build_py import build_py
+import importlib.util
 import pathlib
 
 here = pathlib.Path(__file__).parent.resolve()
+version = '0.2.2c'
+
+
+def load_build_module(name):
+    # Build helpers are loaded by path as the package itself is not installed yet
+    spec = importlib.util.spec_from_file_location(name, here / 'src' / 'wattpilot' / f'{name}.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class BuildPyCommand(build_py):
+    """Regenerates the typed property model and the pre-built API definition from wattpilot.yaml"""
+
+    def run(self):
+        load_build_module('modelgen').generate_model()
+        super().run()
+        apidef = load_build_module('apidef')
+        ressources = pathlib.Path(self.build_lib) / 'wattpilot' / 'ressources'
+        apidef.build_prebuilt_apidef(ressources / 'wattpilot.yaml', ressources / apidef.APIDEF_PREBUILT, version)
+
 
 # Get the long description from the README file
 long_description = (here / 'README.md').read_text(encoding='utf-8')
@@ -12,7 +35,7 @@ long_description = (here / 'README.md').read_text(encoding='utf-8')
 
 setup(
     name='wattpilot',
-    version='0.2.2c',
+    version=version,
     description='Python library to connect to a Fronius Wattpilot Wallbox',
     long_description=long_description,
     long_description_content_type='text/markdown',
@@ -31,16 +54,22 @@ setup(
     package_dir={'': 'src'}, 
     packages=find_packages(where='src'),
     entry_points = {
-        'console_scripts': ['wattpilotshell=wattpilot.wattpilotshell:main'],
+        'console_scripts': [
+            'wattpilotbridge=wattpilot.bridge:main',
+            'wattpilotproxy=wattpilot.proxy:main',
+            'wattpilotshell=wattpilot.wattpilotshell:main',
+        ],
     },
     package_data = { '' : ['wattpilot.yaml'] },
     python_requires='>=3.10, <4',
     install_requires=['websocket-client','PyYAML','paho-mqtt','cmd2','bcrypt'],
+    extras_require={'parquet': ['pyarrow'], 'test': ['pytest']},
     platforms="any",
     license="MIT License",
     project_urls={
         'Bug Reports': 'https://github.com/joscha82/wattpilot/issues',
         'Source': 'https://github.com/joscha82/wattpilot'
     },
-    include_package_data=True
+    include_package_data=True,
+    cmdclass={'build_py': BuildPyCommand},
 )
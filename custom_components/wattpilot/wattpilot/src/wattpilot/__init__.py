@@ -1,21 +1,28 @@
-import websocket
+# websocket, bcrypt and the hashing modules are imported where they are needed
+# to keep importing this module cheap (e.g. for Home Assistant startup)
 import json
-import hashlib
-import random
 import threading
-import hmac
 import logging
-import base64
-import bcrypt
 
-from time import sleep
+from enum import Enum
+from time import monotonic
 from types import SimpleNamespace
 
+from .store import PropertyStore, to_namespace
+
+__all__ = ["Event", "HedgedWattpilot", "LoadMode", "PropertyStore", "Wattpilot"]
+
 _LOGGER = logging.getLogger(__name__)
 
 CONST_HASH_PBKDF2 = 'pbkdf2'
 CONST_HASH_BCRYPT = 'bcrypt'
 CONST_WPFLEX_DEVICETYPE='wattpilot_flex'
+# Without stale_after, a connection is considered stale if no message has been received for
+# STALE_FACTOR times the average deltaStatus interval (but at least STALE_MIN_S seconds):
+STALE_FACTOR = 10
+STALE_MIN_S = 30
+WATCHDOG_INTERVAL_S = 1
+RECONNECT_MAX_S = 30
 __version__ = '0.2.2c'
 
 class LoadMode():
@@ -25,6 +32,21 @@ class LoadMode():
     NEXTTRIP=5
 
 
+class Event(Enum):
+    """Event types which can be subscribed to using Wattpilot.add_event_handler
+
+    Handlers are called with the Wattpilot instance as first argument:
+    - WP_MESSAGE: (wp, wsapp, msg, msg_json)
+    - WP_PROPERTY: (wp, name, value)
+    - WP_INVERTER: (wp, inverter_id, field, value) - field and value are None if the inverter has been removed
+    - WP_RESPONSE: (wp, request_id, success, message) - request_id as returned by send_update, message is the error message (if any)
+    """
+    WP_MESSAGE = 'message'
+    WP_PROPERTY = 'property'
+    WP_INVERTER = 'inverter'
+    WP_RESPONSE = 'response'
+
+
 class Wattpilot(object):
 
     carValues = {}
@@ -73,6 +95,34 @@ class Wattpilot(object):
         """Returns a dictionary with all properties"""
         return self._allProps
 
+    def property_sizes(self):
+        """Returns the approximate memory usage in bytes per property"""
+        return self._allProps.sizes()
+
+    @property
+    def model(self):
+        """Returns the typed property model (attributes named by the alias in wattpilot.yaml)"""
+        if self._model is None:
+            self.__init_model()
+        return self._model
+
+    def __init_model(self):
+        # The generated model is large, so it is only imported and filled once it is used
+        from .model import KEY_TO_ATTR, WattpilotModel
+        model = WattpilotModel()
+        # Lazy and excluded properties are not kept in the model to not undo the memory savings
+        attrs = {k: v for k, v in KEY_TO_ATTR.items() if k not in self._allProps.lazy and k not in self._allProps.excluded}
+        self._model = model
+        self._modelAttrs = attrs
+        for key, attr in attrs.items():
+            if key in self._allProps:
+                setattr(model, attr, self._allProps[key])
+
+    @property
+    def inverters(self):
+        """Returns a dictionary of connected PV inverters / power meters by id"""
+        return self._inverters
+
     @property
     def allPropsInitialized(self):
         """Returns true, if all properties have been initialized"""
@@ -154,6 +204,11 @@ class Wattpilot(object):
     def secured(self):
         return self._secured
 
+    @property
+    def authHashType(self):
+        """Returns the type of the password hash used for authentication (pbkdf2 or bcrypt)"""
+        return self._authhashtype
+
     @property
     def password(self):
         return self._password
@@ -175,6 +230,30 @@ class Wattpilot(object):
     def connected(self):
         return self._connected
 
+    @property
+    def pingRtt(self):
+        """Returns the round trip time of the last websocket ping in seconds (None if no pong has been received)"""
+        return self._pingRtt
+
+    @property
+    def lastMessageAge(self):
+        """Returns the seconds since the last message has been received (None if no message has been received)"""
+        return monotonic() - self._lastMessage if self._lastMessage else None
+
+    @property
+    def staleAfter(self):
+        """Returns the seconds without messages after which the connection is considered stale"""
+        if self._staleAfter is not None:
+            return self._staleAfter
+        if self._deltaInterval is None:
+            return STALE_MIN_S
+        return max(STALE_MIN_S, STALE_FACTOR * self._deltaInterval)
+
+    @property
+    def reconnects(self):
+        """Returns the number of reconnects since connect was called"""
+        return self._reconnects
+
     @property
     def voltage1(self):
         return self._voltage1
@@ -286,12 +365,50 @@ class Wattpilot(object):
 
         return ret
     def connect(self):
-        self._wst = threading.Thread(target=self._wsapp.run_forever)
+        # Each connection gets its own stop event, so threads of a previous connection do not reconnect
+        self._stopping = threading.Event()
+        self._reconnects = 0
+        self._wst = threading.Thread(target=self.__run_forever, args=(self._stopping,))
         self._wst.daemon = True
         self._wst.start()
-        
+        if self._staleAfter != 0:
+            self._watchdog = threading.Thread(target=self.__watch, args=(self._stopping,))
+            self._watchdog.daemon = True
+            self._watchdog.start()
+
         _LOGGER.info("Wattpilot connected")
 
+    def disconnect(self):
+        """Closes the websocket connection"""
+        self._stopping.set()
+        self._wsapp.close()
+        self._connected=False
+
+    def process_message(self,message):
+        """Processes a JSON message as if it had been received from the Wattpilot (e.g. to replay recorded frames)"""
+        self.__on_message(None,message)
+
+    def __run_forever(self,stopping):
+        while True:
+            try:
+                self._wsapp.run_forever(ping_interval=self._pingInterval, ping_timeout=self._pingTimeout or None)
+            except Exception as e:
+                _LOGGER.error("Wattpilot %s connection failed: %s (%s.%s)", self.serial, str(e), e.__class__.__module__, type(e).__name__)
+            self._connected=False
+            # Reconnect immediately after an authenticated connection has been lost, with increasing delays otherwise:
+            if stopping.wait(self._reconnectDelay):
+                break
+            self._reconnectDelay = min(max(1,self._reconnectDelay*2),RECONNECT_MAX_S)
+            self._reconnects += 1
+            _LOGGER.info("Reconnecting to Wattpilot %s", self.serial)
+
+    def __watch(self,stopping):
+        while not stopping.wait(WATCHDOG_INTERVAL_S):
+            if self._connected and monotonic() - self._lastMessage > self.staleAfter:
+                _LOGGER.warning("Wattpilot %s sent no message for %.0f seconds - reconnecting", self.serial, monotonic() - self._lastMessage)
+                self._connected=False
+                self._wsapp.close()
+
     def register_message_callback(self,callback_fn):
         """signature of callback_fn: (wsapp,msg)"""
         self._message_callback = callback_fn
@@ -306,6 +423,24 @@ class Wattpilot(object):
     def unregister_property_callback(self):
         self._property_callback = None
 
+    def add_event_handler(self,event,callback_fn):
+        """Add a handler for an Event type - see Event for the handler signatures"""
+        handlers = self._event_handlers.setdefault(event,[])
+        if callback_fn not in handlers:
+            handlers.append(callback_fn)
+
+    def remove_event_handler(self,event,callback_fn):
+        handlers = self._event_handlers.get(event,[])
+        if callback_fn in handlers:
+            handlers.remove(callback_fn)
+
+    def __call_event_handlers(self,event,*args):
+        for callback_fn in tuple(self._event_handlers.get(event,())):
+            try:
+                callback_fn(self,*args)
+            except Exception as e:
+                _LOGGER.error("Event handler for %s failed: %s (%s.%s)", event, str(e), e.__class__.__module__, type(e).__name__)
+
     def set_power(self,power):
         self.send_update("amp",power)
 
@@ -314,10 +449,13 @@ class Wattpilot(object):
 
 
     def send_update(self,name,value):
+        """Sends a new property value to the Wattpilot and returns the request id (see Event.WP_RESPONSE)"""
         message = {}
         message["type"]="setValue"
-        self.__requestid = self.__requestid+1
-        message["requestId"]=self.__requestid
+        with self._requestLock:
+            self.__requestid = self.__requestid+1
+            requestid = self.__requestid
+        message["requestId"]=requestid
         message["key"]=name
         message["value"]=value
         if (self._secured is not None):
@@ -327,10 +465,14 @@ class Wattpilot(object):
                 self.__send(message)
         else:
             self.__send(message)
+        return requestid
 
     def __update_property(self,name,value):
 
         self._allProps[name] = value
+        attr = self._modelAttrs.get(name)
+        if attr is not None:
+            setattr(self._model, attr, value)
         if name=="acs":
             self._AccessState = Wattpilot.acsValues[value]
 
@@ -395,6 +537,8 @@ class Wattpilot(object):
                 self._updateAvailable = True
         if self._property_callback != None:
             self._property_callback(name,value)
+        if Event.WP_PROPERTY in self._event_handlers:
+            self.__call_event_handlers(Event.WP_PROPERTY,name,value)
 
     def __on_hello(self,message):
         _LOGGER.info("Connected to WattPilot Serial %s",message.serial)
@@ -411,7 +555,20 @@ class Wattpilot(object):
         if hasattr(message,"secured"):
             self._secured=message.secured
 
+    def auth_hash(self,token1,token2,token3):
+        """Returns the hash authenticating the tokens of an authRequired message (token1, token2) and of the auth response (token3)"""
+        import hashlib
+        hash1 = hashlib.sha256((token1.encode()+self._hashedpassword)).hexdigest()
+        return hashlib.sha256((token3 + token2+hash1).encode()).hexdigest()
+
+    def message_hmac(self,payload):
+        """Returns the HMAC of the payload of a securedMsg message"""
+        import hashlib
+        import hmac
+        return hmac.new(bytearray(self._hashedpassword), bytearray(payload.encode()), hashlib.sha256 ).hexdigest()
+
     def __on_auth(self,wsapp,message):
+        import random
         ran = random.randrange(10**80)
         self._token3 = "%064x" % ran
         self._token3 = self._token3[:32]
@@ -420,8 +577,7 @@ class Wattpilot(object):
         elif self._devicetype == CONST_WPFLEX_DEVICETYPE:
             self._authhashtype = CONST_HASH_BCRYPT
         self.__update_hashedpassword()
-        hash1 = hashlib.sha256((message.token1.encode()+self._hashedpassword)).hexdigest()
-        hash = hashlib.sha256((self._token3 + message.token2+hash1).encode()).hexdigest()
+        hash = self.auth_hash(message.token1,message.token2,self._token3)
         response = {}
         response["type"] = "auth"
         response["token3"] = self._token3
@@ -439,6 +595,8 @@ class Wattpilot(object):
             return
         _LOGGER.debug("__update_hashedpassword: generating password hash of type: %s", self._authhashtype)
         if self._authhashtype == CONST_HASH_PBKDF2:
+            import base64
+            import hashlib
             self._hashedpassword = base64.b64encode(hashlib.pbkdf2_hmac('sha512',password.encode(),self.serial.encode(),100000,256))[:32]
         elif self._authhashtype == CONST_HASH_BCRYPT:
             hashedpw = self.__bcrypt_hash_password(password, serial)
@@ -497,6 +655,8 @@ class Wattpilot(object):
      
     def __bcrypt_hash_password(self,password,serial,iterations=8) -> str:
         #hash bassword bcrypt / wattpilot flex compatible
+        import bcrypt # only required for wattpilot flex devices
+        import hashlib
         password_hash_sha256 = hashlib.sha256(password.encode('utf-8')).hexdigest()
         serial_b64 = self.__bcryptjs_encodeBase64(serial, 16)
         salt = []
@@ -521,18 +681,19 @@ class Wattpilot(object):
         if secure:
             messageid=message["requestId"]
             payload=json.dumps(message)
-            h = hmac.new(bytearray(self._hashedpassword), bytearray(payload.encode()), hashlib.sha256 )
             message={}
             message["type"]="securedMsg"
             message["data"]=payload
             message["requestId"]=str(messageid)+"sm"
-            message["hmac"]=h.hexdigest()
+            message["hmac"]=self.message_hmac(payload)
 
         _LOGGER.debug("Message send: %s",json.dumps(message)  )
         self._wsapp.send(json.dumps(message))
 
     def __on_AuthSuccess(self,message):
         self._connected = True
+        self._reconnectDelay = 0
+        self._lastDelta = None
         _LOGGER.info("Authentication successful")
 
     def __on_FullStatus(self,message):
@@ -551,15 +712,46 @@ class Wattpilot(object):
 
     def __on_DeltaStatus(self,message):
         self._allPropsInitialized=True # Assume all properties have been initialized when first delta status is received
+        # Average interval of delta status messages (for the staleness watchdog):
+        now = monotonic()
+        if self._lastDelta is not None:
+            interval = now - self._lastDelta
+            self._deltaInterval = interval if self._deltaInterval is None else self._deltaInterval + (interval - self._deltaInterval) / 8
+        self._lastDelta = now
         props = message.status.__dict__
         for key in props:
             self.__update_property(key,props[key])
 
     def __on_clearInverters(self,message):
-        pass
+        # Keep the previous entries to only report fields which changed after the refresh
+        self._staleInverters.update(self._inverters)
+        self._inverters = {}
+        if not getattr(message,'partial',False):
+            self.__remove_stale_inverters()
 
     def __on_updateInverter(self,message):
-        pass
+        fields = {k: v for k, v in message.__dict__.items() if k not in ('type','partial')}
+        inverter_id = fields.get('id')
+        if inverter_id is None:
+            _LOGGER.warning("Inverter update without id: %s", fields)
+            return
+        previous = self._inverters.get(inverter_id)
+        if previous is None:
+            previous = self._staleInverters.pop(inverter_id, {})
+        self._inverters[inverter_id] = previous | fields
+        if Event.WP_INVERTER in self._event_handlers:
+            for field, value in fields.items():
+                if field not in previous or previous[field] != value:
+                    self.__call_event_handlers(Event.WP_INVERTER,inverter_id,field,value)
+        if not getattr(message,'partial',False):
+            self.__remove_stale_inverters()
+
+    def __remove_stale_inverters(self):
+        stale = self._staleInverters
+        self._staleInverters = {}
+        for inverter_id in stale:
+            _LOGGER.debug("Inverter %s has been removed", inverter_id)
+            self.__call_event_handlers(Event.WP_INVERTER,inverter_id,None,None)
 
     def __on_response(self,message):
         if message.success:
@@ -568,20 +760,49 @@ class Wattpilot(object):
                 self.__update_property(key,props[key])
         else:
             _LOGGER.error("Error Sending Request %s. Message: %s" ,message.requestId,message.message)
+        if Event.WP_RESPONSE in self._event_handlers:
+            requestid = message.requestId
+            if isinstance(requestid,str):
+                # Responses to secured messages refer to the id of the wrapping message
+                requestid = requestid.removesuffix("sm")
+                requestid = int(requestid) if requestid.isdigit() else requestid
+            self.__call_event_handlers(Event.WP_RESPONSE,requestid,message.success,getattr(message,'message',None))
 
     def __on_error(self,wsapp,err):
+        # The connection is closed and established again by __run_forever
+        _LOGGER.warning("Wattpilot %s connection error: %s", self.serial, err)
         self._wsapp.close()
         self._connected=False
-        sleep(30)
-        self._wsapp.run_forever()
 
     def __on_close(self,wsapp,code,msg):
         self._connected=False
 
+    def __on_pong(self,wsapp,data):
+        self._pingRtt = wsapp.last_pong_tm - wsapp.last_ping_tm
+
+    def __decode_selectively(self,message):
+        # Parsing without object hook is much cheaper, so only the status values of interest are converted and processed
+        data = json.loads(message)
+        status = data.get("status")
+        if data.get("type") in ("fullStatus","deltaStatus") and isinstance(status,dict):
+            decoded = {k: v for k, v in status.items() if k in self._decodeProps}
+            if len(decoded) < len(status):
+                undecoded = {k: v for k, v in status.items() if k not in self._decodeProps}
+                if self._keepUndecoded:
+                    self._allProps.update_undecoded(undecoded)
+                else:
+                    self._allProps.mark_skipped(undecoded)
+            data["status"] = decoded
+        return to_namespace(data)
+
     def __on_message(self, wsapp, message):
         ## called whenever a message through websocket is received
+        self._lastMessage = monotonic()
         _LOGGER.debug("Message received: %s", message)
-        msg=json.loads(message, object_hook=lambda d: SimpleNamespace(**d))
+        if self._decodeProps is None:
+            msg=json.loads(message, object_hook=lambda d: SimpleNamespace(**d))
+        else:
+            msg=self.__decode_selectively(message)
         if (msg.type == 'hello'):  # Hello Message -> Received upon connection before auth
             self.__on_hello(msg)
         if (msg.type == 'authRequired'): # Auth Required -> Received after hello 
@@ -602,12 +823,20 @@ class Wattpilot(object):
             self.__on_updateInverter(msg)
         if self._message_callback != None:
             self._message_callback(self,wsapp,msg,message)
+        if Event.WP_MESSAGE in self._event_handlers:
+            self.__call_event_handlers(Event.WP_MESSAGE,wsapp,msg,message)
 
 
-    def __init__(self, ip ,password,serial=None,cloud=False):
-        RECONNECTINTERVALL = 30
+    def __init__(self, ip ,password,serial=None,cloud=False,exclude_props=None,lazy_props=None,ping_interval=30,ping_timeout=10,stale_after=None,decode_props=None,keep_undecoded=True):
+        """exclude_props: property keys which are never stored in allProps
+        lazy_props: property keys which are kept as raw JSON and only decoded on access
+        ping_interval/ping_timeout: seconds between websocket pings and until their pong is missed (0 disables pings)
+        stale_after: seconds without messages until reconnecting (None derives it from the deltaStatus interval, 0 disables the check)
+        decode_props: property keys of interest - status values of other keys are neither decoded nor reported as property changes
+        keep_undecoded: keep the values of other keys in allProps (converted on access) instead of only recording their presence (see allProps.skipped)"""
 
         self.__requestid=0
+        self._requestLock=threading.Lock()
         self._name = None
         self._hostname = None
         self._friendlyName = None
@@ -626,7 +855,9 @@ class Wattpilot(object):
             self._url = "ws://"+ip+"/ws"
         self.serial = None
         self._connected = False
-        self._allProps={}
+        self._allProps=PropertyStore(exclude_props,lazy_props)
+        self._model=None
+        self._modelAttrs={}
         self._allPropsInitialized=False
         self._voltage1=None
         self._voltage2=None
@@ -652,10 +883,35 @@ class Wattpilot(object):
         self._cak=None
         self._message_callback=None
         self._property_callback=None
+        self._event_handlers={}
+        self._inverters={}
+        self._staleInverters={}
+
+        self._decodeProps=frozenset(decode_props) if decode_props is not None else None
+        self._keepUndecoded=keep_undecoded
+        self._pingInterval=ping_interval
+        self._pingTimeout=ping_timeout
+        self._staleAfter=stale_after
+        self._pingRtt=None
+        self._lastMessage=0
+        self._lastDelta=None
+        self._deltaInterval=None
+        self._reconnects=0
+        self._reconnectDelay=1
+        self._stopping=threading.Event()
 
         self._wst=threading.Thread()
+        self._watchdog=threading.Thread()
 
+        import websocket
         websocket.setdefaulttimeout(10)
-        self._wsapp = websocket.WebSocketApp(self.url, on_message=self.__on_message, on_error=self.__on_error, on_close=self.__on_close)
+        self._wsapp = websocket.WebSocketApp(self.url, on_message=self.__on_message, on_error=self.__on_error, on_close=self.__on_close, on_pong=self.__on_pong)
         _LOGGER.info ("Wattpilot %s initilized",self.serial)
 
+
+def __getattr__(name):
+    # HedgedWattpilot is imported on first use to keep importing this module cheap
+    if name == "HedgedWattpilot":
+        from .hedged import HedgedWattpilot
+        return HedgedWattpilot
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
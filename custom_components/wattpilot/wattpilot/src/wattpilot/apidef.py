@@ -0,0 +1,124 @@
+"""Loading and caching of the compiled API definition (ressources/wattpilot.yaml)
+
+Parsing the YAML file is slow, so the compiled definition is cached as a pickle
+file keyed by the hash of the YAML file, the package version and the options
+used for compiling. A pre-built cache may be shipped in the package as
+ressources/wattpilot.pickle (see setup.py).
+
+This module must not import anything from the wattpilot package, so setup.py
+can load it without installing the package.
+"""
+import hashlib
+import logging
+import os
+import pickle
+
+import yaml
+
+_LOGGER = logging.getLogger(__name__)
+
+APIDEF_CACHE_VERSION = 1
+APIDEF_PREBUILT = "wattpilot.pickle"
+
+
+def apidef_cache_key(api_definition, split_properties, version=""):
+    h = hashlib.sha256(api_definition)
+    h.update(f"|{APIDEF_CACHE_VERSION}|{version}|{bool(split_properties)}".encode())
+    return h.hexdigest()
+
+
+def _add_to_dict_unique(d, k, v):
+    if k in d:
+        _LOGGER.warning(
+            f"About to add duplicate key {k} to dictionary - skipping!")
+    else:
+        d[k] = v
+    return d
+
+
+def compile_apidef(api_definition, split_properties):
+    """Compiles the YAML API definition into the wpdef dictionary used by the shell"""
+    wpdef = {
+        "config": {},
+        "messages": {},
+        "properties:": {},
+        "splitProperties": [],
+    }
+    wpdef["config"] = yaml.load(api_definition, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+    wpdef["messages"] = {x["key"]: x for x in wpdef["config"]["messages"]}
+    wpdef["properties"] = {}
+    for p in wpdef["config"]["properties"]:
+        _add_to_dict_unique(wpdef["properties"], p["key"], p)
+        if "childProps" in p and split_properties:
+            for cp in p["childProps"]:
+                cp = {
+                    # Defaults for split properties:
+                    "description": f"This is a child property of '{p['key']}'. See its description for more information.",
+                    "category": p["category"] if "category" in p else "",
+                    "jsonType": p["itemType"] if "itemType" in p else "",
+                } | cp | {
+                    # Overrides for split properties:
+                    "parentProperty": p["key"],
+                    "rw": "R",  # NOTE: Split properties currently can only be read
+                }
+                _add_to_dict_unique(wpdef["properties"], cp["key"], cp)
+                wpdef["splitProperties"].append(cp["key"])
+    return wpdef
+
+
+def _load_cache(data, key):
+    try:
+        cached = pickle.loads(data)
+    except Exception as e:
+        _LOGGER.warning(f"Ignoring unreadable API definition cache: {e}")
+        return None
+    if not isinstance(cached, dict) or cached.get("key") != key:
+        return None
+    return cached["wpdef"]
+
+
+def _dump_cache(wpdef, key):
+    return pickle.dumps({"key": key, "wpdef": wpdef}, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def read_apidef(api_definition, split_properties, version="", cache_dir=None, prebuilt=None):
+    """Returns the compiled API definition from the pre-built or local cache and compiles it otherwise
+
+    api_definition: content of wattpilot.yaml
+    cache_dir: directory to store the compiled definition in (None/'' disables caching)
+    prebuilt: content of a pre-built cache file shipped with the package (if any)
+    """
+    key = apidef_cache_key(api_definition, split_properties, version)
+    if prebuilt:
+        wpdef = _load_cache(prebuilt, key)
+        if wpdef is not None:
+            _LOGGER.debug("Using pre-built API definition")
+            return wpdef
+    cache_file = os.path.join(cache_dir, f"apidef-{key[:16]}.pickle") if cache_dir else None
+    if cache_file and os.path.exists(cache_file):
+        with open(cache_file, "rb") as f:
+            wpdef = _load_cache(f.read(), key)
+        if wpdef is not None:
+            _LOGGER.debug(f"Using cached API definition from {cache_file}")
+            return wpdef
+    wpdef = compile_apidef(api_definition, split_properties)
+    if cache_file:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+            with open(tmp_file, "wb") as f:
+                f.write(_dump_cache(wpdef, key))
+            os.replace(tmp_file, cache_file)
+            _LOGGER.debug(f"Cached compiled API definition in {cache_file}")
+        except OSError as e:
+            _LOGGER.warning(f"Unable to cache API definition in {cache_dir}: {e}")
+    return wpdef
+
+
+def build_prebuilt_apidef(source, target, version, split_properties=True):
+    """Writes a pre-built API definition cache (used by setup.py)"""
+    with open(source, "rb") as f:
+        api_definition = f.read()
+    key = apidef_cache_key(api_definition, split_properties, version)
+    with open(target, "wb") as f:
+        f.write(_dump_cache(compile_apidef(api_definition, split_properties), key))
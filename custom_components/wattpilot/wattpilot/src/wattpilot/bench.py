@@ -0,0 +1,267 @@
+"""Live latency and throughput measurement of Wattpilot connections (see the bench shell command)
+
+Measured are:
+- the round trip time between sending a property value and receiving its response
+- the inter-arrival times of deltaStatus frames (and their jitter)
+- frames and bytes per second by message type
+- optionally, the time needed to connect, authenticate and receive the full status using an additional session
+- optionally, the CPU time needed to process the received status frames with and without selective decoding
+"""
+import json
+import logging
+import statistics
+import threading
+
+from collections import deque
+from time import monotonic, perf_counter, sleep
+from types import SimpleNamespace
+
+from wattpilot import Event, Wattpilot
+
+_LOGGER = logging.getLogger(__name__)
+
+# Writable property whose current value is written back to measure round trip times:
+DEFAULT_PROBE_PROPERTY = "amp"
+# Properties decoded to measure selective decoding (if no others are given):
+DEFAULT_DECODE_PROPS = ["nrg", "car", "amp", "frc", "psm"]
+# Number of deltaStatus frames kept to measure the decoding:
+SAMPLE_FRAMES = 100
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def summarize(values):
+    """Returns count, percentiles, mean and standard deviation of durations in seconds as milliseconds"""
+    values = list(values)
+    stats = {
+        "count": len(values),
+        "min": min(values, default=None),
+        "mean": statistics.fmean(values) if values else None,
+        "p50": percentile(values, 0.5),
+        "p95": percentile(values, 0.95),
+        "p99": percentile(values, 0.99),
+        "max": max(values, default=None),
+        "stdev": statistics.pstdev(values) if values else None,
+    }
+    return {k: v if k == "count" or v is None else round(v * 1000, 3) for k, v in stats.items()}
+
+
+class TrafficMonitor:
+    """Counts frames and bytes per message type and the inter-arrival times of deltaStatus frames"""
+
+    def __init__(self):
+        self.frames = {}
+        self.bytes = {}
+        self.intervals = []
+        self.started = None
+        self.stopped = None
+        self.deltas = deque(maxlen=SAMPLE_FRAMES)
+        self._last_delta = None
+
+    def on_message(self, wp, wsapp, msg, msg_json):
+        now = monotonic()
+        self.frames[msg.type] = self.frames.get(msg.type, 0) + 1
+        self.bytes[msg.type] = self.bytes.get(msg.type, 0) + \
+            len(msg_json.encode() if isinstance(msg_json, str) else msg_json)
+        if msg.type == 'deltaStatus':
+            if self._last_delta is not None:
+                self.intervals.append(now - self._last_delta)
+            self._last_delta = now
+            self.deltas.append(msg_json)
+
+    def start(self, wp):
+        self.started = monotonic()
+        wp.add_event_handler(Event.WP_MESSAGE, self.on_message)
+
+    def stop(self, wp):
+        wp.remove_event_handler(Event.WP_MESSAGE, self.on_message)
+        self.stopped = monotonic()
+
+    def result(self):
+        duration = (self.stopped or monotonic()) - self.started
+        # Jitter as mean difference between consecutive inter-arrival times (see RFC 3550):
+        jitter = [abs(b - a) for a, b in zip(self.intervals, self.intervals[1:])]
+        return {
+            "durationS": round(duration, 3),
+            "messages": {
+                t: {
+                    "frames": self.frames[t],
+                    "bytes": self.bytes[t],
+                    "framesPerS": round(self.frames[t] / duration, 3),
+                    "bytesPerS": round(self.bytes[t] / duration, 3),
+                } for t in sorted(self.frames)
+            },
+            "deltaStatusIntervalMs": summarize(self.intervals),
+            "deltaStatusJitterMs": round(statistics.fmean(jitter) * 1000, 3) if jitter else None,
+        }
+
+
+class RttProbe:
+    """Measures the round trip time of set commands by writing back the current value of a property"""
+
+    def __init__(self, wp, prop_name, timeout=5):
+        self.wp = wp
+        self.prop_name = prop_name
+        self.timeout = timeout
+        self.rtts = []
+        self.sent = 0
+        self.failed = 0
+        self.timeouts = 0
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def on_response(self, wp, request_id, success, message):
+        with self._lock:
+            pending = self._pending.get(request_id)
+        if pending is not None:
+            pending.received = monotonic()
+            pending.success = success
+            pending.done.set()
+
+    def probe(self):
+        pending = SimpleNamespace(
+            done=threading.Event(), sent=None, received=None, success=None)
+        # Hold the lock until the request is registered, so fast responses are not missed:
+        with self._lock:
+            pending.sent = monotonic()
+            request_id = self.wp.send_update(
+                self.prop_name, self.wp.allProps[self.prop_name])
+            self._pending[request_id] = pending
+        self.sent += 1
+        if not pending.done.wait(self.timeout):
+            self.timeouts += 1
+        elif not pending.success:
+            self.failed += 1
+        else:
+            self.rtts.append(pending.received - pending.sent)
+        with self._lock:
+            del self._pending[request_id]
+
+    def start(self):
+        self.wp.add_event_handler(Event.WP_RESPONSE, self.on_response)
+
+    def stop(self):
+        self.wp.remove_event_handler(Event.WP_RESPONSE, self.on_response)
+
+    def result(self):
+        return {
+            "property": self.prop_name,
+            "sent": self.sent,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            "rttMs": summarize(self.rtts),
+        }
+
+
+def measure_auth(host, password, timeout=30):
+    """Connects a new session and returns the milliseconds until hello, authRequired, authSuccess and the complete fullStatus
+
+    Note: authRequired is recorded after the password hash has been calculated.
+    """
+    times = {}
+    done = threading.Event()
+
+    def on_message(wp, wsapp, msg, msg_json):
+        if msg.type == 'fullStatus' and getattr(msg, 'partial', False):
+            return
+        times.setdefault(msg.type, monotonic())
+        if msg.type in ['fullStatus', 'authError']:
+            done.set()
+
+    auth_wp = Wattpilot(host, password)
+    auth_wp.add_event_handler(Event.WP_MESSAGE, on_message)
+    started = monotonic()
+    auth_wp.connect()
+    try:
+        if not done.wait(timeout):
+            _LOGGER.warning(f"Timeout while measuring authentication with {host}")
+    finally:
+        auth_wp.remove_event_handler(Event.WP_MESSAGE, on_message)
+        auth_wp.disconnect()
+    return {
+        "success": "fullStatus" in times,
+        "ms": {t: round((times[t] - started) * 1000, 3) if t in times else None
+               for t in ['hello', 'authRequired', 'authSuccess', 'fullStatus']},
+    }
+
+
+def measure_decoding(frames, decode_props, count=1000):
+    """Processes status frames using Wattpilot objects with and without decode_props and returns the microseconds per frame
+
+    The frames of each type are replayed until at least count frames have been processed. The objects are
+    not connected, so only parsing, storing and dispatching the values is measured.
+    """
+    result = {}
+    for msg_type in ("fullStatus", "deltaStatus"):
+        samples = [f for f in frames if json.loads(f).get("type") == msg_type]
+        if not samples:
+            continue
+        repeat = -(-count // len(samples))
+        us = {}
+        for mode, props in (("all", None), ("selective", decode_props)):
+            target = Wattpilot("127.0.0.1", "", decode_props=props)
+            target.add_event_handler(Event.WP_PROPERTY, lambda wp, name, value: None)
+            target.process_message(samples[0])
+            started = perf_counter()
+            for _ in range(repeat):
+                for frame in samples:
+                    target.process_message(frame)
+            us[mode] = (perf_counter() - started) / (repeat * len(samples)) * 1e6
+        result[msg_type] = {
+            "frames": len(samples),
+            "allUs": round(us["all"], 1),
+            "selectiveUs": round(us["selective"], 1),
+            "speedup": round(us["all"] / us["selective"], 2),
+        }
+    return {"decodeProps": sorted(decode_props)} | result
+
+
+def run_benchmark(wp, duration, prop_name=None, credentials=None, probe_interval=1, decode_props=None):
+    """Measures the connection of wp for duration seconds and returns the results
+
+    prop_name: writable property used to measure the set-to-response round trip time (None to skip)
+    credentials: (host, password) to measure the authentication using an additional session (None to skip - the default)
+    decode_props: property keys to compare selective decoding of the received frames with decoding all properties (None to skip)
+    """
+    monitor = TrafficMonitor()
+    probe = RttProbe(wp, prop_name) if prop_name != None else None
+    monitor.start(wp)
+    if probe:
+        probe.start()
+    try:
+        deadline = monotonic() + duration
+        while monotonic() < deadline:
+            next_probe = monotonic() + probe_interval
+            if probe:
+                probe.probe()
+            sleep(max(0, min(next_probe, deadline) - monotonic()))
+    finally:
+        if probe:
+            probe.stop()
+        monitor.stop(wp)
+    result = {
+        "serial": wp.serial,
+        "url": wp.url,
+        "firmware": wp.firmware,
+    } | monitor.result()
+    if probe:
+        result["setValue"] = probe.result()
+    if decode_props != None:
+        # The current values form a complete fullStatus frame:
+        while True:
+            try:
+                status = dict(wp.allProps.items())
+                break
+            except (RuntimeError, KeyError):
+                # A property has been added or removed by the websocket thread meanwhile
+                continue
+        full = json.dumps({"type": "fullStatus", "partial": False, "status": status}, default=vars)
+        result["decoding"] = measure_decoding([full] + list(monitor.deltas), decode_props)
+    if credentials != None:
+        result["auth"] = measure_auth(*credentials)
+    return result
@@ -0,0 +1,307 @@
+"""Headless MQTT bridge running on an asyncio event loop
+
+Usage: wattpilotbridge
+
+The bridge is configured using the same environment variables as wattpilotshell
+(see README.md) plus the BRIDGE_* variables. It does not provide an interactive
+shell.
+
+Frames of a charger are still received by the websocket thread of the Wattpilot
+client, which only hands them over to a bounded queue (each charger also keeps
+its own watchdog thread). Publishing to MQTT,
+handling of set commands and the network I/O of the MQTT client all run on the
+event loop, so paho's network thread is not used.
+"""
+import asyncio
+import json
+import logging
+import os
+import signal
+
+from collections import deque
+from time import monotonic
+
+import paho.mqtt.client as mqtt
+
+from wattpilot import metrics
+from wattpilot import wattpilotshell as sh
+from wattpilot.bench import percentile
+
+_LOGGER = logging.getLogger(__name__)
+
+# Number of latency samples to calculate percentiles from:
+LATENCY_SAMPLES = 1000
+
+
+class AsyncioMqttHelper:
+    """Drives the network I/O of a paho MQTT client from an asyncio event loop
+
+    Socket callbacks may be called from other threads (e.g. when publishing from
+    a timer), so they are always handed over to the event loop.
+    """
+
+    def __init__(self, loop, client, reconnect_delay=5):
+        self.loop = loop
+        self.client = client
+        self.reconnect_delay = reconnect_delay
+        self.stopped = False
+        self._misc = None
+        client.on_socket_open = self.on_socket_open
+        client.on_socket_close = self.on_socket_close
+        client.on_socket_register_write = self.on_socket_register_write
+        client.on_socket_unregister_write = self.on_socket_unregister_write
+
+    def on_socket_open(self, client, userdata, sock):
+        self.loop.call_soon_threadsafe(self.loop.add_reader, sock, client.loop_read)
+        self.loop.call_soon_threadsafe(self._start_misc)
+
+    def on_socket_close(self, client, userdata, sock):
+        self.loop.call_soon_threadsafe(self.loop.remove_reader, sock)
+
+    def on_socket_register_write(self, client, userdata, sock):
+        self.loop.call_soon_threadsafe(self.loop.add_writer, sock, client.loop_write)
+
+    def on_socket_unregister_write(self, client, userdata, sock):
+        self.loop.call_soon_threadsafe(self.loop.remove_writer, sock)
+
+    def _start_misc(self):
+        if self._misc is None or self._misc.done():
+            self._misc = self.loop.create_task(self._misc_loop())
+
+    async def _misc_loop(self):
+        # Keepalive pings and reconnects (done by paho's thread otherwise):
+        while not self.stopped:
+            if self.client.loop_misc() == mqtt.MQTT_ERR_NO_CONN:
+                await asyncio.sleep(self.reconnect_delay)
+                if self.stopped:
+                    break
+                _LOGGER.info(f"Reconnecting to MQTT server ...")
+                try:
+                    await self.loop.run_in_executor(None, self.client.reconnect)
+                except OSError as e:
+                    _LOGGER.warning(f"Unable to reconnect to MQTT server: {e}")
+                continue
+            await asyncio.sleep(1)
+
+    def stop(self):
+        self.stopped = True
+        if self._misc is not None:
+            self._misc.cancel()
+
+
+class Bridge:
+    """Publishes the frames of all chargers to MQTT from a single event loop"""
+
+    def __init__(self, loop, queue_size, health_interval, health_topic, metrics_port=0, metrics_host=''):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.health_interval = health_interval
+        self.health_topic = health_topic
+        self.chargers = []
+        self.mqtt_client = None
+        self.mqtt_helper = None
+        self.started = monotonic()
+        self.received = 0
+        self.published = 0
+        self.dropped = 0
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+        self.metrics_port = metrics_port
+        self.metrics_host = metrics_host
+        self.metrics = metrics.MetricsExporter()
+        # Chargers which lost frames and need to publish all their properties again:
+        self._resync = set()
+        self._stopping = asyncio.Event()
+
+    def attach_loop(self, client):
+        self.mqtt_helper = AsyncioMqttHelper(self.loop, client)
+
+    def on_frame(self, wp, wsapp, msg, msg_json):
+        # Called in the websocket thread of the charger:
+        self.loop.call_soon_threadsafe(
+            self._enqueue, (wp, msg, msg_json, monotonic()))
+
+    def _enqueue(self, frame):
+        self.received += 1
+        if self.queue.full():
+            dropped = self.queue.get_nowait()
+            self.dropped += 1
+            self._resync.add(dropped[0])
+        self.queue.put_nowait(frame)
+
+    async def publish_frames(self):
+        while True:
+            wp, msg, msg_json, received = await self.queue.get()
+            try:
+                sh.mqtt_publish_message(wp, None, msg, msg_json)
+            except Exception as e:
+                _LOGGER.exception(f"Unable to publish message {msg.type}: {e}")
+            self.latencies.append(monotonic() - received)
+            self.published += 1
+            if self._resync and self.queue.empty():
+                self.resync()
+
+    def resync(self):
+        """Publish all properties of chargers which lost frames (unchanged values are skipped)"""
+        chargers = self._resync
+        self._resync = set()
+        for wp in chargers:
+            _LOGGER.warning(
+                f"Frames of charger {wp.serial} were dropped - publishing all properties again")
+            for prop_name, value in sh.wp_get_props_snapshot(wp):
+                sh.mqtt_publish_property(
+                    wp, self.mqtt_client, sh.wp_get_prop_def(prop_name), value)
+
+    def health(self, status="online"):
+        latencies = list(self.latencies)
+        return {
+            "status": status,
+            "uptime": round(monotonic() - self.started),
+            "mqttConnected": self.mqtt_client != None and self.mqtt_client.is_connected(),
+            "chargers": {wp.serial: {
+                "connected": wp.connected,
+                "pingRttMs": None if wp.pingRtt is None else round(wp.pingRtt * 1000, 3),
+                "reconnects": wp.reconnects,
+            } for wp in self.chargers},
+            "queue": self.queue.qsize(),
+            "queueSize": self.queue.maxsize,
+            "received": self.received,
+            "published": self.published,
+            "dropped": self.dropped,
+            "suppressed": sh.mqtt_suppressed_publishes,
+            "latencyMs": {
+                name: None if v is None else round(v * 1000, 3)
+                for name, v in [
+                    ("p50", percentile(latencies, 0.5)),
+                    ("p95", percentile(latencies, 0.95)),
+                    ("p99", percentile(latencies, 0.99)),
+                    ("max", max(latencies, default=None)),
+                ]
+            },
+        }
+
+    def publish_health(self, status="online"):
+        health = self.health(status)
+        _LOGGER.info(f"Bridge health: {json.dumps(health)}")
+        if self.health_topic != '':
+            return self.mqtt_client.publish(self.health_topic, json.dumps(health), retain=True)
+        return None
+
+    async def report_health(self):
+        while True:
+            await asyncio.sleep(self.health_interval)
+            self.publish_health()
+
+    async def serve_metrics(self, reader, writer):
+        # Minimal HTTP/1.x handler for Prometheus scrapes:
+        try:
+            request = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), 10)
+            method, path = (request.split(b"\r\n", 1)[0].split(b" ") + [b"", b""])[:2]
+            if method != b"GET" or path.split(b"?")[0] != b"/metrics":
+                writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            else:
+                openmetrics = b"application/openmetrics-text" in request
+                body = metrics.render(self.metrics, self.health(), openmetrics).encode()
+                content_type = metrics.CONTENT_TYPE_OPENMETRICS if openmetrics else metrics.CONTENT_TYPE_TEXT
+                writer.write(
+                    f"HTTP/1.1 200 OK\r\nContent-Type: {content_type}\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+            await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError, ConnectionError) as e:
+            _LOGGER.debug(f"Invalid metrics request: {e}")
+        finally:
+            writer.close()
+
+    def stop(self):
+        self._stopping.set()
+
+    async def run(self):
+        sh.wpdef = await self.loop.run_in_executor(None, sh.wp_read_apidef)
+        self.chargers = await self.loop.run_in_executor(None, sh.wp_connect_all)
+        setup = sh.ha_setup if sh.HA_ENABLED == 'true' else sh.mqtt_setup
+        self.mqtt_client = sh.mqtt_client = await self.loop.run_in_executor(
+            None, setup, self.chargers, self.attach_loop, self.on_frame)
+        tasks = [self.loop.create_task(self.publish_frames())]
+        if self.health_interval > 0:
+            tasks.append(self.loop.create_task(self.report_health()))
+        server = None
+        if self.metrics_port > 0:
+            self.metrics.start(self.chargers)
+            server = await asyncio.start_server(
+                self.serve_metrics, self.metrics_host or None, self.metrics_port)
+            _LOGGER.info(
+                f"Serving metrics on http://{self.metrics_host or '0.0.0.0'}:{self.metrics_port}/metrics")
+        _LOGGER.info(
+            f"Bridging {len(self.chargers)} charger(s) to MQTT - waiting for frames ...")
+        await self._stopping.wait()
+        if server != None:
+            server.close()
+            self.metrics.stop()
+        await self.shutdown(tasks)
+
+    async def shutdown(self, tasks):
+        _LOGGER.info(f"Shutting down bridge ...")
+        for wp in self.chargers:
+            wp.unregister_message_callback()
+        # Timers of held back values and commands must not fire once the event loop is closed:
+        sh.mqtt_stop_throttles()
+        sh.mqtt_stop_commands()
+        # Publish frames which have already been received:
+        while not self.queue.empty():
+            await asyncio.sleep(0)
+        for task in tasks:
+            task.cancel()
+        infos = [self.publish_health("offline")]
+        if sh.HA_ENABLED == 'true':
+            # ha_stop waits for its messages to be published, which requires the event loop to run meanwhile:
+            await self.loop.run_in_executor(None, sh.ha_stop, self.mqtt_client)
+        else:
+            infos.append(self.mqtt_client.publish(
+                sh.mqtt_available_topic, payload="offline", qos=0, retain=True))
+            sh.mqtt_stop(self.mqtt_client)
+        # Let the event loop send the remaining messages:
+        deadline = monotonic() + 5
+        while any(i != None and not i.is_published() for i in infos) and monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        self.mqtt_helper.stop()
+        for wp in self.chargers:
+            wp.disconnect()
+
+
+def main_setup_env():
+    global BRIDGE_HEALTH_INTERVAL_S
+    global BRIDGE_METRICS_HOST
+    global BRIDGE_METRICS_PORT
+    global BRIDGE_QUEUE_SIZE
+    global BRIDGE_TOPIC_HEALTH
+    BRIDGE_HEALTH_INTERVAL_S = int(
+        os.environ.get('BRIDGE_HEALTH_INTERVAL_S', '60'))
+    BRIDGE_METRICS_HOST = os.environ.get('BRIDGE_METRICS_HOST', '')
+    BRIDGE_METRICS_PORT = int(os.environ.get('BRIDGE_METRICS_PORT', '0'))
+    BRIDGE_QUEUE_SIZE = int(os.environ.get('BRIDGE_QUEUE_SIZE', '1000'))
+    BRIDGE_TOPIC_HEALTH = os.environ.get(
+        'BRIDGE_TOPIC_HEALTH', '{baseTopic}/bridge/health')
+    assert sh.MQTT_HOST != '', 'MQTT_HOST not set!'
+
+
+async def main_async():
+    loop = asyncio.get_running_loop()
+    bridge = Bridge(loop, BRIDGE_QUEUE_SIZE, BRIDGE_HEALTH_INTERVAL_S,
+                    sh.mqtt_subst_topic(BRIDGE_TOPIC_HEALTH, {}) if BRIDGE_TOPIC_HEALTH != '' else '',
+                    BRIDGE_METRICS_PORT, BRIDGE_METRICS_HOST)
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, bridge.stop)
+    await bridge.run()
+
+
+def main():
+    # Setup environment variables:
+    sh.main_setup_env()
+    main_setup_env()
+
+    # Set debug level:
+    logging.basicConfig(level=sh.WATTPILOT_DEBUG_LEVEL)
+
+    asyncio.run(main_async())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,312 @@
+import logging
+import threading
+
+from collections.abc import Mapping
+from time import monotonic
+
+from . import Event, Wattpilot
+
+_LOGGER = logging.getLogger(__name__)
+
+STANDBY_WARM = 'warm'
+STANDBY_LAZY = 'lazy'
+# Set commands awaiting a response (the oldest are dropped):
+MAX_PENDING_REQUESTS = 1000
+
+
+class MergedProps(Mapping):
+    """Read-only view of the properties of the active session, overlaid with fresher values of the standby session"""
+
+    def __init__(self,hedged):
+        self._hedged=hedged
+
+    @property
+    def lazy(self):
+        return self._hedged._active.allProps.lazy
+
+    @property
+    def excluded(self):
+        return self._hedged._active.allProps.excluded
+
+    @property
+    def version(self):
+        """Returns a value which changes whenever a property of either session changes"""
+        return (self._hedged._active is self._hedged._local, self._hedged._local.allProps.version, self._hedged._cloud.allProps.version)
+
+    def __getitem__(self,key):
+        session = self._hedged._fresher.get(key,self._hedged._active)
+        return session.allProps[key]
+
+    def __contains__(self,key):
+        return key in self._hedged._active.allProps or key in self._hedged._fresher
+
+    def __iter__(self):
+        props = self._hedged._active.allProps
+        yield from props
+        yield from (key for key in tuple(self._hedged._fresher) if key not in props)
+
+    def __len__(self):
+        props = self._hedged._active.allProps
+        return len(props) + sum(1 for key in tuple(self._hedged._fresher) if key not in props)
+
+
+class HedgedWattpilot(object):
+    """Wattpilot connected locally and via the cloud, failing over between both sessions
+
+    The local session is the primary one. The cloud session is either kept
+    connected as warm standby or only connected once the local session fails
+    (standby='lazy'). A session is healthy while it is connected and has
+    received a message within the last stale_after seconds (by default the
+    staleness limit of the session's own watchdog, see Wattpilot.staleAfter).
+
+    The properties, events and commands of the active session are exposed
+    like those of a single Wattpilot object. State is merged from whichever
+    session is fresher: a value changed by the standby session at least
+    merge_after seconds after the active session last changed it (e.g. while
+    the active session silently stopped receiving updates) is passed on and
+    returned by allProps until the active session changes it again. When
+    switching sessions, handlers receive WP_PROPERTY events for all values
+    which differ from the merged ones, so consumers do not have to reload. Set commands are sent using
+    the active session. Request ids are assigned by this object, so the ids
+    of both sessions do not collide, and responses are only passed on from the
+    session which sent the command.
+    """
+
+    def __init__(self,ip,password,serial,standby=STANDBY_WARM,stale_after=None,check_interval=1,merge_after=2,**kwargs):
+        """kwargs: additional arguments for both Wattpilot objects (e.g. exclude_props)"""
+        self._local=Wattpilot(ip,password,serial=serial,cloud=False,**kwargs)
+        self._cloud=Wattpilot(ip,password,serial=serial,cloud=True,**kwargs)
+        self._standby=standby
+        self._staleAfter=stale_after
+        self._checkInterval=check_interval
+        self._mergeAfter=merge_after
+        self._active=self._local
+        # Standby session per property key whose value is fresher than the one of the active session:
+        self._fresher={}
+        self._allProps=MergedProps(self)
+        self._started=0
+        self._localHealthySince=None
+        self._cloudConnected=False
+        self._failovers=0
+        self._requestid=0
+        # Request id of this object per (session, request id of the session):
+        self._requests={}
+        self._event_handlers={}
+        self._message_callback=None
+        self._property_callback=None
+        self._lock=threading.RLock()
+        self._monitor=None
+        self._stopped=threading.Event()
+        for session in (self._local,self._cloud):
+            session.add_event_handler(Event.WP_MESSAGE,self.__on_message)
+            session.add_event_handler(Event.WP_PROPERTY,self.__on_property)
+            session.add_event_handler(Event.WP_INVERTER,self.__on_inverter)
+            session.add_event_handler(Event.WP_RESPONSE,self.__on_response)
+
+    def __getattr__(self,name):
+        # Everything else (e.g. name, serial, firmware, model) is provided by the active session
+        if name == '_active':
+            raise AttributeError(name)
+        return getattr(self._active,name)
+
+    def __str__(self):
+        return str(self._active)
+
+    @property
+    def active(self):
+        """Returns the active session (a Wattpilot object)"""
+        return self._active
+
+    @property
+    def isLocal(self):
+        """Returns True if the local session is active"""
+        return self._active is self._local
+
+    @property
+    def failovers(self):
+        """Returns the number of times the active session has been switched"""
+        return self._failovers
+
+    @property
+    def connected(self):
+        return self.is_healthy(self._local) or self.is_healthy(self._cloud) or self._active.connected
+
+    @property
+    def allProps(self):
+        """Returns the properties of the active session merged with fresher values of the standby session"""
+        return self._allProps
+
+    @property
+    def allPropsInitialized(self):
+        return self._active.allPropsInitialized
+
+    def is_healthy(self,session):
+        age = session.lastMessageAge
+        return session.connected and session.allPropsInitialized and age is not None and age < self.__stale_after(session)
+
+    def __stale_after(self,session):
+        return self._staleAfter if self._staleAfter is not None else session.staleAfter
+
+    def connect(self):
+        self._stopped.clear()
+        self._started = monotonic()
+        self._local.connect()
+        if self._standby == STANDBY_WARM:
+            self.__connect_cloud()
+        self._monitor = threading.Thread(target=self.__monitor)
+        self._monitor.daemon = True
+        self._monitor.start()
+
+    def disconnect(self):
+        self._stopped.set()
+        self._local.disconnect()
+        self._cloud.disconnect()
+        self._cloudConnected = False
+
+    def __connect_cloud(self):
+        self._cloud.connect()
+        self._cloudConnected = True
+
+    def register_message_callback(self,callback_fn):
+        """signature of callback_fn: (wp,wsapp,msg,msg_json)"""
+        self._message_callback = callback_fn
+
+    def unregister_message_callback(self):
+        self._message_callback = None
+
+    def register_property_callback(self,callback_fn):
+        """signature of callback_fn: (name,value)"""
+        self._property_callback = callback_fn
+
+    def unregister_property_callback(self):
+        self._property_callback = None
+
+    def add_event_handler(self,event,callback_fn):
+        """Add a handler for an Event type - handlers are called with this object as first argument"""
+        handlers = self._event_handlers.setdefault(event,[])
+        if callback_fn not in handlers:
+            handlers.append(callback_fn)
+
+    def remove_event_handler(self,event,callback_fn):
+        handlers = self._event_handlers.get(event,[])
+        if callback_fn in handlers:
+            handlers.remove(callback_fn)
+
+    def __call_event_handlers(self,event,*args):
+        for callback_fn in tuple(self._event_handlers.get(event,())):
+            try:
+                callback_fn(self,*args)
+            except Exception as e:
+                _LOGGER.error("Event handler for %s failed: %s (%s.%s)", event, str(e), e.__class__.__module__, type(e).__name__)
+
+    def __on_message(self,session,wsapp,msg,msg_json):
+        with self._lock:
+            if session is not self._active:
+                return
+            if self._message_callback != None:
+                self._message_callback(self,wsapp,msg,msg_json)
+            self.__call_event_handlers(Event.WP_MESSAGE,wsapp,msg,msg_json)
+
+    def __on_property(self,session,name,value):
+        with self._lock:
+            if session is self._active:
+                standby = self._fresher.pop(name,None)
+                if standby is not None and name in standby.allProps and standby.allProps[name] == value:
+                    # The active session received the value which has already been passed on from the standby session
+                    return
+                self.__property_changed(name,value)
+            elif self.__is_fresher(session,name):
+                self._fresher[name] = session
+                self.__property_changed(name,value)
+
+    def __is_fresher(self,session,name):
+        """Returns True if the value of the standby session changed merge_after seconds after the one of the active session"""
+        if name in self._active.allProps.excluded:
+            return False
+        changed = session.allProps.changed(name)
+        active_changed = self._active.allProps.changed(name)
+        return changed is not None and (active_changed is None or changed[1] - active_changed[1] >= self._mergeAfter)
+
+    def __property_changed(self,name,value):
+        if self._property_callback != None:
+            self._property_callback(name,value)
+        self.__call_event_handlers(Event.WP_PROPERTY,name,value)
+
+    def __on_inverter(self,session,inverter_id,field,value):
+        with self._lock:
+            if session is self._active:
+                self.__call_event_handlers(Event.WP_INVERTER,inverter_id,field,value)
+
+    def __on_response(self,session,request_id,success,message):
+        # Commands may have been sent before switching, so responses of both sessions are mapped
+        with self._lock:
+            hedged_id = self._requests.pop((session,request_id),None)
+        if hedged_id is not None:
+            self.__call_event_handlers(Event.WP_RESPONSE,hedged_id,success,message)
+
+    def __monitor(self):
+        while not self._stopped.wait(self._checkInterval):
+            try:
+                self.__check_sessions()
+            except Exception as e:
+                _LOGGER.error("Checking Wattpilot sessions failed: %s (%s.%s)", str(e), e.__class__.__module__, type(e).__name__)
+
+    def __check_sessions(self):
+        now = monotonic()
+        if self.is_healthy(self._local):
+            if self._localHealthySince is None:
+                self._localHealthySince = now
+        else:
+            self._localHealthySince = None
+        if self._active is self._local and self._localHealthySince is None and now - self._started >= self.__stale_after(self._local):
+            if not self._cloudConnected:
+                _LOGGER.info("Local session of Wattpilot %s failed - connecting cloud session", self._local.serial)
+                self.__connect_cloud()
+            if self.is_healthy(self._cloud):
+                self.__switch(self._cloud)
+        elif self._active is self._cloud and self._localHealthySince is not None and now - self._localHealthySince >= self.__stale_after(self._local):
+            # Only switch back once the local session has been healthy for a while to not flap
+            self.__switch(self._local)
+            if self._standby == STANDBY_LAZY:
+                self._cloud.disconnect()
+                self._cloudConnected = False
+
+    def __switch(self,session):
+        with self._lock:
+            previous = self._active
+            self._active = session
+            self._failovers += 1
+            _LOGGER.warning("Wattpilot %s switched to %s session", session.serial, "local" if session is self._local else "cloud")
+            # Pass on all values which differ from the merged values of both sessions:
+            fresher = self._fresher
+            self._fresher = {}
+            while True:
+                try:
+                    names = list(session.allProps)
+                    break
+                except RuntimeError:
+                    # A new property has been added by the websocket thread meanwhile
+                    continue
+            for name in names:
+                value = session.allProps[name]
+                merged = fresher.get(name,previous).allProps
+                if name not in merged or merged[name] != value:
+                    self.__property_changed(name,value)
+
+    def set_power(self,power):
+        return self.send_update("amp",power)
+
+    def set_mode(self,mode):
+        return self.send_update("lmo",mode)
+
+    def send_update(self,name,value):
+        """Sends a new property value using the active session and returns the request id (see Event.WP_RESPONSE)"""
+        # The lock is held until the request is registered, so fast responses are not missed:
+        with self._lock:
+            session = self._active
+            session_id = session.send_update(name,value)
+            self._requestid += 1
+            if len(self._requests) >= MAX_PENDING_REQUESTS:
+                self._requests.pop(next(iter(self._requests)))
+            self._requests[(session,session_id)] = self._requestid
+            return self._requestid
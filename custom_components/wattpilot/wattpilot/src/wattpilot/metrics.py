@@ -0,0 +1,156 @@
+"""Rendering of charger properties and bridge metrics for Prometheus
+
+Metrics are rendered in the OpenMetrics text format or - for scrapers not
+accepting it - in the Prometheus text format, which differ in the name of
+counter families and the terminating EOF line.
+
+Numeric properties (including split child properties like nrg_pl1) are
+exposed as gauges named wattpilot_<propName> with a serial label. The text of
+each property (together with its child properties) is cached and only
+rendered again if the property changed since the last scrape, so scrapes of
+unchanged chargers just join the cached text.
+"""
+import math
+import re
+import threading
+
+from wattpilot import Event
+from wattpilot import wattpilotshell as sh
+
+CONTENT_TYPE_OPENMETRICS = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+CONTENT_TYPE_TEXT = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def metric_name(name):
+    return "wattpilot_" + re.sub(r'[^a-zA-Z0-9_]', '_', name)
+
+
+def metric_value(value):
+    """Returns the sample value of a numeric property (None for other values)"""
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        if math.isnan(value):
+            return "NaN"
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        return repr(value)
+    return None
+
+
+def escape_help(s):
+    return s.replace('\\', '\\\\').replace('\n', '\\n')
+
+
+class MetricsExporter:
+    """Keeps the OpenMetrics text of the properties of chargers up to date"""
+
+    def __init__(self):
+        self.chargers = []
+        self.renders = 0
+        self._lock = threading.Lock()
+        # Latest value per property key and serial number and keys changed since the last render:
+        self._values = {}
+        self._dirty = set()
+        # Rendered text per property key and of all properties:
+        self._blocks = {}
+        self._text = ""
+
+    def on_property(self, wp, name, value):
+        with self._lock:
+            self._values.setdefault(name, {})[wp.serial] = value
+            self._dirty.add(name)
+
+    def start(self, chargers):
+        self.chargers = list(chargers)
+        for wp in self.chargers:
+            wp.add_event_handler(Event.WP_PROPERTY, self.on_property)
+            for name, value in wp.allProps.items():
+                self.on_property(wp, name, value)
+
+    def stop(self):
+        for wp in self.chargers:
+            wp.remove_event_handler(Event.WP_PROPERTY, self.on_property)
+        self.chargers = []
+
+    def _render_family(self, pd, samples):
+        lines = []
+        for serial, value in samples:
+            v = metric_value(value)
+            if v != None:
+                lines.append(f'{metric_name(pd["key"])}{{serial="{serial}"}} {v}\n')
+        if not lines:
+            return ""
+        name = metric_name(pd["key"])
+        title = pd.get("title", pd.get("alias", pd["key"]))
+        return f"# TYPE {name} gauge\n# HELP {name} {escape_help(title)}\n" + "".join(lines)
+
+    def _render_property(self, name, values):
+        pd = sh.wp_get_prop_def(name)
+        text = self._render_family(pd, values.items())
+        if sh.WATTPILOT_SPLIT_PROPERTIES and "childProps" in pd:
+            children = {}
+            for serial, value in values.items():
+                for cpd, cv in sh.wp_split_prop_value(pd, value):
+                    children.setdefault(cpd["key"], (cpd, []))[1].append((serial, cv))
+            text += "".join(self._render_family(cpd, samples) for cpd, samples in children.values())
+        return text
+
+    def render_properties(self):
+        """Returns the text of all properties - only changed properties are rendered again"""
+        with self._lock:
+            if not self._dirty:
+                return self._text
+            dirty = self._dirty
+            self._dirty = set()
+            values = {name: dict(self._values[name]) for name in dirty}
+        for name in dirty:
+            self._blocks[name] = self._render_property(name, values[name])
+        self.renders += len(dirty)
+        self._text = "".join(self._blocks[name] for name in sorted(self._blocks))
+        return self._text
+
+
+def render_bridge_metrics(health, openmetrics=True):
+    """Returns the text of the bridge metrics (see Bridge.health)
+
+    Counter samples are always named <name>_total, which OpenMetrics declares
+    as family <name> and the Prometheus text format as family <name>_total.
+    """
+    lines = []
+
+    def family(name, mtype, help_text, samples):
+        suffix = "_total" if mtype == "counter" else ""
+        family_name = f"wattpilot_bridge_{name}" + ("" if openmetrics else suffix)
+        lines.append(f"# TYPE {family_name} {mtype}\n# HELP {family_name} {help_text}\n")
+        for labels, v in samples:
+            v = metric_value(v)
+            if v != None:
+                lines.append(f"wattpilot_bridge_{name}{suffix}{labels} {v}\n")
+
+    family("up", "gauge", "Whether the charger is connected",
+           [(f'{{serial="{serial}"}}', int(c["connected"])) for serial, c in health["chargers"].items()])
+    family("ping_rtt_milliseconds", "gauge", "Round trip time of the last websocket ping",
+           [(f'{{serial="{serial}"}}', c["pingRttMs"]) for serial, c in health["chargers"].items()])
+    family("reconnects", "counter", "Reconnects of the charger connection",
+           [(f'{{serial="{serial}"}}', c["reconnects"]) for serial, c in health["chargers"].items()])
+    family("mqtt_connected", "gauge", "Whether the MQTT client is connected",
+           [("", int(health["mqttConnected"]))])
+    family("uptime_seconds", "gauge", "Seconds since the bridge was started", [("", health["uptime"])])
+    family("queue_frames", "gauge", "Frames waiting to be published", [("", health["queue"])])
+    family("received_frames", "counter", "Frames received from chargers", [("", health["received"])])
+    family("published_frames", "counter", "Frames published to MQTT", [("", health["published"])])
+    family("dropped_frames", "counter", "Frames dropped because the queue was full", [("", health["dropped"])])
+    family("suppressed_publishes", "counter", "Unchanged property states not published again",
+           [("", health["suppressed"])])
+    family("latency_milliseconds", "gauge", "Latency between receiving and publishing recent frames",
+           [(f'{{stat="{stat}"}}', v) for stat, v in health["latencyMs"].items()])
+    return "".join(lines)
+
+
+def render(exporter, health, openmetrics=True):
+    """Returns the complete exposition text of the properties and the bridge metrics"""
+    text = exporter.render_properties() + render_bridge_metrics(health, openmetrics)
+    return text + "# EOF\n" if openmetrics else text
@@ -0,0 +1,1573 @@
+# Generated by wattpilot.modelgen from ressources/wattpilot.yaml - DO NOT EDIT!
+# Regenerate using: python -m wattpilot.modelgen
+from __future__ import annotations
+
+from types import SimpleNamespace
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Any
+
+ACS_VALUES = {0: 'Open', 1: 'Wait'}
+AWC_VALUES = {0: 'Austria', 1: 'Germany'}
+CAR_VALUES = {0: 'Unknown/Error', 1: 'Idle', 2: 'Charging', 3: 'WaitCar', 4: 'Complete', 5: 'Error'}
+CDI_TYPE_VALUES = {0: 'Counter', 1: 'Duration'}
+CUS_VALUES = {0: 'Unknown', 1: 'Unlocked', 2: 'UnlockFailed', 3: 'Locked', 4: 'LockFailed', 5: 'LockUnlockPowerout'}
+ECF_SOURCE_VALUES = {0: 'XTAL', 1: 'PLL', 2: '8M', 3: 'APLL'}
+ECI_MODEL_VALUES = {1: 'ESP32', 2: 'ESP32S2', 4: 'ESP32S3', 5: 'ESP32C3'}
+ECI_FEATURES_BITS = {0: 'EMB_FLASH', 1: 'WIFI_BGN', 4: 'BLE', 5: 'BT'}
+EFI_SPI_MODE_VALUES = {0: 'QIO', 1: 'QOUT', 2: 'DIO', 3: 'DOUT', 4: 'FAST_READ', 5: 'SLOW_READ'}
+EFI_SPI_SPEED_VALUES = {0: '40M', 1: '26M', 2: '20M', 15: '80M'}
+EFI_SPI_SIZE_VALUES = {0: '1MB', 1: '2MB', 2: '4MB', 3: '8MB', 4: '16MB', 5: 'MAX'}
+ERR_VALUES = {0: 'None', 1: 'FiAc', 2: 'FiDc', 3: 'Phase', 4: 'Overvolt', 5: 'Overamp', 6: 'Diode', 7: 'PpInvalid', 8: 'GndInvalid', 9: 'ContactorStuck', 10: 'ContactorMiss', 11: 'FiUnknown', 12: 'Unknown', 13: 'Overtemp', 14: 'NoComm', 15: 'StatusLockStuckOpen', 16: 'StatusLockStuckLocked', 20: 'Reserved20', 21: 'Reserved21', 22: 'Reserved22', 23: 'Reserved23', 24: 'Reserved24'}
+ESR_VALUES = {0: 'NO_MEAN', 1: 'POWERON_RESET', 3: 'SW_RESET', 4: 'OWDT_RESET', 5: 'DEEPSLEEP_RESET', 6: 'SDIO_RESET', 7: 'TG0WDT_SYS_RESET', 8: 'TG1WDT_SYS_RESET', 9: 'RTCWDT_SYS_RESET', 10: 'INTRUSION_RESET', 11: 'TGWDT_CPU_RESET', 12: 'SW_CPU_RESET', 13: 'RTCWDT_CPU_RESET', 14: 'EXT_CPU_RESET', 15: 'RTCWDT_BROWN_OUT_RESET', 16: 'RTCWDT_RTC_RESET'}
+FEM_VALUES = {0: 'Disabled', 1: 'Development', 2: 'Release'}
+FFB_VALUES = {0: 'NoProblem', 1: 'ProblemLock', 2: 'ProblemUnlock'}
+FRC_VALUES = {0: 'Neutral', 1: 'Off', 2: 'On'}
+FRM_VALUES = {0: 'PreferPowerFromGrid', 1: 'Default', 2: 'PreferPowerToGrid'}
+LCK_VALUES = {0: 'Normal', 1: 'AutoUnlock', 2: 'AlwaysLock', 3: 'ForceUnlock'}
+LMO_VALUES = {3: 'Default', 4: 'Awattar', 5: 'AutomaticStop'}
+LOTY_VALUES = {0: 'Static', 1: 'Dynamic'}
+MODELSTATUS_VALUES = {0: 'NotChargingBecauseNoChargeCtrlData', 1: 'NotChargingBecauseOvertemperature', 2: 'NotChargingBecauseAccessControlWait', 3: 'ChargingBecauseForceStateOn', 4: 'NotChargingBecauseForceStateOff', 5: 'NotChargingBecauseScheduler', 6: 'NotChargingBecauseEnergyLimit', 7: 'ChargingBecauseAwattarPriceLow', 8: 'ChargingBecauseAutomaticStopTestLadung', 9: 'ChargingBecauseAutomaticStopNotEnoughTime', 10: 'ChargingBecauseAutomaticStop', 11: 'ChargingBecauseAutomaticStopNoClock', 12: 'ChargingBecausePvSurplus', 13: 'ChargingBecauseFallbackGoEDefault', 14: 'ChargingBecauseFallbackGoEScheduler', 15: 'ChargingBecauseFallbackDefault', 16: 'NotChargingBecauseFallbackGoEAwattar', 17: 'NotChargingBecauseFallbackAwattar', 18: 'NotChargingBecauseFallbackAutomaticStop', 19: 'ChargingBecauseCarCompatibilityKeepAlive', 20: 'ChargingBecauseChargePauseNotAllowed', 22: 'NotChargingBecauseSimulateUnplugging', 23: 'NotChargingBecausePhaseSwitch', 24: 'NotChargingBecauseMinPauseDuration'}
+MSI_VALUES = {0: 'NotChargingBecauseNoChargeCtrlData', 1: 'NotChargingBecauseOvertemperature', 2: 'NotChargingBecauseAccessControlWait', 3: 'ChargingBecauseForceStateOn', 4: 'NotChargingBecauseForceStateOff', 5: 'NotChargingBecauseScheduler', 6: 'NotChargingBecauseEnergyLimit', 7: 'ChargingBecauseAwattarPriceLow', 8: 'ChargingBecauseAutomaticStopTestLadung', 9: 'ChargingBecauseAutomaticStopNotEnoughTime', 10: 'ChargingBecauseAutomaticStop', 11: 'ChargingBecauseAutomaticStopNoClock', 12: 'ChargingBecausePvSurplus', 13: 'ChargingBecauseFallbackGoEDefault', 14: 'ChargingBecauseFallbackGoEScheduler', 15: 'ChargingBecauseFallbackDefault', 16: 'NotChargingBecauseFallbackGoEAwattar', 17: 'NotChargingBecauseFallbackAwattar', 18: 'NotChargingBecauseFallbackAutomaticStop', 19: 'ChargingBecauseCarCompatibilityKeepAlive', 20: 'ChargingBecauseChargePauseNotAllowed', 22: 'NotChargingBecauseSimulateUnplugging', 23: 'NotChargingBecausePhaseSwitch', 24: 'NotChargingBecauseMinPauseDuration'}
+OCS_VALUES = {0: 'Idle', 1: 'Updating', 2: 'Failed', 3: 'Succeeded'}
+PSM_VALUES = {0: 'Auto', 1: 'Force_1', 2: 'Force_3'}
+PWM_VALUES = {0: 'Force_3', 1: 'Wish_1', 2: 'Wish_3'}
+RR_VALUES = {0: 'UNKNOWN', 1: 'POWERON', 2: 'EXT', 3: 'SW', 4: 'PANIC', 5: 'INT_WDT', 6: 'TASK_WDT', 7: 'WDT', 8: 'DEEPSLEEP', 9: 'BROWNOUT', 10: 'SDIO'}
+SCAS_VALUES = {0: 'None', 1: 'Scanning', 2: 'Finished', 3: 'Failed'}
+SCH_SATUR_CONTROL_VALUES = {0: 'Disabled', 1: 'Inside', 2: 'Outside'}
+SCH_SUND_CONTROL_VALUES = {0: 'Disabled', 1: 'Inside', 2: 'Outside'}
+SCH_WEEK_CONTROL_VALUES = {0: 'Disabled', 1: 'Inside', 2: 'Outside'}
+TDS_VALUES = {0: 'None', 1: 'EuropeanSummerTime', 2: 'UsDaylightTime'}
+TSOM_VALUES = {0: 'POLL', 1: 'LISTENONLY'}
+TSSM_VALUES = {0: 'IMMED', 1: 'SMOOTH'}
+TSSS_VALUES = {0: 'RESET', 1: 'COMPLETED', 2: 'IN_PROGRESS'}
+UST_VALUES = {0: 'Normal', 1: 'AutoUnlock', 2: 'AlwaysLock'}
+VAR_VALUES = {11: '11kW/16A', 22: '22kW/32A'}
+WSMS_VALUES = {0: 'None', 1: 'Scanning', 2: 'Connecting', 3: 'Connected'}
+WST_VALUES = {0: 'IDLE_STATUS', 1: 'NO_SSID_AVAIL', 2: 'SCAN_COMPLETED', 3: 'CONNECTED', 4: 'CONNECT_FAILED', 5: 'CONNECTION_LOST', 6: 'DISCONNECTED', 8: 'CONNECTING', 9: 'DISCONNECTING', 10: 'NO_SHIELD'}
+
+
+class WattpilotModel:
+    """Typed view on the properties of a Wattpilot using the YAML alias names"""
+
+    __slots__ = (
+        'abm',
+        'accessState',
+        'allowedCurrent',
+        'acui',
+        'adapterLimit',
+        'adapterLimit1',
+        'adapterLimit2',
+        'adapterLimit3',
+        'adapterLimit4',
+        'adapterLimit5',
+        'allowCharging',
+        'maxCurrentLimit',
+        'chargingCurrent',
+        'temperatureCurrentLimit',
+        'firmwareDescription',
+        'appRecommendedVersion',
+        'asc',
+        'aup',
+        'awattarCountry',
+        'awattarCurrentPrice',
+        'awattarMaxPrice',
+        'awattarPriceList',
+        'buttonAllowCurrentChange',
+        'bam',
+        'cae',
+        'cak',
+        'carState',
+        'registeredCards',
+        'cableCurrentLimit',
+        'cbm',
+        'cloudClientAuth',
+        'colorCharging',
+        'cci',
+        'carConsumption',
+        'chargeControllerRecommendedVersion',
+        'chargeControllerUpdateProgress',
+        'currentlyConnectedWifi',
+        'chargingDurationInfo',
+        'cdv',
+        'colorFinished',
+        'chr',
+        'colorIdle',
+        'currentLimitPresets',
+        'cpEnable',
+        'cpEnableRequest',
+        'csca',
+        'carType',
+        'cableUnlockStatus',
+        'colorWaitCar',
+        'cloudWsEnabled',
+        'cloudWsStarted',
+        'cloudWsConnected',
+        'cloudWsConnectedAge',
+        'data',
+        'dbm',
+        'dccu',
+        'dco',
+        'deltaCurrent',
+        'deltaPower',
+        'dll',
+        'dnsServer',
+        'chargingEnergyLimit',
+        'espCpuFreq',
+        'espChipInfo',
+        'espFreeHeap',
+        'espFreeHeap32',
+        'espFreeHeap8',
+        'espFlashInfo',
+        'espHeapSize',
+        'espMinFreeHeap',
+        'espMaxHeap',
+        'ens',
+        'errorState',
+        'energySetKwh',
+        'rtcResetReasons',
+        'energyCounterTotal',
+        'energyTotalPersisted',
+        'factoryWifiApKey',
+        'pvBatteryLimit',
+        'fap',
+        'fbufAge',
+        'akkuMode',
+        'akkuSoc',
+        'ohmpilotState',
+        'ohmpilotTemperature',
+        'powerAcTotal',
+        'powerAkku',
+        'powerGrid',
+        'powerPv',
+        'fcc',
+        'fck',
+        'flashEncryptionMode',
+        'effectiveRoundingMode',
+        'lockFeedback',
+        'lockFeedbackAge',
+        'factoryFriendlyName',
+        'fhi',
+        'frequency',
+        'fi23',
+        'fio23',
+        'fit',
+        'fml',
+        'fmmp',
+        'minChargeTime',
+        'friendlyName',
+        'fntp',
+        'ohmpilotTemperatureLimit',
+        'forceState',
+        'frci',
+        'fre',
+        'roundingMode',
+        'forceSinglePhase',
+        'forceSinglePhaseToggleWishedSince',
+        'startingPower',
+        'fte',
+        'ftlf',
+        'ftls',
+        'ftt',
+        'useDynamicPricing',
+        'usePvSurplus',
+        'factoryWifiApName',
+        'firmwareCarControl',
+        'firmwareVersion',
+        'zeroFeedin',
+        'gme',
+        'gmk',
+        'hostname',
+        'httpStaAuthentication',
+        'hsta',
+        'hsts',
+        'httpStaReachable',
+        'inverterDataOverride',
+        'imd',
+        'imi',
+        'immr',
+        'imp',
+        'ims',
+        'imse',
+        'inverterDataAge',
+        'irs',
+        'isml',
+        'iuse',
+        'las',
+        'lbh',
+        'lastButtonPress',
+        'ledBrightness',
+        'lbs',
+        'lastCarStateChangedFromCharging',
+        'lastCarStateChangedFromIdle',
+        'lastCarStateChangedToCharging',
+        'lch',
+        'effectiveLockSetting',
+        'ledInfo',
+        'ledo',
+        'lastForceSinglePhaseToggle',
+        'llr',
+        'logicMode',
+        'lastModelStatusChange',
+        'loadBalancingAmpere',
+        'localTime',
+        'loadBalancingEnabled',
+        'loadFallback',
+        'loadGroupId',
+        'loi',
+        'loadBalancingMembers',
+        'loadPriority',
+        'loadBalancingStatus',
+        'loadBalancingTotalAmpere',
+        'loadBalancingType',
+        'lps',
+        'lastPvSurplusCalculation',
+        'lrc',
+        'lri',
+        'lrr',
+        'ledSaveEnergy',
+        'lastStaSwitchedFromConnected',
+        'lastStaSwitchedToConnected',
+        'maca',
+        'macs',
+        'loadMapping',
+        'minChargingCurrent',
+        'minimumChargingInterval',
+        'minChargePauseDuration',
+        'minChargePauseEndsAt',
+        'moduleHwPcbVersion',
+        'modelStatus',
+        'minPhaseToggleWaitTime',
+        'minPhaseWishSwitchTime',
+        'msca',
+        'mscs',
+        'modelStatusInternal',
+        'mws',
+        'defaultRoute',
+        'norwayMode',
+        'energy',
+        'nvs',
+        'obm',
+        'otaCloudApp',
+        'occa',
+        'otaCloudLength',
+        'otaCloudMessage',
+        'otaCloudProgress',
+        'ocppc',
+        'ocppca',
+        'ocppe',
+        'ocpph',
+        'ocppi',
+        'ocppl',
+        'ocpps',
+        'ocppu',
+        'otaCloudStatus',
+        'otaCloudBranches',
+        'otaCloudUseClientAuth',
+        'oemManufacturer',
+        'otaNewestVersion',
+        'otaPartition',
+        'pAkku',
+        'partitionTable',
+        'pGrid',
+        'phases',
+        'numberOfPhases',
+        'prioOffset',
+        'pPv',
+        'phaseSwitchHysteresis',
+        'phaseSwitchMode',
+        'forceSinglePhaseDuration',
+        'partitionTableOffset',
+        'averagePAkku',
+        'averagePGrid',
+        'avgPowerOhmpilot',
+        'averagePPv',
+        'pvopt_deltaA',
+        'pvopt_deltaP',
+        'pvOptSpecialCase',
+        'phaseWishMode',
+        'queueSizeCloud',
+        'queueSizeWs',
+        'rebootCounter',
+        'timeSinceBoot',
+        'residualCurrentDetection',
+        'rcsl',
+        'relayFeedback',
+        'rfide',
+        'rial',
+        'riml',
+        'risl',
+        'riul',
+        'rmdns',
+        'espResetReason',
+        'rrca',
+        'wifiRssi',
+        'rebootCharger',
+        'sau',
+        'secureBootEnabled',
+        'wifiScanAge',
+        'wifiScanResult',
+        'wifiScanStatus',
+        'schedulerSaturday',
+        'schedulerSunday',
+        'schedulerWeekday',
+        'sdca',
+        'stopHysteresis',
+        'smca',
+        'smd',
+        'threePhaseSwitchLevel',
+        'serialNumber',
+        'stao',
+        'simulateUnplugging',
+        'simulateUnpluggingAlways',
+        'simulateUnpluggingDuration',
+        'swc',
+        'timezoneDaylightSavingMode',
+        'temperatureSensors',
+        'timezoneOffset',
+        'tou',
+        'totalPowerAverage',
+        'tpck',
+        'tpcm',
+        'transaction',
+        'timeServer',
+        'timeServerEnabled',
+        'timeServerOperatingMode',
+        'timeServerSyncInterval',
+        'timeServerSyncMode',
+        'timeServerSyncStatus',
+        'deviceType',
+        'uaca',
+        'upd',
+        'unlockPowerOutage',
+        'cableLock',
+        'utcTime',
+        'variant',
+        'waap',
+        'wae',
+        'wifiApKey',
+        'wifiApName',
+        'wapc',
+        'wifiCurrentMac',
+        'httpConnectedClients',
+        'wsConnectedClients',
+        'wda',
+        'wifiEnabled',
+        'wifiFailedMac',
+        'energyCounterSinceStart',
+        'wifiConfigs',
+        'wifiPlannedMac',
+        'wifiStaErrorCount',
+        'wifiStaErrorMessage',
+        'wsmr',
+        'wifiStateMachineState',
+        'wifiSsid',
+        'wifiStaStatus',
+        'zeroFeedinOffset',
+    )
+
+    abm: str | None  # abm
+    accessState: int | None  # acs: Access State
+    allowedCurrent: int | None  # acu: Allowed Current
+    acui: int | None  # acui
+    adapterLimit: bool | None  # adi: Adapter (16A) Limit
+    adapterLimit1: int | None  # al1: Adapter Limit 1
+    adapterLimit2: int | None  # al2: Adapter Limit 2
+    adapterLimit3: int | None  # al3: Adapter Limit 3
+    adapterLimit4: int | None  # al4: Adapter Limit 4
+    adapterLimit5: int | None  # al5: Adapter Limit 5
+    allowCharging: bool | None  # alw: Allow Charging
+    maxCurrentLimit: int | None  # ama: Max Current Limit
+    chargingCurrent: int | None  # amp: Charging Current
+    temperatureCurrentLimit: int | None  # amt: Temperature Current Limit
+    firmwareDescription: SimpleNamespace | None  # apd: Firmware Description
+    appRecommendedVersion: str | None  # arv: App Recommended Version
+    asc: bool | None  # asc
+    aup: int | None  # aup
+    awattarCountry: int | None  # awc: Awattar Country
+    awattarCurrentPrice: SimpleNamespace | None  # awcp: Awattar Current Price
+    awattarMaxPrice: float | None  # awp: Awattar Max Price
+    awattarPriceList: list | None  # awpl: Awattar Price List
+    buttonAllowCurrentChange: bool | None  # bac: Button Allow Current Change
+    bam: bool | None  # bam
+    cae: bool | None  # cae
+    cak: str | None  # cak
+    carState: int | None  # car: Car State
+    registeredCards: list | None  # cards: Registered Cards
+    cableCurrentLimit: int | None  # cbl: Cable Current Limit
+    cbm: Any | None  # cbm
+    cloudClientAuth: bool | None  # cca: Cloud Client Auth
+    colorCharging: str | None  # cch: Color Charging
+    cci: SimpleNamespace | None  # cci
+    carConsumption: float | None  # cco: Car Consumption
+    chargeControllerRecommendedVersion: str | None  # ccrv: Charge Controller Recommended Version
+    chargeControllerUpdateProgress: SimpleNamespace | None  # ccu: Charge Controller Update Progress
+    currentlyConnectedWifi: SimpleNamespace | None  # ccw: Currently Connected Wifi
+    chargingDurationInfo: SimpleNamespace | None  # cdi: Charging Duration Info
+    cdv: Any | None  # cdv
+    colorFinished: str | None  # cfi: Color Finished
+    chr: bool | None  # chr
+    colorIdle: str | None  # cid: Color Idle
+    currentLimitPresets: list | None  # clp: Current Limit Presets
+    cpEnable: bool | None  # cpe: CP Enable
+    cpEnableRequest: bool | None  # cpr: CP Enable Request
+    csca: int | None  # csca
+    carType: str | None  # ct: Car Type
+    cableUnlockStatus: int | None  # cus: Cable Unlock Status
+    colorWaitCar: str | None  # cwc: Color Wait Car
+    cloudWsEnabled: bool | None  # cwe: Cloud WS Enabled
+    cloudWsStarted: bool | None  # cws: Cloud WS Started
+    cloudWsConnected: bool | None  # cwsc: Cloud WS Connected
+    cloudWsConnectedAge: int | None  # cwsca: Cloud WS Connected Age
+    data: str | None  # data
+    dbm: str | None  # dbm
+    dccu: bool | None  # dccu
+    dco: bool | None  # dco
+    deltaCurrent: float | None  # deltaa: deltaCurrent
+    deltaPower: float | None  # deltap: Delta Power
+    dll: str | None  # dll
+    dnsServer: SimpleNamespace | None  # dns: DNS Server
+    chargingEnergyLimit: float | None  # dwo: Charging Energy Limit
+    espCpuFreq: SimpleNamespace | None  # ecf: ESP CPU Frequency
+    espChipInfo: SimpleNamespace | None  # eci: ESP Chip Info
+    espFreeHeap: int | None  # efh: ESP Free Heap
+    espFreeHeap32: int | None  # efh32: ESP Free Heap 32
+    espFreeHeap8: int | None  # efh8: ESP Free Heap 8
+    espFlashInfo: SimpleNamespace | None  # efi: ESP Flash Info
+    espHeapSize: int | None  # ehs: ESP Heap Size
+    espMinFreeHeap: int | None  # emfh: ESP Min Free Heap
+    espMaxHeap: int | None  # emhb: ESP Max Heap
+    ens: str | None  # ens
+    errorState: int | None  # err: Error State
+    energySetKwh: bool | None  # esk: Energy Set kWh
+    rtcResetReasons: list | None  # esr: RTC Reset Reasons
+    energyCounterTotal: int | None  # eto: Energy Counter Total
+    energyTotalPersisted: int | None  # etop: Energy Total Persisted
+    factoryWifiApKey: str | None  # facwak: Factory Wifi AP Key
+    pvBatteryLimit: int | None  # fam: PV Battery Limit
+    fap: bool | None  # fap
+    fbufAge: int | None  # fbuf_age: Fronius Age
+    akkuMode: int | None  # fbuf_akkuMode: Battery Mode
+    akkuSoc: float | None  # fbuf_akkuSOC: Battery SoC
+    ohmpilotState: Any | None  # fbuf_ohmpilotState: Ohmpilot State
+    ohmpilotTemperature: Any | None  # fbuf_ohmpilotTemperature: Ohmpilot Temperature
+    powerAcTotal: Any | None  # fbuf_pAcTotal: Power AC Total
+    powerAkku: float | None  # fbuf_pAkku: Power Akku
+    powerGrid: int | None  # fbuf_pGrid: Power Grid
+    powerPv: float | None  # fbuf_pPv: Power PV
+    fcc: bool | None  # fcc
+    fck: bool | None  # fck
+    flashEncryptionMode: int | None  # fem: Flash Encryption Mode
+    effectiveRoundingMode: int | None  # ferm: Effective Rounding Mode
+    lockFeedback: int | None  # ffb: Lock Feedback
+    lockFeedbackAge: int | None  # ffba: Lock Feedback Age
+    factoryFriendlyName: str | None  # ffna: Factory Friendly Name
+    fhi: bool | None  # fhi
+    frequency: float | None  # fhz: Frequency
+    fi23: bool | None  # fi23
+    fio23: bool | None  # fio23
+    fit: int | None  # fit
+    fml: str | None  # fml
+    fmmp: int | None  # fmmp
+    minChargeTime: int | None  # fmt: Min Charge Time
+    friendlyName: str | None  # fna: Friendly Name
+    fntp: Any | None  # fntp
+    ohmpilotTemperatureLimit: int | None  # fot: Ohmpilot Temperature Limit
+    forceState: int | None  # frc: Force State
+    frci: bool | None  # frci
+    fre: bool | None  # fre
+    roundingMode: int | None  # frm: Rounding Mode
+    forceSinglePhase: bool | None  # fsp: Force Single Phase
+    forceSinglePhaseToggleWishedSince: int | None  # fsptws: Force Single Phase Toggle Wished Since
+    startingPower: float | None  # fst: Starting Power
+    fte: int | None  # fte
+    ftlf: bool | None  # ftlf
+    ftls: Any | None  # ftls
+    ftt: int | None  # ftt
+    useDynamicPricing: bool | None  # ful: useDynamicPricing
+    usePvSurplus: bool | None  # fup: PV Surplus
+    factoryWifiApName: str | None  # fwan: Factory WiFi AP Name
+    firmwareCarControl: str | None  # fwc: Firmware Car Control
+    firmwareVersion: str | None  # fwv: Firmware Version
+    zeroFeedin: bool | None  # fzf: Zero Feedin
+    gme: bool | None  # gme
+    gmk: str | None  # gmk
+    hostname: str | None  # host: Hostname
+    httpStaAuthentication: bool | None  # hsa: HTTP STA Authentication
+    hsta: str | None  # hsta
+    hsts: str | None  # hsts
+    httpStaReachable: bool | None  # hws: HTTP STA Reachable
+    inverterDataOverride: SimpleNamespace | None  # ido: Inverter Data Override
+    imd: bool | None  # imd
+    imi: int | None  # imi
+    immr: int | None  # immr
+    imp: str | None  # imp
+    ims: str | None  # ims
+    imse: bool | None  # imse
+    inverterDataAge: int | None  # inva: Inverter Data Age
+    irs: bool | None  # irs
+    isml: bool | None  # isml
+    iuse: bool | None  # iuse
+    las: int | None  # las
+    lbh: Any | None  # lbh
+    lastButtonPress: int | None  # lbp: Last Button Press
+    ledBrightness: int | None  # lbr: LED Brightness
+    lbs: int | None  # lbs
+    lastCarStateChangedFromCharging: int | None  # lccfc: Last Car State Changed From Charging
+    lastCarStateChangedFromIdle: int | None  # lccfi: Last Car State Changed From Idle
+    lastCarStateChangedToCharging: int | None  # lcctc: Last Car State Changed To Charging
+    lch: int | None  # lch
+    effectiveLockSetting: int | None  # lck: Effective Lock Setting
+    ledInfo: SimpleNamespace | None  # led: LED Info
+    ledo: Any | None  # ledo
+    lastForceSinglePhaseToggle: int | None  # lfspt: Last Force Single Phase Toggle
+    llr: int | None  # llr
+    logicMode: int | None  # lmo: Logic Mode
+    lastModelStatusChange: int | None  # lmsc: Last Model Status Change
+    loadBalancingAmpere: int | None  # loa: Load Balancing Current
+    localTime: str | None  # loc: Local Time
+    loadBalancingEnabled: bool | None  # loe: Load Balancing Enabled
+    loadFallback: int | None  # lof: Load Fallback
+    loadGroupId: str | None  # log: Load Group ID
+    loi: bool | None  # loi
+    loadBalancingMembers: list | None  # lom: Load Balancing Members
+    loadPriority: int | None  # lop: Load Priority
+    loadBalancingStatus: str | None  # los: Load Balancing Status
+    loadBalancingTotalAmpere: int | None  # lot: Load Balancing Current Total
+    loadBalancingType: int | None  # loty: Load Balancing Type
+    lps: int | None  # lps
+    lastPvSurplusCalculation: int | None  # lpsc: Last PV Surplus Calculation
+    lrc: Any | None  # lrc
+    lri: Any | None  # lri
+    lrr: Any | None  # lrr
+    ledSaveEnergy: bool | None  # lse: LED Save Energy
+    lastStaSwitchedFromConnected: int | None  # lssfc: Last STA Switched From Connected
+    lastStaSwitchedToConnected: int | None  # lsstc: Last STA Switched To Connected
+    maca: str | None  # maca
+    macs: str | None  # macs
+    loadMapping: list | None  # map: Load Mapping
+    minChargingCurrent: int | None  # mca: Min Charging Current
+    minimumChargingInterval: int | None  # mci: Minimum Charging Interval
+    minChargePauseDuration: int | None  # mcpd: Min Charge Pause Duration
+    minChargePauseEndsAt: int | None  # mcpea: Min Charge Pause End
+    moduleHwPcbVersion: int | None  # mod: Module HW PCB Version
+    modelStatus: int | None  # modelStatus: Model Status
+    minPhaseToggleWaitTime: int | None  # mptwt: Min Phase Toggle Wait Time
+    minPhaseWishSwitchTime: int | None  # mpwst: Min Phase Wish Switch Time
+    msca: int | None  # msca
+    mscs: int | None  # mscs
+    modelStatusInternal: int | None  # msi: Model Status Internal
+    mws: bool | None  # mws
+    defaultRoute: str | None  # nif: Default Route
+    norwayMode: bool | None  # nmo: Norway Mode
+    energy: list | None  # nrg: Charging Energy
+    nvs: SimpleNamespace | None  # nvs
+    obm: Any | None  # obm
+    otaCloudApp: SimpleNamespace | None  # oca: OTA Cloud App
+    occa: int | None  # occa
+    otaCloudLength: int | None  # ocl: OTA Cloud Length
+    otaCloudMessage: str | None  # ocm: OTA Cloud Message
+    otaCloudProgress: int | None  # ocp: OTA Cloud Progress
+    ocppc: bool | None  # ocppc
+    ocppca: Any | None  # ocppca
+    ocppe: bool | None  # ocppe
+    ocpph: int | None  # ocpph
+    ocppi: int | None  # ocppi
+    ocppl: int | None  # ocppl
+    ocpps: bool | None  # ocpps
+    ocppu: str | None  # ocppu
+    otaCloudStatus: int | None  # ocs: OTA Cloud Status
+    otaCloudBranches: list | None  # ocu: OTA Cloud Branches
+    otaCloudUseClientAuth: bool | None  # ocuca: OTA Cloud Use Client Auth
+    oemManufacturer: str | None  # oem: OEM Manufacturer
+    otaNewestVersion: str | None  # onv: OTA Newest Version
+    otaPartition: SimpleNamespace | None  # otap: OTA Partition
+    pAkku: float | None  # pakku: Power Akku
+    partitionTable: list | None  # part: Partition Table
+    pGrid: float | None  # pgrid: Power Grid
+    phases: list | None  # pha: Phases
+    numberOfPhases: int | None  # pnp: Number of Phases
+    prioOffset: float | None  # po: Prio Offset
+    pPv: float | None  # ppv: Power PV
+    phaseSwitchHysteresis: float | None  # psh: Phase Switch Hysteresis
+    phaseSwitchMode: int | None  # psm: Phase Switch Mode
+    forceSinglePhaseDuration: int | None  # psmd: Force Single Phase Duration
+    partitionTableOffset: int | None  # pto: Partition Table Offset
+    averagePAkku: float | None  # pvopt_averagePAkku: Average Power Akku
+    averagePGrid: float | None  # pvopt_averagePGrid: Average Power Grid
+    avgPowerOhmpilot: int | None  # pvopt_averagePOhmpilot: Average Power Ohmpilot
+    averagePPv: float | None  # pvopt_averagePPv: Average Power PV
+    pvopt_deltaA: int | None  # pvopt_deltaA: Delta Current
+    pvopt_deltaP: float | None  # pvopt_deltaP: Delta Power
+    pvOptSpecialCase: int | None  # pvopt_specialCase: PVOpt Special Case
+    phaseWishMode: int | None  # pwm: Phase Wish Mode
+    queueSizeCloud: int | None  # qsc: Queue Size Cloud
+    queueSizeWs: int | None  # qsw: Queue Size WS
+    rebootCounter: int | None  # rbc: Reboot Counter
+    timeSinceBoot: int | None  # rbt: Time Since Boot
+    residualCurrentDetection: int | None  # rcd: Residual Current Detection
+    rcsl: bool | None  # rcsl
+    relayFeedback: int | None  # rfb: Relay Feedback
+    rfide: bool | None  # rfide
+    rial: bool | None  # rial
+    riml: bool | None  # riml
+    risl: bool | None  # risl
+    riul: bool | None  # riul
+    rmdns: bool | None  # rmdns
+    espResetReason: int | None  # rr: ESP Reset Reason
+    rrca: int | None  # rrca
+    wifiRssi: int | None  # rssi: WIFI Signal Strength
+    rebootCharger: Any | None  # rst: Reboot Charger
+    sau: bool | None  # sau
+    secureBootEnabled: bool | None  # sbe: Secure Boot Enabled
+    wifiScanAge: int | None  # scaa: WiFi Scan Age
+    wifiScanResult: list | None  # scan: Scanned WIFI Hotspots
+    wifiScanStatus: int | None  # scas: WIFI Scan Status
+    schedulerSaturday: SimpleNamespace | None  # sch_satur: Charging Schedule Saturday
+    schedulerSunday: SimpleNamespace | None  # sch_sund: Charging Schedule Sunday
+    schedulerWeekday: SimpleNamespace | None  # sch_week: Charging Schedule Weekday
+    sdca: int | None  # sdca
+    stopHysteresis: float | None  # sh: Stop Hysteresis
+    smca: int | None  # smca
+    smd: Any | None  # smd
+    threePhaseSwitchLevel: float | None  # spl3: Three Phase Switch Level
+    serialNumber: str | None  # sse: Serial Number
+    stao: Any | None  # stao
+    simulateUnplugging: bool | None  # su: Simulate Unplugging
+    simulateUnpluggingAlways: bool | None  # sua: Simulate Unplugging Always
+    simulateUnpluggingDuration: int | None  # sumd: Simulate Unplugging Duration
+    swc: bool | None  # swc
+    timezoneDaylightSavingMode: int | None  # tds: Timezone Daylight Saving Mode
+    temperatureSensors: list | None  # tma: Temperature Sensors
+    timezoneOffset: int | None  # tof: Timezone Offset
+    tou: int | None  # tou
+    totalPowerAverage: float | None  # tpa: Total Power Average
+    tpck: list | None  # tpck
+    tpcm: list | None  # tpcm
+    transaction: int | None  # trx: Transaction
+    timeServer: str | None  # ts: Time Server
+    timeServerEnabled: bool | None  # tse: Time Server Enabled
+    timeServerOperatingMode: int | None  # tsom: Time Server Operating Mode
+    timeServerSyncInterval: int | None  # tssi: Time Server Sync Interval
+    timeServerSyncMode: int | None  # tssm: Time Server Sync Mode
+    timeServerSyncStatus: int | None  # tsss: Time Server Sync Status
+    deviceType: str | None  # typ: Device Type
+    uaca: int | None  # uaca
+    upd: bool | None  # upd
+    unlockPowerOutage: bool | None  # upo: Unlock Power Outage
+    cableLock: int | None  # ust: Unlock Setting
+    utcTime: str | None  # utc: UTC Time
+    variant: int | None  # var: Variant
+    waap: int | None  # waap
+    wae: bool | None  # wae
+    wifiApKey: str | None  # wak: WiFi AP Key
+    wifiApName: str | None  # wan: WiFi AP Name
+    wapc: int | None  # wapc
+    wifiCurrentMac: str | None  # wcb: WiFi Current MAC Address
+    httpConnectedClients: int | None  # wcch: HTTP Connected Clients
+    wsConnectedClients: int | None  # wccw: WS Connected Clients
+    wda: bool | None  # wda
+    wifiEnabled: bool | None  # wen: WiFi Enabled
+    wifiFailedMac: list | None  # wfb: WiFi Failed MAC Address
+    energyCounterSinceStart: float | None  # wh: Energy Counter Since Start
+    wifiConfigs: list | None  # wifis: WiFi Configs
+    wifiPlannedMac: list | None  # wpb: WiFi Planned MAC
+    wifiStaErrorCount: int | None  # wsc: WiFi STA Error Count
+    wifiStaErrorMessage: str | None  # wsm: Wifi STA Error Message
+    wsmr: int | None  # wsmr
+    wifiStateMachineState: int | None  # wsms: WIFI State Machine State
+    wifiSsid: Any | None  # wss: WIFI SSID
+    wifiStaStatus: int | None  # wst: WIFI STA Status
+    zeroFeedinOffset: float | None  # zfo: Zero Feedin Offset
+
+    def __init__(self):
+        for name in self.__slots__:
+            object.__setattr__(self, name, None)
+
+    def update(self, key, value):
+        """Sets a property by its API key (returns False for unknown keys)"""
+        name = KEY_TO_ATTR.get(key)
+        if name is None:
+            return False
+        object.__setattr__(self, name, value)
+        return True
+
+    @property
+    def apd_project_name(self) -> str | None:
+        """apd_project_name"""
+        v = self.firmwareDescription
+        return getattr(v, 'project_name', None)
+
+    @property
+    def apd_version(self) -> str | None:
+        """apd_version"""
+        v = self.firmwareDescription
+        return getattr(v, 'version', None)
+
+    @property
+    def apd_secure_version(self) -> int | None:
+        """apd_secure_version"""
+        v = self.firmwareDescription
+        return getattr(v, 'secure_version', None)
+
+    @property
+    def apd_timestamp(self) -> str | None:
+        """apd_timestamp"""
+        v = self.firmwareDescription
+        return getattr(v, 'timestamp', None)
+
+    @property
+    def apd_idf_ver(self) -> str | None:
+        """apd_idf_ver"""
+        v = self.firmwareDescription
+        return getattr(v, 'idf_ver', None)
+
+    @property
+    def apd_sha256(self) -> str | None:
+        """apd_sha256"""
+        v = self.firmwareDescription
+        return getattr(v, 'sha256', None)
+
+    @property
+    def awcp_start(self) -> int | None:
+        """awcp_start"""
+        v = self.awattarCurrentPrice
+        return getattr(v, 'start', None)
+
+    @property
+    def awcp_end(self) -> int | None:
+        """awcp_end"""
+        v = self.awattarCurrentPrice
+        return getattr(v, 'end', None)
+
+    @property
+    def awcp_marketprice(self) -> float | None:
+        """awcp_marketprice"""
+        v = self.awattarCurrentPrice
+        return getattr(v, 'marketprice', None)
+
+    @property
+    def cdi_type(self) -> int | None:
+        """cdi_type: Charging Duration Type"""
+        v = self.chargingDurationInfo
+        return getattr(v, 'type', None)
+
+    @property
+    def cdi_value(self) -> int | None:
+        """cdi_value: Charging Duration Value"""
+        v = self.chargingDurationInfo
+        return getattr(v, 'value', None)
+
+    @property
+    def ecf_source(self) -> int | None:
+        """ecf_source"""
+        v = self.espCpuFreq
+        return getattr(v, 'source', None)
+
+    @property
+    def ecf_source_freq_mhz(self) -> int | None:
+        """ecf_source_freq_mhz"""
+        v = self.espCpuFreq
+        return getattr(v, 'source_freq_mhz', None)
+
+    @property
+    def ecf_div(self) -> int | None:
+        """ecf_div"""
+        v = self.espCpuFreq
+        return getattr(v, 'div', None)
+
+    @property
+    def ecf_freq_mhz(self) -> int | None:
+        """ecf_freq_mhz"""
+        v = self.espCpuFreq
+        return getattr(v, 'freq_mhz', None)
+
+    @property
+    def eci_model(self) -> int | None:
+        """eci_model"""
+        v = self.espChipInfo
+        return getattr(v, 'model', None)
+
+    @property
+    def eci_features(self) -> int | None:
+        """eci_features"""
+        v = self.espChipInfo
+        return getattr(v, 'features', None)
+
+    @property
+    def eci_cores(self) -> int | None:
+        """eci_cores"""
+        v = self.espChipInfo
+        return getattr(v, 'cores', None)
+
+    @property
+    def eci_revision(self) -> str | None:
+        """eci_revision"""
+        v = self.espChipInfo
+        return getattr(v, 'revision', None)
+
+    @property
+    def efi_spi_mode(self) -> int | None:
+        """efi_spi_mode"""
+        v = self.espFlashInfo
+        return getattr(v, 'spi_mode', None)
+
+    @property
+    def efi_spi_speed(self) -> int | None:
+        """efi_spi_speed"""
+        v = self.espFlashInfo
+        return getattr(v, 'spi_speed', None)
+
+    @property
+    def efi_spi_size(self) -> int | None:
+        """efi_spi_size"""
+        v = self.espFlashInfo
+        return getattr(v, 'spi_size', None)
+
+    @property
+    def nrg_ul1(self) -> int | None:
+        """nrg_ul1: Charging Voltage L1"""
+        v = self.energy
+        return v[0] if v is not None and len(v) > 0 else None
+
+    @property
+    def nrg_ul2(self) -> int | None:
+        """nrg_ul2: Charging Voltage L2"""
+        v = self.energy
+        return v[1] if v is not None and len(v) > 1 else None
+
+    @property
+    def nrg_ul3(self) -> int | None:
+        """nrg_ul3: Charging Voltage L3"""
+        v = self.energy
+        return v[2] if v is not None and len(v) > 2 else None
+
+    @property
+    def nrg_un(self) -> int | None:
+        """nrg_un: Charging Voltage N"""
+        v = self.energy
+        return v[3] if v is not None and len(v) > 3 else None
+
+    @property
+    def nrg_il1(self) -> int | None:
+        """nrg_il1: Charging Current L1"""
+        v = self.energy
+        return v[4] if v is not None and len(v) > 4 else None
+
+    @property
+    def nrg_il2(self) -> int | None:
+        """nrg_il2: Charging Current L2"""
+        v = self.energy
+        return v[5] if v is not None and len(v) > 5 else None
+
+    @property
+    def nrg_il3(self) -> int | None:
+        """nrg_il3: Charging Current L3"""
+        v = self.energy
+        return v[6] if v is not None and len(v) > 6 else None
+
+    @property
+    def nrg_pl1(self) -> int | None:
+        """nrg_pl1: Charging Power L1"""
+        v = self.energy
+        return v[7] if v is not None and len(v) > 7 else None
+
+    @property
+    def nrg_pl2(self) -> int | None:
+        """nrg_pl2: Charging Power L2"""
+        v = self.energy
+        return v[8] if v is not None and len(v) > 8 else None
+
+    @property
+    def nrg_pl3(self) -> int | None:
+        """nrg_pl3: Charging Power L3"""
+        v = self.energy
+        return v[9] if v is not None and len(v) > 9 else None
+
+    @property
+    def nrg_pn(self) -> int | None:
+        """nrg_pn: Charging Power N"""
+        v = self.energy
+        return v[10] if v is not None and len(v) > 10 else None
+
+    @property
+    def nrg_ptotal(self) -> int | None:
+        """nrg_ptotal: Charging Power Total"""
+        v = self.energy
+        return v[11] if v is not None and len(v) > 11 else None
+
+    @property
+    def nrg_pfl1(self) -> int | None:
+        """nrg_pfl1: Charging Power Factor L1"""
+        v = self.energy
+        return v[12] if v is not None and len(v) > 12 else None
+
+    @property
+    def nrg_pfl2(self) -> int | None:
+        """nrg_pfl2: Charging Power Factor L2"""
+        v = self.energy
+        return v[13] if v is not None and len(v) > 13 else None
+
+    @property
+    def nrg_pfl3(self) -> int | None:
+        """nrg_pfl3: Charging Power Factor L3"""
+        v = self.energy
+        return v[14] if v is not None and len(v) > 14 else None
+
+    @property
+    def nrg_pfn(self) -> int | None:
+        """nrg_pfn: Charging Power Factor N"""
+        v = self.energy
+        return v[15] if v is not None and len(v) > 15 else None
+
+    @property
+    def sch_satur_control(self) -> int | None:
+        """sch_satur_control"""
+        v = self.schedulerSaturday
+        return getattr(v, 'control', None)
+
+    @property
+    def sch_sund_control(self) -> int | None:
+        """sch_sund_control"""
+        v = self.schedulerSunday
+        return getattr(v, 'control', None)
+
+    @property
+    def sch_week_control(self) -> int | None:
+        """sch_week_control"""
+        v = self.schedulerWeekday
+        return getattr(v, 'control', None)
+
+    @property
+    def tma_1(self) -> float | None:
+        """tma_1: Temperature Sensor 1"""
+        v = self.temperatureSensors
+        return v[0] if v is not None and len(v) > 0 else None
+
+    @property
+    def tma_2(self) -> float | None:
+        """tma_2: Temperature Sensor 2"""
+        v = self.temperatureSensors
+        return v[1] if v is not None and len(v) > 1 else None
+
+    @property
+    def accessState_text(self):
+        """Decoded value of acs"""
+        v = self.accessState
+        if v is None:
+            return None
+        return ACS_VALUES.get(v, v)
+
+    @property
+    def awattarCountry_text(self):
+        """Decoded value of awc"""
+        v = self.awattarCountry
+        if v is None:
+            return None
+        return AWC_VALUES.get(v, v)
+
+    @property
+    def carState_text(self):
+        """Decoded value of car"""
+        v = self.carState
+        if v is None:
+            return None
+        return CAR_VALUES.get(v, v)
+
+    @property
+    def cdi_type_text(self):
+        """Decoded value of cdi_type"""
+        v = self.cdi_type
+        if v is None:
+            return None
+        return CDI_TYPE_VALUES.get(v, v)
+
+    @property
+    def cableUnlockStatus_text(self):
+        """Decoded value of cus"""
+        v = self.cableUnlockStatus
+        if v is None:
+            return None
+        return CUS_VALUES.get(v, v)
+
+    @property
+    def ecf_source_text(self):
+        """Decoded value of ecf_source"""
+        v = self.ecf_source
+        if v is None:
+            return None
+        return ECF_SOURCE_VALUES.get(v, v)
+
+    @property
+    def eci_model_text(self):
+        """Decoded value of eci_model"""
+        v = self.eci_model
+        if v is None:
+            return None
+        return ECI_MODEL_VALUES.get(v, v)
+
+    @property
+    def eci_features_text(self):
+        """Decoded value of eci_features"""
+        v = self.eci_features
+        if v is None:
+            return None
+        return [n for b, n in ECI_FEATURES_BITS.items() if v >> b & 1]
+
+    @property
+    def efi_spi_mode_text(self):
+        """Decoded value of efi_spi_mode"""
+        v = self.efi_spi_mode
+        if v is None:
+            return None
+        return EFI_SPI_MODE_VALUES.get(v, v)
+
+    @property
+    def efi_spi_speed_text(self):
+        """Decoded value of efi_spi_speed"""
+        v = self.efi_spi_speed
+        if v is None:
+            return None
+        return EFI_SPI_SPEED_VALUES.get(v, v)
+
+    @property
+    def efi_spi_size_text(self):
+        """Decoded value of efi_spi_size"""
+        v = self.efi_spi_size
+        if v is None:
+            return None
+        return EFI_SPI_SIZE_VALUES.get(v, v)
+
+    @property
+    def errorState_text(self):
+        """Decoded value of err"""
+        v = self.errorState
+        if v is None:
+            return None
+        return ERR_VALUES.get(v, v)
+
+    @property
+    def rtcResetReasons_text(self):
+        """Decoded value of esr"""
+        v = self.rtcResetReasons
+        if v is None:
+            return None
+        return [ESR_VALUES.get(i, i) for i in v]
+
+    @property
+    def flashEncryptionMode_text(self):
+        """Decoded value of fem"""
+        v = self.flashEncryptionMode
+        if v is None:
+            return None
+        return FEM_VALUES.get(v, v)
+
+    @property
+    def lockFeedback_text(self):
+        """Decoded value of ffb"""
+        v = self.lockFeedback
+        if v is None:
+            return None
+        return FFB_VALUES.get(v, v)
+
+    @property
+    def forceState_text(self):
+        """Decoded value of frc"""
+        v = self.forceState
+        if v is None:
+            return None
+        return FRC_VALUES.get(v, v)
+
+    @property
+    def roundingMode_text(self):
+        """Decoded value of frm"""
+        v = self.roundingMode
+        if v is None:
+            return None
+        return FRM_VALUES.get(v, v)
+
+    @property
+    def effectiveLockSetting_text(self):
+        """Decoded value of lck"""
+        v = self.effectiveLockSetting
+        if v is None:
+            return None
+        return LCK_VALUES.get(v, v)
+
+    @property
+    def logicMode_text(self):
+        """Decoded value of lmo"""
+        v = self.logicMode
+        if v is None:
+            return None
+        return LMO_VALUES.get(v, v)
+
+    @property
+    def loadBalancingType_text(self):
+        """Decoded value of loty"""
+        v = self.loadBalancingType
+        if v is None:
+            return None
+        return LOTY_VALUES.get(v, v)
+
+    @property
+    def modelStatus_text(self):
+        """Decoded value of modelStatus"""
+        v = self.modelStatus
+        if v is None:
+            return None
+        return MODELSTATUS_VALUES.get(v, v)
+
+    @property
+    def modelStatusInternal_text(self):
+        """Decoded value of msi"""
+        v = self.modelStatusInternal
+        if v is None:
+            return None
+        return MSI_VALUES.get(v, v)
+
+    @property
+    def otaCloudStatus_text(self):
+        """Decoded value of ocs"""
+        v = self.otaCloudStatus
+        if v is None:
+            return None
+        return OCS_VALUES.get(v, v)
+
+    @property
+    def phaseSwitchMode_text(self):
+        """Decoded value of psm"""
+        v = self.phaseSwitchMode
+        if v is None:
+            return None
+        return PSM_VALUES.get(v, v)
+
+    @property
+    def phaseWishMode_text(self):
+        """Decoded value of pwm"""
+        v = self.phaseWishMode
+        if v is None:
+            return None
+        return PWM_VALUES.get(v, v)
+
+    @property
+    def espResetReason_text(self):
+        """Decoded value of rr"""
+        v = self.espResetReason
+        if v is None:
+            return None
+        return RR_VALUES.get(v, v)
+
+    @property
+    def wifiScanStatus_text(self):
+        """Decoded value of scas"""
+        v = self.wifiScanStatus
+        if v is None:
+            return None
+        return SCAS_VALUES.get(v, v)
+
+    @property
+    def sch_satur_control_text(self):
+        """Decoded value of sch_satur_control"""
+        v = self.sch_satur_control
+        if v is None:
+            return None
+        return SCH_SATUR_CONTROL_VALUES.get(v, v)
+
+    @property
+    def sch_sund_control_text(self):
+        """Decoded value of sch_sund_control"""
+        v = self.sch_sund_control
+        if v is None:
+            return None
+        return SCH_SUND_CONTROL_VALUES.get(v, v)
+
+    @property
+    def sch_week_control_text(self):
+        """Decoded value of sch_week_control"""
+        v = self.sch_week_control
+        if v is None:
+            return None
+        return SCH_WEEK_CONTROL_VALUES.get(v, v)
+
+    @property
+    def timezoneDaylightSavingMode_text(self):
+        """Decoded value of tds"""
+        v = self.timezoneDaylightSavingMode
+        if v is None:
+            return None
+        return TDS_VALUES.get(v, v)
+
+    @property
+    def timeServerOperatingMode_text(self):
+        """Decoded value of tsom"""
+        v = self.timeServerOperatingMode
+        if v is None:
+            return None
+        return TSOM_VALUES.get(v, v)
+
+    @property
+    def timeServerSyncMode_text(self):
+        """Decoded value of tssm"""
+        v = self.timeServerSyncMode
+        if v is None:
+            return None
+        return TSSM_VALUES.get(v, v)
+
+    @property
+    def timeServerSyncStatus_text(self):
+        """Decoded value of tsss"""
+        v = self.timeServerSyncStatus
+        if v is None:
+            return None
+        return TSSS_VALUES.get(v, v)
+
+    @property
+    def cableLock_text(self):
+        """Decoded value of ust"""
+        v = self.cableLock
+        if v is None:
+            return None
+        return UST_VALUES.get(v, v)
+
+    @property
+    def variant_text(self):
+        """Decoded value of var"""
+        v = self.variant
+        if v is None:
+            return None
+        return VAR_VALUES.get(v, v)
+
+    @property
+    def wifiStateMachineState_text(self):
+        """Decoded value of wsms"""
+        v = self.wifiStateMachineState
+        if v is None:
+            return None
+        return WSMS_VALUES.get(v, v)
+
+    @property
+    def wifiStaStatus_text(self):
+        """Decoded value of wst"""
+        v = self.wifiStaStatus
+        if v is None:
+            return None
+        return WST_VALUES.get(v, v)
+
+
+KEY_TO_ATTR = {
+    'abm': 'abm',
+    'acs': 'accessState',
+    'acu': 'allowedCurrent',
+    'acui': 'acui',
+    'adi': 'adapterLimit',
+    'al1': 'adapterLimit1',
+    'al2': 'adapterLimit2',
+    'al3': 'adapterLimit3',
+    'al4': 'adapterLimit4',
+    'al5': 'adapterLimit5',
+    'alw': 'allowCharging',
+    'ama': 'maxCurrentLimit',
+    'amp': 'chargingCurrent',
+    'amt': 'temperatureCurrentLimit',
+    'apd': 'firmwareDescription',
+    'arv': 'appRecommendedVersion',
+    'asc': 'asc',
+    'aup': 'aup',
+    'awc': 'awattarCountry',
+    'awcp': 'awattarCurrentPrice',
+    'awp': 'awattarMaxPrice',
+    'awpl': 'awattarPriceList',
+    'bac': 'buttonAllowCurrentChange',
+    'bam': 'bam',
+    'cae': 'cae',
+    'cak': 'cak',
+    'car': 'carState',
+    'cards': 'registeredCards',
+    'cbl': 'cableCurrentLimit',
+    'cbm': 'cbm',
+    'cca': 'cloudClientAuth',
+    'cch': 'colorCharging',
+    'cci': 'cci',
+    'cco': 'carConsumption',
+    'ccrv': 'chargeControllerRecommendedVersion',
+    'ccu': 'chargeControllerUpdateProgress',
+    'ccw': 'currentlyConnectedWifi',
+    'cdi': 'chargingDurationInfo',
+    'cdv': 'cdv',
+    'cfi': 'colorFinished',
+    'chr': 'chr',
+    'cid': 'colorIdle',
+    'clp': 'currentLimitPresets',
+    'cpe': 'cpEnable',
+    'cpr': 'cpEnableRequest',
+    'csca': 'csca',
+    'ct': 'carType',
+    'cus': 'cableUnlockStatus',
+    'cwc': 'colorWaitCar',
+    'cwe': 'cloudWsEnabled',
+    'cws': 'cloudWsStarted',
+    'cwsc': 'cloudWsConnected',
+    'cwsca': 'cloudWsConnectedAge',
+    'data': 'data',
+    'dbm': 'dbm',
+    'dccu': 'dccu',
+    'dco': 'dco',
+    'deltaa': 'deltaCurrent',
+    'deltap': 'deltaPower',
+    'dll': 'dll',
+    'dns': 'dnsServer',
+    'dwo': 'chargingEnergyLimit',
+    'ecf': 'espCpuFreq',
+    'eci': 'espChipInfo',
+    'efh': 'espFreeHeap',
+    'efh32': 'espFreeHeap32',
+    'efh8': 'espFreeHeap8',
+    'efi': 'espFlashInfo',
+    'ehs': 'espHeapSize',
+    'emfh': 'espMinFreeHeap',
+    'emhb': 'espMaxHeap',
+    'ens': 'ens',
+    'err': 'errorState',
+    'esk': 'energySetKwh',
+    'esr': 'rtcResetReasons',
+    'eto': 'energyCounterTotal',
+    'etop': 'energyTotalPersisted',
+    'facwak': 'factoryWifiApKey',
+    'fam': 'pvBatteryLimit',
+    'fap': 'fap',
+    'fbuf_age': 'fbufAge',
+    'fbuf_akkuMode': 'akkuMode',
+    'fbuf_akkuSOC': 'akkuSoc',
+    'fbuf_ohmpilotState': 'ohmpilotState',
+    'fbuf_ohmpilotTemperature': 'ohmpilotTemperature',
+    'fbuf_pAcTotal': 'powerAcTotal',
+    'fbuf_pAkku': 'powerAkku',
+    'fbuf_pGrid': 'powerGrid',
+    'fbuf_pPv': 'powerPv',
+    'fcc': 'fcc',
+    'fck': 'fck',
+    'fem': 'flashEncryptionMode',
+    'ferm': 'effectiveRoundingMode',
+    'ffb': 'lockFeedback',
+    'ffba': 'lockFeedbackAge',
+    'ffna': 'factoryFriendlyName',
+    'fhi': 'fhi',
+    'fhz': 'frequency',
+    'fi23': 'fi23',
+    'fio23': 'fio23',
+    'fit': 'fit',
+    'fml': 'fml',
+    'fmmp': 'fmmp',
+    'fmt': 'minChargeTime',
+    'fna': 'friendlyName',
+    'fntp': 'fntp',
+    'fot': 'ohmpilotTemperatureLimit',
+    'frc': 'forceState',
+    'frci': 'frci',
+    'fre': 'fre',
+    'frm': 'roundingMode',
+    'fsp': 'forceSinglePhase',
+    'fsptws': 'forceSinglePhaseToggleWishedSince',
+    'fst': 'startingPower',
+    'fte': 'fte',
+    'ftlf': 'ftlf',
+    'ftls': 'ftls',
+    'ftt': 'ftt',
+    'ful': 'useDynamicPricing',
+    'fup': 'usePvSurplus',
+    'fwan': 'factoryWifiApName',
+    'fwc': 'firmwareCarControl',
+    'fwv': 'firmwareVersion',
+    'fzf': 'zeroFeedin',
+    'gme': 'gme',
+    'gmk': 'gmk',
+    'host': 'hostname',
+    'hsa': 'httpStaAuthentication',
+    'hsta': 'hsta',
+    'hsts': 'hsts',
+    'hws': 'httpStaReachable',
+    'ido': 'inverterDataOverride',
+    'imd': 'imd',
+    'imi': 'imi',
+    'immr': 'immr',
+    'imp': 'imp',
+    'ims': 'ims',
+    'imse': 'imse',
+    'inva': 'inverterDataAge',
+    'irs': 'irs',
+    'isml': 'isml',
+    'iuse': 'iuse',
+    'las': 'las',
+    'lbh': 'lbh',
+    'lbp': 'lastButtonPress',
+    'lbr': 'ledBrightness',
+    'lbs': 'lbs',
+    'lccfc': 'lastCarStateChangedFromCharging',
+    'lccfi': 'lastCarStateChangedFromIdle',
+    'lcctc': 'lastCarStateChangedToCharging',
+    'lch': 'lch',
+    'lck': 'effectiveLockSetting',
+    'led': 'ledInfo',
+    'ledo': 'ledo',
+    'lfspt': 'lastForceSinglePhaseToggle',
+    'llr': 'llr',
+    'lmo': 'logicMode',
+    'lmsc': 'lastModelStatusChange',
+    'loa': 'loadBalancingAmpere',
+    'loc': 'localTime',
+    'loe': 'loadBalancingEnabled',
+    'lof': 'loadFallback',
+    'log': 'loadGroupId',
+    'loi': 'loi',
+    'lom': 'loadBalancingMembers',
+    'lop': 'loadPriority',
+    'los': 'loadBalancingStatus',
+    'lot': 'loadBalancingTotalAmpere',
+    'loty': 'loadBalancingType',
+    'lps': 'lps',
+    'lpsc': 'lastPvSurplusCalculation',
+    'lrc': 'lrc',
+    'lri': 'lri',
+    'lrr': 'lrr',
+    'lse': 'ledSaveEnergy',
+    'lssfc': 'lastStaSwitchedFromConnected',
+    'lsstc': 'lastStaSwitchedToConnected',
+    'maca': 'maca',
+    'macs': 'macs',
+    'map': 'loadMapping',
+    'mca': 'minChargingCurrent',
+    'mci': 'minimumChargingInterval',
+    'mcpd': 'minChargePauseDuration',
+    'mcpea': 'minChargePauseEndsAt',
+    'mod': 'moduleHwPcbVersion',
+    'modelStatus': 'modelStatus',
+    'mptwt': 'minPhaseToggleWaitTime',
+    'mpwst': 'minPhaseWishSwitchTime',
+    'msca': 'msca',
+    'mscs': 'mscs',
+    'msi': 'modelStatusInternal',
+    'mws': 'mws',
+    'nif': 'defaultRoute',
+    'nmo': 'norwayMode',
+    'nrg': 'energy',
+    'nvs': 'nvs',
+    'obm': 'obm',
+    'oca': 'otaCloudApp',
+    'occa': 'occa',
+    'ocl': 'otaCloudLength',
+    'ocm': 'otaCloudMessage',
+    'ocp': 'otaCloudProgress',
+    'ocppc': 'ocppc',
+    'ocppca': 'ocppca',
+    'ocppe': 'ocppe',
+    'ocpph': 'ocpph',
+    'ocppi': 'ocppi',
+    'ocppl': 'ocppl',
+    'ocpps': 'ocpps',
+    'ocppu': 'ocppu',
+    'ocs': 'otaCloudStatus',
+    'ocu': 'otaCloudBranches',
+    'ocuca': 'otaCloudUseClientAuth',
+    'oem': 'oemManufacturer',
+    'onv': 'otaNewestVersion',
+    'otap': 'otaPartition',
+    'pakku': 'pAkku',
+    'part': 'partitionTable',
+    'pgrid': 'pGrid',
+    'pha': 'phases',
+    'pnp': 'numberOfPhases',
+    'po': 'prioOffset',
+    'ppv': 'pPv',
+    'psh': 'phaseSwitchHysteresis',
+    'psm': 'phaseSwitchMode',
+    'psmd': 'forceSinglePhaseDuration',
+    'pto': 'partitionTableOffset',
+    'pvopt_averagePAkku': 'averagePAkku',
+    'pvopt_averagePGrid': 'averagePGrid',
+    'pvopt_averagePOhmpilot': 'avgPowerOhmpilot',
+    'pvopt_averagePPv': 'averagePPv',
+    'pvopt_deltaA': 'pvopt_deltaA',
+    'pvopt_deltaP': 'pvopt_deltaP',
+    'pvopt_specialCase': 'pvOptSpecialCase',
+    'pwm': 'phaseWishMode',
+    'qsc': 'queueSizeCloud',
+    'qsw': 'queueSizeWs',
+    'rbc': 'rebootCounter',
+    'rbt': 'timeSinceBoot',
+    'rcd': 'residualCurrentDetection',
+    'rcsl': 'rcsl',
+    'rfb': 'relayFeedback',
+    'rfide': 'rfide',
+    'rial': 'rial',
+    'riml': 'riml',
+    'risl': 'risl',
+    'riul': 'riul',
+    'rmdns': 'rmdns',
+    'rr': 'espResetReason',
+    'rrca': 'rrca',
+    'rssi': 'wifiRssi',
+    'rst': 'rebootCharger',
+    'sau': 'sau',
+    'sbe': 'secureBootEnabled',
+    'scaa': 'wifiScanAge',
+    'scan': 'wifiScanResult',
+    'scas': 'wifiScanStatus',
+    'sch_satur': 'schedulerSaturday',
+    'sch_sund': 'schedulerSunday',
+    'sch_week': 'schedulerWeekday',
+    'sdca': 'sdca',
+    'sh': 'stopHysteresis',
+    'smca': 'smca',
+    'smd': 'smd',
+    'spl3': 'threePhaseSwitchLevel',
+    'sse': 'serialNumber',
+    'stao': 'stao',
+    'su': 'simulateUnplugging',
+    'sua': 'simulateUnpluggingAlways',
+    'sumd': 'simulateUnpluggingDuration',
+    'swc': 'swc',
+    'tds': 'timezoneDaylightSavingMode',
+    'tma': 'temperatureSensors',
+    'tof': 'timezoneOffset',
+    'tou': 'tou',
+    'tpa': 'totalPowerAverage',
+    'tpck': 'tpck',
+    'tpcm': 'tpcm',
+    'trx': 'transaction',
+    'ts': 'timeServer',
+    'tse': 'timeServerEnabled',
+    'tsom': 'timeServerOperatingMode',
+    'tssi': 'timeServerSyncInterval',
+    'tssm': 'timeServerSyncMode',
+    'tsss': 'timeServerSyncStatus',
+    'typ': 'deviceType',
+    'uaca': 'uaca',
+    'upd': 'upd',
+    'upo': 'unlockPowerOutage',
+    'ust': 'cableLock',
+    'utc': 'utcTime',
+    'var': 'variant',
+    'waap': 'waap',
+    'wae': 'wae',
+    'wak': 'wifiApKey',
+    'wan': 'wifiApName',
+    'wapc': 'wapc',
+    'wcb': 'wifiCurrentMac',
+    'wcch': 'httpConnectedClients',
+    'wccw': 'wsConnectedClients',
+    'wda': 'wda',
+    'wen': 'wifiEnabled',
+    'wfb': 'wifiFailedMac',
+    'wh': 'energyCounterSinceStart',
+    'wifis': 'wifiConfigs',
+    'wpb': 'wifiPlannedMac',
+    'wsc': 'wifiStaErrorCount',
+    'wsm': 'wifiStaErrorMessage',
+    'wsmr': 'wsmr',
+    'wsms': 'wifiStateMachineState',
+    'wss': 'wifiSsid',
+    'wst': 'wifiStaStatus',
+    'zfo': 'zeroFeedinOffset',
+}
@@ -0,0 +1,203 @@
+"""Generates the typed property model (model.py) from ressources/wattpilot.yaml
+
+Usage: python -m wattpilot.modelgen [--check]
+
+The model is regenerated by setup.py at build time. It must not import anything
+from the wattpilot package, so setup.py can load it without installing the package.
+"""
+import json
+import keyword
+import os
+import sys
+
+import yaml
+
+RESSOURCES_DIR = os.path.join(os.path.dirname(__file__), "ressources")
+DEFAULT_SOURCE = os.path.join(RESSOURCES_DIR, "wattpilot.yaml")
+DEFAULT_TARGET = os.path.join(os.path.dirname(__file__), "model.py")
+
+JSON_TYPES = {
+    "array": "list",
+    "boolean": "bool",
+    "float": "float",
+    "integer": "int",
+    "object": "SimpleNamespace",
+    "string": "str",
+}
+
+# Names used by the generated class itself:
+RESERVED_NAMES = {"update"}
+
+
+def _is_usable_name(name):
+    return isinstance(name, str) and name.isidentifier() and not keyword.iskeyword(name) \
+        and not name.startswith("_") and name not in RESERVED_NAMES
+
+
+def _map_key(k):
+    """Converts a valueMap key from the YAML (always a string) to the value sent by the device"""
+    try:
+        return json.loads(k)
+    except (TypeError, ValueError):
+        return k
+
+
+def _type_hint(pd, default="unknown"):
+    return JSON_TYPES.get(pd.get("jsonType", default), "Any") + " | None"
+
+
+def _assign_names(properties):
+    """Returns attribute names per property key, preferring the YAML alias"""
+    keys = {p["key"] for p in properties} | {cp["key"] for p in properties for cp in p.get("childProps", [])}
+    names = {}
+    used = set()
+    for p in properties:
+        alias = p.get("alias")
+        name = alias if _is_usable_name(alias) and alias not in used and (alias == p["key"] or alias not in keys) else p["key"]
+        if not _is_usable_name(name) or name in used:
+            raise ValueError(f"Unable to derive a unique attribute name for property '{p['key']}'")
+        names[p["key"]] = name
+        used.add(name)
+    for p in properties:
+        for cp in p.get("childProps", []):
+            if not _is_usable_name(cp["key"]) or cp["key"] in used:
+                raise ValueError(f"Unable to derive a unique attribute name for child property '{cp['key']}'")
+            names[cp["key"]] = cp["key"]
+            used.add(cp["key"])
+    return names
+
+
+def _comment(pd):
+    title = pd.get("title", "")
+    return f"{pd['key']}: {title}" if title else pd["key"]
+
+
+def generate_model_source(apidef):
+    properties = apidef["properties"]
+    names = _assign_names(properties)
+    used = set(names.values())
+    lines = [
+        f"# Generated by wattpilot.modelgen from ressources/wattpilot.yaml - DO NOT EDIT!",
+        f"# Regenerate using: python -m wattpilot.modelgen",
+        "from __future__ import annotations",
+        "",
+        "from types import SimpleNamespace",
+        "from typing import TYPE_CHECKING",
+        "",
+        "if TYPE_CHECKING:",
+        "    from typing import Any",
+        "",
+    ]
+    maps = []
+    decoders = []
+    children = []
+    for p in properties:
+        for pd, parent in [(p, None)] + [(cp, p) for cp in p.get("childProps", [])]:
+            name = names[pd["key"]]
+            if "valueMap" in pd or "bitMap" in pd:
+                const = f"{pd['key'].upper()}_{'VALUES' if 'valueMap' in pd else 'BITS'}"
+                mapping = {_map_key(k): v for k, v in (pd.get("valueMap") or pd.get("bitMap")).items()}
+                maps.append(f"{const} = {mapping!r}")
+                decoder = f"{name}_text"
+                if decoder in used:
+                    raise ValueError(f"Decoder name '{decoder}' collides with a property attribute")
+                used.add(decoder)
+                decoders.append((name, decoder, const, pd, parent))
+            if parent is not None:
+                children.append((name, pd, parent))
+    lines += maps + ["", ""]
+    lines += [
+        "class WattpilotModel:",
+        '    """Typed view on the properties of a Wattpilot using the YAML alias names"""',
+        "",
+        "    __slots__ = (",
+    ]
+    lines += [f"        {names[p['key']]!r}," for p in properties]
+    lines += [
+        "    )",
+        "",
+    ]
+    lines += [f"    {names[p['key']]}: {_type_hint(p)}  # {_comment(p)}" for p in properties]
+    lines += [
+        "",
+        "    def __init__(self):",
+        "        for name in self.__slots__:",
+        "            object.__setattr__(self, name, None)",
+        "",
+        "    def update(self, key, value):",
+        '        """Sets a property by its API key (returns False for unknown keys)"""',
+        "        name = KEY_TO_ATTR.get(key)",
+        "        if name is None:",
+        "            return False",
+        "        object.__setattr__(self, name, value)",
+        "        return True",
+    ]
+    for name, cpd, p in children:
+        parent_name = names[p["key"]]
+        ref = cpd["valueRef"]
+        lines += [
+            "",
+            "    @property",
+            f"    def {name}(self) -> {_type_hint(cpd, p.get('itemType', 'unknown'))}:",
+            f'        """{_comment(cpd)}"""',
+            f"        v = self.{parent_name}",
+        ]
+        if p.get("jsonType") == "array":
+            lines.append(f"        return v[{int(ref)}] if v is not None and len(v) > {int(ref)} else None")
+        else:
+            lines.append(f"        return getattr(v, {str(ref)!r}, None)")
+    for name, decoder, const, pd, parent in decoders:
+        lines += [
+            "",
+            "    @property",
+            f"    def {decoder}(self):",
+            f'        """Decoded value of {pd["key"]}"""',
+            f"        v = self.{name}",
+            "        if v is None:",
+            "            return None",
+        ]
+        if "bitMap" in pd:
+            lines.append(f"        return [n for b, n in {const}.items() if v >> b & 1]")
+        elif pd.get("jsonType") == "array":
+            lines.append(f"        return [{const}.get(i, i) for i in v]")
+        else:
+            lines.append(f"        return {const}.get(v, v)")
+    lines += [
+        "",
+        "",
+        "KEY_TO_ATTR = {",
+    ]
+    lines += [f"    {p['key']!r}: {names[p['key']]!r}," for p in properties]
+    lines += [
+        "}",
+        "",
+    ]
+    return "\n".join(lines)
+
+
+def generate_model(source=DEFAULT_SOURCE, target=DEFAULT_TARGET, check=False):
+    """Writes the model source to target - returns True if the target was up to date"""
+    with open(source, "rb") as f:
+        apidef = yaml.load(f, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+    code = generate_model_source(apidef)
+    current = None
+    if os.path.exists(target):
+        with open(target, encoding="utf-8") as f:
+            current = f.read()
+    if current == code:
+        return True
+    if not check:
+        with open(target, "w", encoding="utf-8") as f:
+            f.write(code)
+    return False
+
+
+def main():
+    check = "--check" in sys.argv[1:]
+    up_to_date = generate_model(check=check)
+    if check and not up_to_date:
+        sys.exit(f"{DEFAULT_TARGET} is outdated - regenerate using: python -m wattpilot.modelgen")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+"""Websocket proxy serving multiple local clients over a single session to the charger
+
+Usage: wattpilotproxy
+
+The proxy connects to the chargers configured by the WATTPILOT_* environment
+variables (see README.md) and serves the Wattpilot protocol on PROXY_PORT
+(consecutive ports for multiple chargers), e.g. ws://<proxyHost>:8080/ws.
+Clients authenticate using the password of the charger.
+
+hello, authRequired and fullStatus are answered from the state of the
+upstream session, so new clients do not cause any load on the charger.
+Status messages of the charger are forwarded to all clients. Set commands of
+the clients are sent one after the other over the upstream session and the
+responses are routed back to the client which sent the command.
+"""
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+import signal
+import struct
+
+from wattpilot import Event
+from wattpilot import wattpilotshell as sh
+
+_LOGGER = logging.getLogger(__name__)
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+# Maximum size of a message received from a client:
+MAX_MESSAGE_SIZE = 1 << 20
+# Clients are disconnected if more data than this is waiting to be sent to them:
+MAX_WRITE_BUFFER = 4 << 20
+# Set commands awaiting a response from the charger (the oldest are dropped):
+MAX_PENDING_REQUESTS = 1000
+# Messages of the upstream session which are not forwarded to clients:
+UPSTREAM_MESSAGES = {"hello", "authRequired", "authSuccess", "authError"}
+
+
+class WebSocketError(Exception):
+    pass
+
+
+def unmask(data, mask):
+    n = len(data)
+    key = int.from_bytes((mask * (n // 4 + 1))[:n], "big")
+    return (int.from_bytes(data, "big") ^ key).to_bytes(n, "big")
+
+
+class WebSocketConnection:
+    """Server side of a websocket connection (RFC 6455) using asyncio streams"""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    async def handshake(self, ready=True):
+        request = await self.reader.readuntil(b"\r\n\r\n")
+        lines = request.decode("latin-1").split("\r\n")
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                k, v = line.split(":", 1)
+                headers[k.strip().lower()] = v.strip()
+        key = headers.get("sec-websocket-key")
+        if not lines[0].startswith("GET ") or headers.get("upgrade", "").lower() != "websocket" or key == None:
+            self.writer.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            raise WebSocketError("Not a websocket request")
+        if not ready:
+            self.writer.write(b"HTTP/1.1 503 Service Unavailable\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            raise WebSocketError("Charger is not connected")
+        accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode()).digest()).decode()
+        self.writer.write(
+            f"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\nSec-WebSocket-Accept: {accept}\r\n\r\n".encode())
+
+    def _send_frame(self, opcode, data):
+        length = len(data)
+        if length < 126:
+            header = struct.pack("!BB", 0x80 | opcode, length)
+        elif length < 1 << 16:
+            header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+        else:
+            header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+        self.writer.write(header + data)
+
+    def send(self, text):
+        if self.writer.is_closing():
+            raise WebSocketError("Connection is closed")
+        if self.writer.transport.get_write_buffer_size() > MAX_WRITE_BUFFER:
+            raise WebSocketError("Client does not read its messages")
+        self._send_frame(0x1, text.encode())
+
+    async def recv(self):
+        """Returns the next text message or None if the client closed the connection"""
+        fragments = []
+        while True:
+            b1, b2 = await self.reader.readexactly(2)
+            opcode = b1 & 0x0f
+            length = b2 & 0x7f
+            if length == 126:
+                (length,) = struct.unpack("!H", await self.reader.readexactly(2))
+            elif length == 127:
+                (length,) = struct.unpack("!Q", await self.reader.readexactly(8))
+            if length + sum(len(f) for f in fragments) > MAX_MESSAGE_SIZE:
+                raise WebSocketError("Message too large")
+            mask = await self.reader.readexactly(4) if b2 & 0x80 else None
+            data = await self.reader.readexactly(length)
+            if mask:
+                data = unmask(data, mask)
+            if opcode == 0x8:
+                self._send_frame(0x8, data[:2])
+                return None
+            elif opcode == 0x9:
+                self._send_frame(0xA, data)
+            elif opcode in [0x0, 0x1, 0x2]:
+                fragments.append(data)
+                if b1 & 0x80:
+                    return b"".join(fragments).decode()
+
+    def close(self):
+        self.writer.close()
+
+
+class Proxy:
+    """Serves the Wattpilot protocol to multiple clients using the session of a Wattpilot client"""
+
+    def __init__(self, loop, wp):
+        self.loop = loop
+        self.wp = wp
+        self.server = None
+        # Authenticated clients receiving the messages of the charger:
+        self.clients = set()
+        # (client, requestId of the client) per request id of the upstream session:
+        self.pending = {}
+        self.served = 0
+        self.forwarded = 0
+        # Encoded "key":value of each property and the store version they are up to date with:
+        self._fragments = {}
+        self._snapshot_store = None
+        self._snapshot_version = 0
+        self._snapshot = None
+
+    def on_message(self, wp, wsapp, msg, msg_json):
+        # Called in the websocket thread of the charger:
+        self.loop.call_soon_threadsafe(
+            self._dispatch, msg.type, getattr(msg, "requestId", None), msg_json)
+
+    def _dispatch(self, msg_type, request_id, msg_json):
+        if msg_type == "response":
+            self._route_response(request_id, msg_json)
+        elif msg_type not in UPSTREAM_MESSAGES:
+            for client in list(self.clients):
+                self._send(client, msg_json)
+            self.forwarded += 1
+
+    def _route_response(self, request_id, msg_json):
+        if isinstance(request_id, str):
+            # Responses to secured messages refer to the id of the wrapping message:
+            request_id = request_id.removesuffix("sm")
+            request_id = int(request_id) if request_id.isdigit() else request_id
+        client, client_request_id = self.pending.pop(request_id, (None, None))
+        if client == None:
+            # Not sent by the proxy (or the client has gone):
+            return
+        response = json.loads(msg_json)
+        response["requestId"] = client_request_id
+        self._send(client, json.dumps(response))
+
+    def _send(self, client, text):
+        try:
+            client.send(text)
+        except (WebSocketError, ConnectionError) as e:
+            _LOGGER.warning(f"Disconnecting client: {e}")
+            self.clients.discard(client)
+            client.close()
+
+    def hello(self):
+        wp = self.wp
+        hello = {
+            "type": "hello",
+            "serial": wp.serial,
+            "hostname": wp.hostname,
+            "friendly_name": wp.friendlyName,
+            "manufacturer": wp.manufacturer,
+            "devicetype": wp.devicetype,
+            "version": wp.version,
+            "protocol": wp.protocol,
+            "secured": wp.secured,
+        }
+        return json.dumps({k: v for k, v in hello.items() if v != None})
+
+    def snapshot(self):
+        """Returns a fullStatus message with all properties of the upstream session"""
+        props = self.wp.allProps
+        if props is not self._snapshot_store:
+            self._fragments = {}
+            self._snapshot_store = props
+            self._snapshot_version = 0
+            self._snapshot = None
+        version = props.version
+        if self._snapshot == None or version != self._snapshot_version:
+            # Only properties changed since the last snapshot are encoded again:
+            for k in props.changes_since(self._snapshot_version):
+                if k in props:
+                    self._fragments[k] = f"{json.dumps(k)}:{props.get_raw(k).decode()}"
+                else:
+                    self._fragments.pop(k, None)
+            self._snapshot_version = version
+            self._snapshot = f'{{"type":"fullStatus","partial":false,"status":{{{",".join(self._fragments.values())}}}}}'
+        return self._snapshot
+
+    async def serve(self, reader, writer):
+        ws = WebSocketConnection(reader, writer)
+        try:
+            await ws.handshake(self.wp.connected and self.wp.allPropsInitialized)
+            ws.send(self.hello())
+            token1 = secrets.token_hex(16)
+            token2 = secrets.token_hex(16)
+            ws.send(json.dumps({"type": "authRequired", "token1": token1,
+                    "token2": token2, "hash": self.wp.authHashType}))
+            text = await ws.recv()
+            auth = json.loads(text) if text != None else {}
+            if not isinstance(auth, dict) or auth.get("type") != "auth" or not hmac.compare_digest(
+                    self.wp.auth_hash(token1, token2, str(auth.get("token3", ""))), str(auth.get("hash", ""))):
+                ws.send(json.dumps({"type": "authError", "message": "Wrong password"}))
+                return
+            ws.send(json.dumps({"type": "authSuccess"}))
+            ws.send(self.snapshot())
+            self.clients.add(ws)
+            self.served += 1
+            _LOGGER.info(f"Client connected to {self.wp.serial} ({len(self.clients)} clients)")
+            while (text := await ws.recv()) != None:
+                self.handle_request(ws, text)
+        except (WebSocketError, ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError) as e:
+            _LOGGER.debug(f"Client connection failed: {e}")
+        finally:
+            if ws in self.clients:
+                self.clients.discard(ws)
+                _LOGGER.info(f"Client disconnected from {self.wp.serial} ({len(self.clients)} clients)")
+            self.pending = {k: v for k, v in self.pending.items() if v[0] != ws}
+            ws.close()
+
+    def respond_error(self, ws, request_id, message):
+        self._send(ws, json.dumps({"type": "response", "requestId": request_id,
+                   "success": False, "message": message, "status": {}}))
+
+    def handle_request(self, ws, text):
+        msg = json.loads(text)
+        if not isinstance(msg, dict):
+            return
+        request_id = msg.get("requestId")
+        if msg.get("type") == "securedMsg":
+            data = str(msg.get("data", ""))
+            if not hmac.compare_digest(self.wp.message_hmac(data), str(msg.get("hmac", ""))):
+                self.respond_error(ws, request_id, "Invalid hmac")
+                return
+            msg = json.loads(data)
+        if not isinstance(msg, dict) or msg.get("type") != "setValue" or "key" not in msg:
+            self.respond_error(ws, request_id, f"Unsupported message type: {msg.get('type')}")
+            return
+        if len(self.pending) >= MAX_PENDING_REQUESTS:
+            self.pending.pop(next(iter(self.pending)))
+        # Commands are sent from the event loop only, so they reach the charger in order:
+        upstream_id = self.wp.send_update(msg["key"], msg.get("value"))
+        self.pending[upstream_id] = (ws, request_id)
+
+    async def start(self, host, port):
+        self.wp.add_event_handler(Event.WP_MESSAGE, self.on_message)
+        self.server = await asyncio.start_server(self.serve, host or None, port)
+        _LOGGER.info(f"Proxying Wattpilot {self.wp.serial} on ws://{host or '0.0.0.0'}:{port}/ws")
+
+    def stop(self):
+        self.wp.remove_event_handler(Event.WP_MESSAGE, self.on_message)
+        if self.server != None:
+            self.server.close()
+        for client in list(self.clients):
+            client.close()
+        self.clients = set()
+        self.wp.disconnect()
+
+
+def main_setup_env():
+    global PROXY_HOST
+    global PROXY_PORT
+    PROXY_HOST = os.environ.get('PROXY_HOST', '')
+    PROXY_PORT = int(os.environ.get('PROXY_PORT', '8080'))
+
+
+async def main_async():
+    loop = asyncio.get_running_loop()
+    chargers = await loop.run_in_executor(None, sh.wp_connect_all)
+    proxies = [Proxy(loop, wp) for wp in chargers]
+    for i, proxy in enumerate(proxies):
+        await proxy.start(PROXY_HOST, PROXY_PORT + i)
+    stopping = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+    await stopping.wait()
+    _LOGGER.info(f"Shutting down proxy ...")
+    for proxy in proxies:
+        proxy.stop()
+
+
+def main():
+    # Setup environment variables:
+    sh.main_setup_env()
+    main_setup_env()
+
+    # Set debug level:
+    logging.basicConfig(level=sh.WATTPILOT_DEBUG_LEVEL)
+
+    asyncio.run(main_async())
+
+
+if __name__ == '__main__':
+    main()
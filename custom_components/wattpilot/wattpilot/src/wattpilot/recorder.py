@@ -0,0 +1,319 @@
+"""Recording of property changes to rotating files (see the record and export shell commands)
+
+Each property change is stored as a row of (ts, serial, key, value), with ts
+being the UNIX timestamp of receiving the change and value the JSON encoded
+property value. Rows are buffered in memory and written in batches to files
+named <prefix>-<serial>-<start time>[-<sequence number>].<format>, which are
+rotated by age and size. The sequence number is added for files started
+within the same second, so existing files are never reopened.
+
+Supported formats are ndjson, csv and parquet. Writing parquet files requires
+pyarrow, which is only imported when it is used.
+"""
+import csv
+import heapq
+import io
+import json
+import logging
+import os
+import re
+import threading
+
+from datetime import datetime, timezone
+from time import time
+from types import SimpleNamespace
+
+from wattpilot import Event
+
+_LOGGER = logging.getLogger(__name__)
+
+RECORD_FIELDS = ["ts", "serial", "key", "value"]
+RECORD_FILE_PATTERN = re.compile(
+    r'^(?P<prefix>.+)-(?P<serial>[^-]+)-(?P<start>\d{8}T\d{6}Z)(?:-(?P<seq>\d+))?\.(?P<format>ndjson|csv|parquet)$')
+RECORD_FILE_TIME_FORMAT = "%Y%m%dT%H%M%SZ"
+
+
+def _namespace_default(obj):
+    if isinstance(obj, SimpleNamespace):
+        return obj.__dict__
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def encode_value(value):
+    return json.dumps(value, separators=(',', ':'), default=_namespace_default)
+
+
+def ndjson_line(row):
+    ts, serial, key, value = row
+    return f'{{"ts":{ts},"serial":{json.dumps(serial)},"key":{json.dumps(key)},"value":{value}}}\n'
+
+
+def import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise RuntimeError(
+            "Parquet files require pyarrow (pip install pyarrow)") from e
+    return pyarrow
+
+
+class NdjsonWriter:
+    extension = "ndjson"
+
+    def __init__(self, path):
+        self.file = open(path, "a", encoding="utf-8", buffering=io.DEFAULT_BUFFER_SIZE * 16)
+
+    def write_rows(self, rows):
+        self.file.write("".join(ndjson_line(row) for row in rows))
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class CsvWriter:
+    extension = "csv"
+
+    def __init__(self, path):
+        new_file = not os.path.exists(path)
+        self.file = open(path, "a", encoding="utf-8", newline="", buffering=io.DEFAULT_BUFFER_SIZE * 16)
+        self.writer = csv.writer(self.file)
+        if new_file:
+            self.writer.writerow(RECORD_FIELDS)
+
+    def write_rows(self, rows):
+        self.writer.writerows(rows)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+    extension = "parquet"
+
+    def __init__(self, path):
+        pyarrow = self.pa = import_pyarrow()
+        self.schema = pyarrow.schema([
+            ("ts", pyarrow.float64()),
+            ("serial", pyarrow.string()),
+            ("key", pyarrow.string()),
+            ("value", pyarrow.string()),
+        ])
+        self.writer = pyarrow.parquet.ParquetWriter(path, self.schema)
+
+    def write_rows(self, rows):
+        # Each batch becomes a row group:
+        columns = list(zip(*rows))
+        self.writer.write_table(self.pa.Table.from_arrays(
+            [self.pa.array(c, type=f.type) for c, f in zip(columns, self.schema)], schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+RECORD_WRITERS = {w.extension: w for w in [NdjsonWriter, CsvWriter, ParquetWriter]}
+
+
+class Recorder:
+    """Records the property changes of chargers to rotating files
+
+    keys: property keys to record (None records all properties)
+    buffer_rows: number of buffered rows which triggers writing them
+    flush_s: maximum number of seconds rows are buffered
+    rotate_s/rotate_bytes: maximum age/size of a file (0 disables the limit)
+    """
+
+    def __init__(self, directory, fmt="ndjson", keys=None, buffer_rows=1000, flush_s=5,
+                 rotate_s=3600, rotate_bytes=0, prefix="wattpilot"):
+        if fmt not in RECORD_WRITERS:
+            raise ValueError(f"Unsupported record format: {fmt}")
+        self.directory = os.path.expanduser(directory)
+        self.format = fmt
+        self.keys = frozenset(keys) if keys != None else None
+        self.buffer_rows = buffer_rows
+        self.flush_s = flush_s
+        self.rotate_s = rotate_s
+        self.rotate_bytes = rotate_bytes
+        self.prefix = prefix
+        self.chargers = []
+        self.recorded = 0
+        self._rows = []
+        self._rows_lock = threading.Lock()
+        # Open file per serial number (see _get_file):
+        self._open = {}
+        self._write_lock = threading.Lock()
+        self._timer = None
+
+    def on_property(self, wp, name, value):
+        if self.keys != None and name not in self.keys:
+            return
+        row = (time(), wp.serial, name, encode_value(value))
+        with self._rows_lock:
+            self._rows.append(row)
+            full = len(self._rows) >= self.buffer_rows
+        if full:
+            self.flush()
+
+    def start(self, chargers):
+        os.makedirs(self.directory, exist_ok=True)
+        # Fail early if the format cannot be written:
+        if self.format == "parquet":
+            import_pyarrow()
+        self.chargers = list(chargers)
+        for wp in self.chargers:
+            wp.add_event_handler(Event.WP_PROPERTY, self.on_property)
+        self._schedule_flush()
+
+    def stop(self):
+        for wp in self.chargers:
+            wp.remove_event_handler(Event.WP_PROPERTY, self.on_property)
+        self.chargers = []
+        if self._timer != None:
+            self._timer.cancel()
+            self._timer = None
+        self.flush()
+        with self._write_lock:
+            for f in self._open.values():
+                f.writer.close()
+            self._open = {}
+
+    def _schedule_flush(self):
+        if self.flush_s > 0:
+            self._timer = threading.Timer(self.flush_s, self._flush_periodically)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _flush_periodically(self):
+        try:
+            self.flush()
+        except Exception as e:
+            _LOGGER.error(f"Unable to write recorded properties: {e}")
+        if self.chargers:
+            self._schedule_flush()
+
+    def flush(self):
+        """Writes all buffered rows"""
+        with self._rows_lock:
+            rows = self._rows
+            self._rows = []
+        if not rows:
+            return
+        with self._write_lock:
+            by_serial = {}
+            for row in rows:
+                by_serial.setdefault(row[1], []).append(row)
+            for serial, serial_rows in by_serial.items():
+                f = self._get_file(serial, serial_rows[0][0])
+                f.writer.write_rows(serial_rows)
+            self.recorded += len(rows)
+
+    def _get_file(self, serial, ts):
+        f = self._open.get(serial)
+        if f != None and ((self.rotate_s > 0 and ts - f.started >= self.rotate_s) or
+                          (self.rotate_bytes > 0 and os.path.getsize(f.path) >= self.rotate_bytes)):
+            f.writer.close()
+            f = None
+        if f == None:
+            started = datetime.fromtimestamp(ts, timezone.utc).strftime(RECORD_FILE_TIME_FORMAT)
+            path = os.path.join(
+                self.directory, f"{self.prefix}-{serial}-{started}.{self.format}")
+            seq = 0
+            while os.path.exists(path):
+                # Rotated within the same second (or restarted) - writers would truncate or mix up files:
+                seq += 1
+                path = os.path.join(
+                    self.directory, f"{self.prefix}-{serial}-{started}-{seq}.{self.format}")
+            _LOGGER.debug(f"Recording properties of {serial} to {path}")
+            f = self._open[serial] = SimpleNamespace(
+                path=path, started=ts, writer=RECORD_WRITERS[self.format](path))
+        return f
+
+    def status(self):
+        with self._rows_lock:
+            buffered = len(self._rows)
+        return {
+            "directory": self.directory,
+            "format": self.format,
+            "recorded": self.recorded,
+            "buffered": buffered,
+            "files": [f.path for f in self._open.values()],
+        }
+
+
+def parse_time(s):
+    """Returns the UNIX timestamp of an ISO date/time (local time if without timezone) or a number"""
+    try:
+        return float(s)
+    except ValueError:
+        return datetime.fromisoformat(s).timestamp()
+
+
+def list_record_files(directory):
+    """Returns (path, serial, start, format) of all record files sorted by serial number, start time and sequence number"""
+    files = []
+    for name in os.listdir(os.path.expanduser(directory)):
+        m = RECORD_FILE_PATTERN.match(name)
+        if m:
+            start = datetime.strptime(m["start"], RECORD_FILE_TIME_FORMAT).replace(
+                tzinfo=timezone.utc).timestamp()
+            files.append((os.path.join(os.path.expanduser(directory), name),
+                         m["serial"], start, m["format"], int(m["seq"] or 0)))
+    return [f[:4] for f in sorted(files, key=lambda f: (f[1], f[2], f[4]))]
+
+
+def _read_file(path, fmt):
+    if fmt == "ndjson":
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    r = json.loads(line)
+                    yield r["ts"], r["serial"], r["key"], encode_value(r["value"])
+    elif fmt == "csv":
+        with open(path, encoding="utf-8", newline="") as f:
+            for ts, serial, key, value in csv.reader(f):
+                if ts != "ts":
+                    yield float(ts), serial, key, value
+    else:
+        table = import_pyarrow().parquet.read_table(path)
+        yield from zip(*[table.column(c).to_pylist() for c in RECORD_FIELDS])
+
+
+def _read_charger_records(files, start, end, keys):
+    for i, (path, serial, file_start, fmt) in enumerate(files):
+        # Files only contain rows until the next file of the charger was started (file names use whole seconds):
+        next_start = files[i + 1][2] + 1 if i + 1 < len(files) else None
+        if (end != None and file_start >= end) or (start != None and next_start != None and next_start <= start):
+            continue
+        for row in _read_file(path, fmt):
+            if (start == None or row[0] >= start) and (end == None or row[0] < end) and (keys == None or row[2] in keys):
+                yield row
+
+
+def read_records(directory, start=None, end=None, keys=None):
+    """Yields (ts, serial, key, value) of all recorded rows with start <= ts < end ordered by time"""
+    files_by_serial = {}
+    for f in list_record_files(directory):
+        files_by_serial.setdefault(f[1], []).append(f)
+    # Files not overlapping with the time range are skipped without reading them:
+    yield from heapq.merge(*[_read_charger_records(files, start, end, keys) for files in files_by_serial.values()],
+                           key=lambda row: row[0])
+
+
+def export_records(rows, out, fmt="ndjson"):
+    """Writes rows to the file object out as ndjson or csv and returns the number of rows"""
+    count = 0
+    if fmt == "csv":
+        writer = csv.writer(out)
+        writer.writerow(RECORD_FIELDS)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    elif fmt == "ndjson":
+        for row in rows:
+            out.write(ndjson_line(row))
+            count += 1
+    else:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    return count
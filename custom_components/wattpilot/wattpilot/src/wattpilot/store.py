@@ -0,0 +1,232 @@
+import json
+import sys
+
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from time import time
+from types import SimpleNamespace
+
+
+_MISSING = object()
+
+
+def _namespace_default(obj):
+    if isinstance(obj, SimpleNamespace):
+        return obj.__dict__
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _namespace_hook(d):
+    return SimpleNamespace(**d)
+
+
+def to_namespace(value):
+    """Converts a value returned by json.loads without object hook like json.loads with SimpleNamespace objects"""
+    if isinstance(value, dict):
+        return SimpleNamespace(**{k: to_namespace(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return [to_namespace(v) if isinstance(v, (dict, list)) else v for v in value]
+    return value
+
+
+def _same(old, new):
+    """Returns True if a new value equals the stored one (True and 1 are considered different)"""
+    return old.__class__ is new.__class__ and old == new
+
+
+def _deep_sizeof(value):
+    """Returns the approximate memory footprint of a (nested) property value"""
+    size = sys.getsizeof(value)
+    if isinstance(value, SimpleNamespace):
+        value = value.__dict__
+        size += sys.getsizeof(value)
+    if isinstance(value, dict):
+        for k, v in value.items():
+            size += sys.getsizeof(k) + _deep_sizeof(v)
+    elif isinstance(value, (list, tuple)):
+        for v in value:
+            size += _deep_sizeof(v)
+    return size
+
+
+class PropertyStore(MutableMapping):
+    """Dictionary-like store for the properties of a Wattpilot
+
+    Keys listed in `exclude` are dropped entirely. Keys listed in `lazy` are
+    kept as compact JSON bytes and only decoded when they are accessed.
+    Values stored by `update_undecoded` are kept as returned by json.loads
+    (without SimpleNamespace objects) and only converted when they are accessed.
+
+    Every change (including removals) increments `version`. Storing a value
+    equal to the current one is not a change. The version and
+    time of the last change are kept per key, so consumers can sync
+    incrementally using `changes_since`.
+    """
+
+    def __init__(self, exclude=None, lazy=None):
+        self._values = {}
+        self._raw = {}
+        self._plain = {}
+        self._skipped = set()
+        self._exclude = frozenset(exclude or ())
+        self._lazy = frozenset(lazy or ()) - self._exclude
+        self._version = 0
+        # (version, timestamp) of the last change per key, ordered by version:
+        self._changes = OrderedDict()
+
+    @property
+    def excluded(self):
+        """Returns the keys which are not stored at all"""
+        return self._exclude
+
+    @property
+    def lazy(self):
+        """Returns the keys which are stored as raw JSON bytes"""
+        return self._lazy
+
+    @property
+    def version(self):
+        """Returns the version of the store, which is incremented by every change"""
+        return self._version
+
+    def _changed(self, key):
+        self._version += 1
+        self._changes[key] = (self._version, time())
+        self._changes.move_to_end(key)
+
+    def changed(self, key):
+        """Returns (version, timestamp) of the last change of a key (None if it has never been stored)"""
+        return self._changes.get(key)
+
+    def changes_since(self, version):
+        """Returns the keys changed after version ordered by their last change
+
+        Only the changed keys are visited. Keys which are no longer in the store have been removed.
+        """
+        while True:
+            try:
+                keys = []
+                for key in reversed(self._changes):
+                    if self._changes[key][0] <= version:
+                        break
+                    keys.append(key)
+                keys.reverse()
+                return keys
+            except RuntimeError:
+                # The store has been changed by the websocket thread meanwhile
+                continue
+
+    @property
+    def skipped(self):
+        """Returns the keys which have been received, but not stored (see mark_skipped)"""
+        return frozenset(self._skipped)
+
+    def __getitem__(self, key):
+        try:
+            return self._values[key]
+        except KeyError:
+            pass
+        if key in self._plain:
+            return to_namespace(self._plain[key])
+        return json.loads(self._raw[key], object_hook=_namespace_hook)
+
+    def __setitem__(self, key, value):
+        old = self._plain.pop(key, _MISSING) if self._plain else _MISSING
+        if key in self._lazy:
+            raw = json.dumps(value, separators=(',', ':'), default=_namespace_default).encode()
+            if self._raw.get(key) == raw:
+                return
+            self._raw[key] = raw
+        elif key not in self._exclude:
+            if old is not _MISSING:
+                old = to_namespace(old)
+            else:
+                old = self._values.get(key, _MISSING)
+            self._values[key] = value
+            if old is not _MISSING and _same(old, value):
+                return
+        else:
+            return
+        self._changed(key)
+
+    def __delitem__(self, key):
+        if key in self._values:
+            del self._values[key]
+        elif key in self._plain:
+            del self._plain[key]
+        else:
+            del self._raw[key]
+        self._changed(key)
+
+    def __contains__(self, key):
+        return key in self._values or key in self._plain or key in self._raw
+
+    def __iter__(self):
+        yield from self._values
+        yield from self._plain
+        yield from self._raw
+
+    def __len__(self):
+        return len(self._values) + len(self._plain) + len(self._raw)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({len(self._values)} values, {len(self._plain)} undecoded, {len(self._raw)} lazy)"
+
+    def update_undecoded(self, values):
+        """Stores values as returned by json.loads without object hook - they are only converted when accessed"""
+        plain = self._plain
+        if self._values.keys().isdisjoint(values) and self._lazy.isdisjoint(values) and self._exclude.isdisjoint(values):
+            for key, value in values.items():
+                old = plain.get(key, _MISSING)
+                plain[key] = value
+                if old is _MISSING or not _same(old, value):
+                    self._changed(key)
+            return
+        for key, value in values.items():
+            if key in self._lazy:
+                raw = json.dumps(value, separators=(',', ':')).encode()
+                if self._raw.get(key) == raw:
+                    continue
+                self._raw[key] = raw
+            elif key not in self._exclude:
+                if key in self._values:
+                    old = self._values.pop(key)
+                    plain[key] = value
+                    if _same(old, to_namespace(value)):
+                        continue
+                else:
+                    old = plain.get(key, _MISSING)
+                    plain[key] = value
+                    if old is not _MISSING and _same(old, value):
+                        continue
+            else:
+                continue
+            self._changed(key)
+
+    def mark_skipped(self, keys):
+        """Records that keys have been received without storing their values (previous values are dropped)"""
+        self._skipped.update(keys)
+        if self._values.keys().isdisjoint(keys) and self._plain.keys().isdisjoint(keys) and self._raw.keys().isdisjoint(keys):
+            return
+        for key in keys:
+            if key in self:
+                del self[key]
+
+    def get_raw(self, key):
+        """Returns the JSON encoded value of a property without keeping it decoded"""
+        if key in self._raw:
+            return self._raw[key]
+        if key in self._plain:
+            return json.dumps(self._plain[key], separators=(',', ':')).encode()
+        return json.dumps(self._values[key], separators=(',', ':'), default=_namespace_default).encode()
+
+    def sizes(self):
+        """Returns the approximate memory usage in bytes per property key"""
+        sizes = {k: _deep_sizeof(v) for k, v in self._values.items()}
+        sizes.update({k: _deep_sizeof(v) for k, v in self._plain.items()})
+        sizes.update({k: sys.getsizeof(v) for k, v in self._raw.items()})
+        return sizes
+
+    def total_size(self):
+        """Returns the approximate memory usage in bytes of all stored properties"""
+        return sum(self.sizes().values())
@@ -1,4 +1,7 @@
+import bisect
 import cmd
+import functools
+import hashlib
 import json
 import logging
 import math
@@ -10,13 +13,55 @@ import wattpilot
 import yaml
 import pkgutil
 
+from datetime import datetime
 from importlib.metadata import version
-from time import sleep
-from threading import Event
+from wattpilot import bench, recorder
+from wattpilot.apidef import APIDEF_PREBUILT, read_apidef
+from time import monotonic, sleep
+from threading import Event, Lock, Thread, Timer
 from types import SimpleNamespace
 
 _LOGGER = logging.getLogger(__name__)
 
+wpdef = None
+# All connected chargers - wp is the one used by the shell commands (see wp_connect_all):
+wp_chargers = []
+# Fallback definitions for properties sent by Wattpilot but missing in wattpilot.yaml:
+wp_unknown_props = {}
+# Precomputed extraction of child property values per parent property key (see wp_compile_split_plan):
+wp_split_plans = {}
+# Index of property names and aliases and encoded values per property key (see wp_search_props):
+wp_search_index = None
+wp_encoded_values = {}
+# Compiled encoders/decoders per property key (see mqtt_compile_codec):
+mqtt_codecs = {}
+# Resolved topics per (serial number, property key) and (charger, property) per set topic (see mqtt_get_topics):
+mqtt_topics = {}
+mqtt_set_topics = {}
+mqtt_message_topics = {}
+mqtt_available_topic = None
+# Hashes of the discovery configs retained by the broker per topic (see ha_on_config):
+ha_discovery_state = {}
+ha_skipped_configs = 0
+# Properties to publish per serial number (see mqtt_get_watched_properties):
+mqtt_watched_properties = {}
+# Last payload published per retained state topic (see mqtt_publish_state):
+mqtt_last_payloads = {}
+mqtt_suppressed_publishes = 0
+# Timer publishing all property states again (see mqtt_refresh_states):
+mqtt_refresh_timer = None
+# Publish limits per property key and throttling state per state topic (see mqtt_throttle_property):
+mqtt_publish_limits = {}
+mqtt_throttles = {}
+mqtt_throttles_lock = Lock()
+# Debouncing state per (serial number, property key) and set commands awaiting a response (see mqtt_queue_command):
+mqtt_commands = {}
+mqtt_pending_responses = {}
+mqtt_commands_lock = Lock()
+mqtt_coalesced_commands = 0
+# Recorder of property changes started by the record command:
+wp_recorder = None
+
 
 #### Utility Functions ####
 
@@ -49,16 +94,24 @@ class JSONNamespaceEncoder(json.JSONEncoder):
         return super(JSONNamespaceEncoder, self).default(obj)
 
 
+JSON_NAMESPACE_ENCODER = JSONNamespaceEncoder()
+
+
 def utils_value2json(value):
-    return json.dumps(value, cls=JSONNamespaceEncoder)
+    return JSON_NAMESPACE_ENCODER.encode(value)
 
 
 #### Wattpilot Functions ####
 
 def wp_read_apidef():
+    global WATTPILOT_APIDEF_CACHE
     global WATTPILOT_SPLIT_PROPERTIES
 
     api_definition = pkgutil.get_data(__name__, "ressources/wattpilot.yaml")
+    try:
+        prebuilt = pkgutil.get_data(__name__, f"ressources/{APIDEF_PREBUILT}")
+    except OSError:
+        prebuilt = None
     wpdef = {
         "config": {},
         "messages": {},
@@ -66,51 +119,111 @@ def wp_read_apidef():
         "splitProperties": [],
     }
     try:
-        wpdef["config"] = yaml.safe_load(api_definition)
-        wpdef["messages"] = dict(zip(
-            [x["key"] for x in wpdef["config"]["messages"]],
-            [x for x in wpdef["config"]["messages"]],
-        ))
-        wpdef["properties"] = {}
-        for p in wpdef["config"]["properties"]:
-            wpdef["properties"] = utils_add_to_dict_unique(
-                wpdef["properties"], p["key"], p)
-            if "childProps" in p and WATTPILOT_SPLIT_PROPERTIES:
-                for cp in p["childProps"]:
-                    cp = {
-                        # Defaults for split properties:
-                        "description": f"This is a child property of '{p['key']}'. See its description for more information.",
-                        "category": p["category"] if "category" in p else "",
-                        "jsonType": p["itemType"] if "itemType" in p else "",
-                    } | cp | {
-                        # Overrides for split properties:
-                        "parentProperty": p["key"],
-                        "rw": "R",  # NOTE: Split properties currently can only be read
-                    }
-                    _LOGGER.debug(f"Adding child property {cp['key']}: {cp}")
-                    wpdef["properties"] = utils_add_to_dict_unique(
-                        wpdef["properties"], cp["key"], cp)
-                    wpdef["splitProperties"].append(cp["key"])
-        _LOGGER.debug(
-            f"Resulting properties config:\n{utils_value2json(wpdef['properties'])}")
+        wpdef = read_apidef(api_definition, WATTPILOT_SPLIT_PROPERTIES, wattpilot.__version__,
+                            cache_dir=os.path.expanduser(WATTPILOT_APIDEF_CACHE) if WATTPILOT_APIDEF_CACHE else None,
+                            prebuilt=prebuilt)
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug(
+                f"Resulting properties config:\n{utils_value2json(wpdef['properties'])}")
     except yaml.YAMLError as exc:
         _LOGGER.fatal(exc)
     return wpdef
 
 
+def wp_get_prop_def(prop_name):
+    """Returns the definition of a property - with a fallback for properties not defined in wattpilot.yaml"""
+    pd = wpdef["properties"].get(prop_name)
+    if pd is None:
+        pd = wp_unknown_props.get(prop_name)
+        if pd is None:
+            _LOGGER.debug(
+                f"Property '{prop_name}' is not defined in the API definition - using fallback definition")
+            pd = {"key": prop_name, "jsonType": "unknown", "rw": "R"}
+            wp_unknown_props[prop_name] = pd
+    return pd
+
+
 def wp_initialize(host, password):
-    global wp
     # Connect to Wattpilot:
-    wp = wattpilot.Wattpilot(host, password)
+    wp = wattpilot.Wattpilot(host, password, ping_interval=WATTPILOT_PING_INTERVAL,
+                             ping_timeout=WATTPILOT_PING_TIMEOUT, stale_after=WATTPILOT_STALE_AFTER,
+                             decode_props=WATTPILOT_DECODE_PROPS.split() if WATTPILOT_DECODE_PROPS != '' else None)
     wp.connect()
     # Wait for connection and initialization:
     utils_wait_timeout(lambda: wp.connected, WATTPILOT_CONNECT_TIMEOUT) or exit(
-        "ERROR: Timeout while connecting to Wattpilot!")
+        f"ERROR: Timeout while connecting to Wattpilot {host}!")
     utils_wait_timeout(lambda: wp.allPropsInitialized, WATTPILOT_INIT_TIMEOUT) or exit(
-        "ERROR: Timeout while waiting for property initialization!")
+        f"ERROR: Timeout while waiting for property initialization of Wattpilot {host}!")
     return wp
 
 
+def wp_get_credentials():
+    """Returns (host, password) for all chargers configured by WATTPILOT_HOST and WATTPILOT_PASSWORD[_<n>]"""
+    return [(host, WATTPILOT_PASSWORDS.get(n, WATTPILOT_PASSWORD))
+            for n, host in enumerate(WATTPILOT_HOST.split(), 1)]
+
+
+def wp_connect_all():
+    global wp
+    global wp_chargers
+    # Sessions to the chargers are limited, so close the ones being replaced:
+    for charger in wp_chargers:
+        charger.disconnect()
+    wp_chargers = [wp_initialize(host, password)
+                   for host, password in wp_get_credentials()]
+    wp = wp_chargers[0]
+    return wp_chargers
+
+
+def wp_compile_split_plan(ppd):
+    """Precompute how to extract the values of all child properties of a parent property in one pass"""
+    children = [wpdef["properties"].get(cp["key"], cp)
+                for cp in ppd.get("childProps", [])]
+    if ppd["jsonType"] == "array":
+        indices = [int(cpd["valueRef"]) for cpd in children]
+
+        def extract(parent_value):
+            if parent_value == None:
+                return [None] * len(indices)
+            n = len(parent_value)
+            return [parent_value[i] if i < n else None for i in indices]
+    elif ppd["jsonType"] == "object":
+        refs = [str(cpd["valueRef"]) for cpd in children]
+
+        def extract(parent_value):
+            if isinstance(parent_value, SimpleNamespace):
+                parent_value = parent_value.__dict__
+            elif not isinstance(parent_value, dict):
+                if parent_value != None:
+                    _LOGGER.warning(
+                        f"Unable to map child properties of {ppd['key']}: type={type(parent_value)}, value={utils_value2json(parent_value)}")
+                return [None] * len(refs)
+            return [parent_value.get(ref) for ref in refs]
+    else:
+        _LOGGER.warning(f"Property {ppd['key']} cannot be split!")
+
+        def extract(parent_value):
+            return [None] * len(children)
+    return SimpleNamespace(
+        children=children,
+        extract=extract,
+        index={cpd["key"]: i for i, cpd in enumerate(children)},
+    )
+
+
+def wp_get_split_plan(ppd):
+    plan = wp_split_plans.get(ppd["key"])
+    if plan is None:
+        plan = wp_split_plans[ppd["key"]] = wp_compile_split_plan(ppd)
+    return plan
+
+
+def wp_split_prop_value(ppd, parent_value):
+    """Returns (child property definition, value) for all child properties of a parent property"""
+    plan = wp_get_split_plan(ppd)
+    return zip(plan.children, plan.extract(parent_value))
+
+
 def wp_get_child_prop_value(cp):
     global wpdef
     cpd = wpdef["properties"][cp]
@@ -119,28 +232,96 @@ def wp_get_child_prop_value(cp):
             f"Child property '{cpd['key']}' is not linked to a parent property: {cpd}")
         return None
     ppd = wpdef["properties"][cpd["parentProperty"]]
-    parent_value = wp.allProps[ppd["key"]]
-    value = None
-    if ppd["jsonType"] == "array":
-        value = parent_value[int(cpd["valueRef"])] if int(
-            cpd["valueRef"]) < len(parent_value) else None
-        _LOGGER.debug(f"  -> got array value {value}")
-    elif ppd["jsonType"] == "object":
-        if parent_value == None:
-            value = None
-            _LOGGER.debug(f"  -> parent value is None, so child as well")
-        elif isinstance(parent_value, SimpleNamespace) and cpd["valueRef"] in parent_value.__dict__:
-            value = parent_value.__dict__[cpd["valueRef"]]
-            _LOGGER.debug(f"  -> got object value {value}")
-        elif cpd["valueRef"] in parent_value:
-            value = parent_value[cpd["valueRef"]]
-            _LOGGER.debug(f"  -> got object value {value}")
-        else:
-            _LOGGER.warning(
-                f"Unable to map child property {cpd['key']}: type={type(parent_value)}, value={utils_value2json(parent_value)}")
-    else:
-        _LOGGER.warning(f"Property {ppd['key']} cannot be split!")
-    return value
+    plan = wp_get_split_plan(ppd)
+    return plan.extract(wp.allProps.get(ppd["key"]))[plan.index[cp]]
+
+
+def wp_get_search_index():
+    """Returns the index of all known property names - rebuilt when Wattpilot sends new properties"""
+    global wp_search_index
+    props = wp.allProps if wp else {}
+    version = (id(wp), getattr(props, "version", len(props)))
+    if wp_search_index is None or wp_search_index.version != version:
+        keys = set(wpdef["properties"].keys()) | set(props.keys())
+        by_name = {}
+        for k in keys:
+            by_name.setdefault(k.lower(), []).append(k)
+        for pd in wpdef["properties"].values():
+            if "alias" in pd:
+                by_name.setdefault(pd["alias"].lower(), []).append(pd["key"])
+        wp_search_index = SimpleNamespace(
+            version=version,
+            keys=sorted(keys),
+            by_name=by_name,
+            names=sorted(by_name.keys()),
+        )
+    return wp_search_index
+
+
+@functools.lru_cache(maxsize=64)
+def wp_compile_search_regex(regex):
+    return re.compile(r'^'+regex+'$', flags=re.IGNORECASE)
+
+
+def wp_match_prop_names(prop_regex):
+    """Returns the keys of all properties whose name or alias matches the regex"""
+    index = wp_get_search_index()
+    if prop_regex == '.*':
+        return set(index.keys)
+    if re.escape(prop_regex) == prop_regex:
+        # Literal name or alias:
+        return set(index.by_name.get(prop_regex.lower(), []))
+    prefix = prop_regex[:-2].lower()
+    if prop_regex.endswith('.*') and re.escape(prefix) == prefix:
+        # Literal prefix of names or aliases:
+        matches = set()
+        for i in range(bisect.bisect_left(index.names, prefix), len(index.names)):
+            if not index.names[i].startswith(prefix):
+                break
+            matches.update(index.by_name[index.names[i]])
+        return matches
+    regex = wp_compile_search_regex(prop_regex)
+    return {k for name, keys in index.by_name.items() if regex.match(name) for k in keys}
+
+
+def wp_get_parent_prop_names(prop_regex):
+    """Returns the keys of all properties matching the regex with child properties replaced by their parent"""
+    return {wpdef["properties"].get(k, {}).get("parentProperty", k) for k in wp_match_prop_names(prop_regex)}
+
+
+def wp_get_encoded_value(pd, value):
+    """Returns the MQTT encoded value of a property - cached as long as the property value does not change"""
+    cached = wp_encoded_values.get(pd["key"])
+    if cached is None or cached[0] is not value:
+        cached = wp_encoded_values[pd["key"]] = (
+            value, mqtt_get_encoded_property(pd, value))
+    return cached[1]
+
+
+def wp_search_props(prop_regex='.*', value_regex='.*', available_only=True):
+    """Returns the values of all properties matching the property name/alias regex and the encoded value regex"""
+    names = wp_match_prop_names(prop_regex)
+    props = {}
+    split_values = {}
+    for k in names:
+        if k in wp.allProps:
+            props[k] = wp.allProps[k]
+        elif not available_only:
+            if k in wpdef["properties"]:
+                props[k] = None
+        elif WATTPILOT_SPLIT_PROPERTIES and "parentProperty" in wpdef["properties"].get(k, {}):
+            # Split each parent only once:
+            ppd = wpdef["properties"][wpdef["properties"][k]["parentProperty"]]
+            plan = wp_get_split_plan(ppd)
+            if ppd["key"] not in split_values:
+                split_values[ppd["key"]] = plan.extract(
+                    wp.allProps.get(ppd["key"]))
+            props[k] = split_values[ppd["key"]][plan.index[k]]
+    if value_regex != '.*':
+        regex = wp_compile_search_regex(value_regex)
+        props = {k: v for k, v in props.items() if regex.match(
+            str(wp_get_encoded_value(wp_get_prop_def(k), v)))}
+    return props
 
 
 def wp_get_all_props(available_only=True):
@@ -151,7 +332,12 @@ def wp_get_all_props(available_only=True):
         props = {k: v for k, v in wp.allProps.items()}
         if WATTPILOT_SPLIT_PROPERTIES:
             for cp_key in wpdef["splitProperties"]:
-                props[cp_key] = wp_get_child_prop_value(cp_key)
+                props[cp_key] = None
+            for k, v in wp.allProps.items():
+                pd = wpdef["properties"].get(k)
+                if pd != None and "childProps" in pd:
+                    for cpd, cv in wp_split_prop_value(pd, v):
+                        props[cpd["key"]] = cv
     else:
         props = {k: (wp.allProps[k] if k in wp.allProps else None)
                  for k in wpdef["properties"].keys()}
@@ -166,8 +352,11 @@ class WattpilotShell(cmd.Cmd):
     file = None
     watching_messages = []
     watching_properties = []
+    changes_version = 0
 
     def postloop(self) -> None:
+        if wp_recorder != None:
+            wp_recorder.stop()
         print()
         return super().postloop()
 
@@ -182,8 +371,18 @@ class WattpilotShell(cmd.Cmd):
         return [md["key"] for md in wpdef["messages"].values() if (not sender or md["sender"] == sender) and md["key"].startswith(text)]
 
     def _complete_propname(self, text, rw=False, available_only=True):
-        global wpdef
-        return [k for k in wp_get_all_props(available_only).keys() if (not rw or ("rw" in wpdef["properties"][k] and wpdef["properties"][k]["rw"] == "R/W")) and k.startswith(text)]
+        keys = wp_get_search_index().keys
+        matches = []
+        for k in keys[bisect.bisect_left(keys, text):]:
+            if not k.startswith(text):
+                break
+            if available_only and k not in wp.allProps and not (WATTPILOT_SPLIT_PROPERTIES and "parentProperty" in wpdef["properties"].get(k, {})):
+                continue
+            if not available_only and k not in wpdef["properties"]:
+                continue
+            if not rw or wp_get_prop_def(k).get("rw") == "R/W":
+                matches.append(k)
+        return matches
 
     def _complete_values(self, text, line):
         global wpdef
@@ -198,19 +397,179 @@ class WattpilotShell(cmd.Cmd):
         """Exit the shell"""
         return True
 
+    def do_bench(self, arg: str) -> bool | None:
+        """Measure latency and throughput of the connection to Wattpilot
+Usage: bench [--auth] [--decode] [seconds] [propName|-] [jsonFile]
+
+Measures for the given number of seconds (default: 10):
+- round trip time of set commands by writing back the current value of propName every second (default: amp, '-' to skip)
+- inter-arrival time and jitter of deltaStatus messages
+- frames and bytes per second by message type
+- with --auth: time to connect and authenticate using an additional session (opened after the measurement)
+- with --decode: CPU time to process the received status frames with and without selective decoding
+  (of WATTPILOT_DECODE_PROPS or nrg, car, amp, frc and psm if not set)
+Results are printed and written to jsonFile (if given)."""
+        global wp
+        args = arg.split(' ')
+        flags = set()
+        while args[0] in ['--auth', '--decode']:
+            flags.add(args.pop(0))
+            args = args or ['']
+        auth = '--auth' in flags
+        if not self._ensure_connected():
+            return
+        try:
+            duration = float(args[0]) if args[0] != '' else 10
+        except ValueError:
+            print(f"ERROR: Invalid number of seconds: {args[0]}")
+            return
+        prop_name = args[1] if len(args) > 1 else bench.DEFAULT_PROBE_PROPERTY
+        if prop_name == '-':
+            prop_name = None
+        elif prop_name not in wp.allProps or wp_get_prop_def(prop_name).get("rw") != "R/W":
+            print(f"ERROR: Unknown or read-only property: {prop_name}")
+            return
+        credentials = None
+        if auth:
+            if wp not in wp_chargers:
+                print(f"ERROR: Credentials of Wattpilot {wp.serial} are unknown")
+                return
+            credentials = wp_get_credentials()[wp_chargers.index(wp)]
+        print(f"Measuring connection to Wattpilot {wp.serial} for {duration:g}s ...")
+        decode_props = None
+        if '--decode' in flags:
+            decode_props = WATTPILOT_DECODE_PROPS.split() or bench.DEFAULT_DECODE_PROPS
+        result = bench.run_benchmark(wp, duration, prop_name, credentials, decode_props=decode_props)
+        self._print_bench_result(result)
+        if len(args) > 2:
+            try:
+                with open(args[2], 'w') as f:
+                    json.dump(result, f, indent=2)
+            except OSError as e:
+                print(f"ERROR: Unable to write results to {args[2]}: {e}")
+                return
+            print(f"Results written to {args[2]}")
+
+    def _print_bench_result(self, result):
+        def fmt(stats):
+            return ', '.join(f"{k}={v}" for k, v in stats.items())
+        print(f"Messages ({result['durationS']}s):")
+        for msg_type, m in result["messages"].items():
+            print(
+                f"- {msg_type}: {m['frames']} frames ({m['framesPerS']}/s), {m['bytes']} bytes ({m['bytesPerS']}/s)")
+        print(f"deltaStatus interval (ms): {fmt(result['deltaStatusIntervalMs'])}")
+        print(f"deltaStatus jitter (ms): {result['deltaStatusJitterMs']}")
+        if "setValue" in result:
+            sv = result["setValue"]
+            print(
+                f"setValue {sv['property']} round trip (ms): {fmt(sv['rttMs'])} - failed: {sv['failed']}, timeouts: {sv['timeouts']}")
+        if "decoding" in result:
+            for msg_type, d in result["decoding"].items():
+                if msg_type != "decodeProps":
+                    print(
+                        f"{msg_type} processing (µs/frame): all={d['allUs']}, selective={d['selectiveUs']} (speedup {d['speedup']}x, {d['frames']} frames)")
+        if "auth" in result:
+            print(
+                f"Connect/auth (ms since connecting): {fmt(result['auth']['ms'])}{'' if result['auth']['success'] else ' - FAILED'}")
+
+    def complete_bench(self, text, line, begidx, endidx):
+        token = line.split(' ')
+        while len(token) > 2 and token[1] in ['--auth', '--decode']:
+            token = token[1:]
+        if len(token) == 2:
+            return ['<seconds>'] + [f for f in ['--auth', '--decode'] if f.startswith(text) and f not in line.split(' ')[:-1]]
+        elif len(token) == 3:
+            return self._complete_propname(text, rw=True, available_only=True) + ['-']
+        elif len(token) == 4:
+            return ['<jsonFile>']
+        return []
+
+    def do_changes(self, arg: str) -> bool | None:
+        """List values of properties changed since a version of the property store
+Usage: changes [version]
+
+Without version, the properties changed since the last changes command are listed."""
+        global wp
+        args = arg.split()
+        if not self._ensure_connected():
+            return
+        if len(args) > 1:
+            print(f"ERROR: Wrong number of arguments!")
+            return
+        try:
+            since = int(args[0]) if args else self.changes_version
+        except ValueError:
+            print(f"ERROR: Invalid version: {args[0]}")
+            return
+        props = wp.allProps
+        current = props.version
+        print(f"List values of properties changed since version {since} (current version: {current}):")
+        for name in props.changes_since(since):
+            changed_version, ts = props.changed(name)
+            value = wp_get_encoded_value(wp_get_prop_def(name), props[name]) if name in props else "(removed)"
+            print(f"- {name}: {value} (version {changed_version}, {datetime.fromtimestamp(ts).isoformat(timespec='milliseconds')})")
+        print()
+        self.changes_version = current
+
+    def complete_changes(self, text, line, begidx, endidx):
+        token = line.split(' ')
+        if len(token) == 2:
+            return ['<version>']
+        return []
+
     def do_connect(self, arg: str) -> bool | None:
         """Connect to Wattpilot (using WATTPILOT_* env variables)
 Usage: connect"""
-        global WATTPILOT_HOST
-        global WATTPILOT_PASSWORD
-        global wp
-        wp = wp_initialize(WATTPILOT_HOST, WATTPILOT_PASSWORD)
+        wp_connect_all()
 
     def do_exit(self, arg: str) -> bool | None:
         """Exit the shell
 Usage: exit"""
         return True
 
+    def do_export(self, arg: str) -> bool | None:
+        """Export recorded property changes of a time range
+Usage: export <directory> <from|-> <to|-> [outFile|-] [propRegex]
+
+from/to are ISO date/times (e.g. 2024-05-01T08:00) or UNIX timestamps ('-' for an open range).
+The rows are written to outFile (as CSV if it ends with .csv, NDJSON otherwise) or printed."""
+        args = arg.split(' ')
+        if len(args) < 3 or arg == '':
+            print(f"ERROR: Wrong number of arguments!")
+            return
+        try:
+            start = recorder.parse_time(args[1]) if args[1] != '-' else None
+            end = recorder.parse_time(args[2]) if args[2] != '-' else None
+        except ValueError as e:
+            print(f"ERROR: Invalid time: {e}")
+            return
+        out_file = args[3] if len(args) > 3 else '-'
+        keys = wp_get_parent_prop_names(args[4]) if len(args) > 4 else None
+        rows = recorder.read_records(args[0], start, end, keys)
+        fmt = 'csv' if out_file.endswith('.csv') else 'ndjson'
+        try:
+            if out_file == '-':
+                recorder.export_records(rows, sys.stdout)
+                return
+            with open(out_file, 'w', encoding='utf-8', newline='') as f:
+                count = recorder.export_records(rows, f, fmt)
+        except OSError as e:
+            print(f"ERROR: Unable to export property changes: {e}")
+            return
+        print(f"Exported {count} property changes to {out_file}")
+
+    def complete_export(self, text, line, begidx, endidx):
+        token = line.split(' ')
+        if len(token) == 2:
+            return ['<directory>']
+        elif len(token) in [3, 4]:
+            return ['<dateTime>', '-']
+        elif len(token) == 5:
+            return ['<outFile>', '-']
+        elif len(token) == 6:
+            return self._complete_propname(text, rw=False, available_only=False) + ['<propRegex>']
+        return []
+
     def do_get(self, arg: str) -> bool | None:
         """Get a property value
 Usage: get <propName>"""
@@ -222,7 +581,7 @@ Usage: get <propName>"""
         if len(args) < 1 or arg == '':
             print(f"ERROR: Wrong number of arguments!")
         elif args[0] in wp.allProps:
-            pd = wpdef["properties"][args[0]]
+            pd = wp_get_prop_def(args[0])
             print(mqtt_get_encoded_property(pd, wp.allProps[args[0]]))
         elif args[0] in wpdef["splitProperties"]:
             pd = wpdef["properties"][args[0]]
@@ -272,13 +631,15 @@ Home Assistant commands:
                 f"List of properties activated for discovery: {HA_PROPERTIES}")
         elif args[0] == "start":
             HA_ENABLED = 'true'
-            mqtt_client = ha_setup(wp)
+            mqtt_client = ha_setup(wp_chargers)
         elif args[0] == "stop":
             ha_stop(mqtt_client)
             HA_ENABLED = 'false'
         elif args[0] == "status":
             print(
                 f"HA discovery is {'enabled' if HA_ENABLED == 'true' else 'disabled'}.")
+            print(
+                f"Unchanged discovery configs not published again: {ha_skipped_configs}")
         elif len(args) > 1 and args[0] in ['enable', 'disable', 'discover', 'undiscover']:
             self._ha_prop_cmds(args[0], args[1])
         else:
@@ -286,34 +647,29 @@ Home Assistant commands:
 
     def _ha_prop_cmds(self, cmd, prop_name):
         global HA_PROPERTIES
-        global MQTT_PROPERTIES
         global mqtt_client
         global wp
         global wpdef
         if prop_name not in wpdef["properties"]:
             print(f"ERROR: Unknown property '{prop_name}!")
         elif cmd == "enable":
-            if prop_name not in MQTT_PROPERTIES:
-                MQTT_PROPERTIES.append(prop_name)
+            mqtt_watch_property(prop_name)
             ha_discover_property(
                 wp, mqtt_client, wpdef["properties"][prop_name], disable_discovery=False, force_enablement=True)
         elif cmd == "disable":
-            if prop_name in MQTT_PROPERTIES:
-                MQTT_PROPERTIES.remove(prop_name)
+            mqtt_watch_property(prop_name, False)
             ha_discover_property(
                 wp, mqtt_client, wpdef["properties"][prop_name], disable_discovery=False, force_enablement=False)
         elif cmd == "discover":
             if prop_name not in HA_PROPERTIES:
                 HA_PROPERTIES.append(prop_name)
-            if prop_name not in MQTT_PROPERTIES:
-                MQTT_PROPERTIES.append(prop_name)
+            mqtt_watch_property(prop_name)
             ha_discover_property(
                 wp, mqtt_client, wpdef["properties"][prop_name], disable_discovery=False, force_enablement=True)
         elif cmd == "undiscover":
             if prop_name in HA_PROPERTIES:
                 HA_PROPERTIES.remove(prop_name)
-            if prop_name in MQTT_PROPERTIES:
-                MQTT_PROPERTIES.remove(prop_name)
+            mqtt_watch_property(prop_name, False)
             ha_discover_property(
                 wp, mqtt_client, wpdef["properties"][prop_name], disable_discovery=True, force_enablement=False)
 
@@ -333,7 +689,8 @@ Usage: info"""
         global wp
         if not self._ensure_connected():
             return
-        print(wp)
+        for charger in wp_chargers:
+            print(charger)
 
     def do_mqtt(self, arg: str) -> bool | None:
         """Control the MQTT bridge
@@ -372,41 +729,43 @@ MQTT commands:
             return
         if args[0] == "properties":
             print(
-                f"List of properties activated for MQTT publishing: {MQTT_PROPERTIES}")
+                f"List of properties activated for MQTT publishing: {mqtt_watched_properties.get(wp.serial, MQTT_PROPERTIES)}")
         elif args[0] == "start":
             MQTT_ENABLED = 'true'
-            mqtt_client = mqtt_setup(wp)
+            mqtt_client = mqtt_setup(wp_chargers)
         elif args[0] == "stop":
             mqtt_stop(mqtt_client)
             MQTT_ENABLED = 'false'
         elif args[0] == "status":
             print(
                 f"MQTT client is {'enabled' if MQTT_ENABLED == 'true' else 'disabled'}.")
+            print(
+                f"Unchanged property states not published again: {mqtt_suppressed_publishes}")
+            print(
+                f"Set commands coalesced with later ones: {mqtt_coalesced_commands}")
         elif len(args) > 1 and args[0] in ['publish', 'unpublish']:
             self._mqtt_prop_cmds(args[0], args[1])
         else:
             print(f"ERROR: Unsupported argument: {args[0]}")
 
     def _mqtt_prop_cmds(self, cmd, prop_name):
-        global MQTT_PROPERTIES
         global mqtt_client
         global wp
         global wpdef
         if prop_name not in wpdef["properties"]:
             print(f"ERROR: Undefined property '{prop_name}'!")
-        elif cmd == "publish" and prop_name not in MQTT_PROPERTIES:
-            MQTT_PROPERTIES.append(prop_name)
-        elif cmd == "unpublish" and prop_name in MQTT_PROPERTIES:
-            MQTT_PROPERTIES.remove(prop_name)
+        else:
+            mqtt_watch_property(prop_name, cmd == "publish")
 
     def complete_mqtt(self, text, line, begidx, endidx):
         token = line.split(' ')
         if len(token) == 2:
             return self._complete_list(['properties', 'publish', 'start', 'status', 'stop', 'unpublish'], text)
         elif len(token) == 3 and token[1] == 'publish':
-            return self._complete_list([p for p in self._complete_propname(text, available_only=True) if p not in MQTT_PROPERTIES], text)
+            watched = mqtt_watched_properties.get(wp.serial, MQTT_PROPERTIES)
+            return self._complete_list([p for p in self._complete_propname(text, available_only=True) if p not in watched], text)
         elif len(token) == 3 and token[1] == 'unpublish':
-            return self._complete_list(MQTT_PROPERTIES, text)
+            return self._complete_list(mqtt_watched_properties.get(wp.serial, MQTT_PROPERTIES), text)
         return []
 
     def do_properties(self, arg: str) -> bool | None:
@@ -442,6 +801,68 @@ Usage: rawvalues [propRegex] [valueRegex]"""
     def complete_rawvalues(self, text, line, begidx, endidx):
         return self._complete_values(text, line)
 
+    def do_record(self, arg: str) -> bool | None:
+        """Record property changes to rotating files
+Usage: record <start|status|stop> [args...]
+
+Record commands:
+  start <directory> [ndjson|csv|parquet] [propRegex]
+    Start recording changes of all (or matching) properties of all chargers (using RECORD_* env variables)
+  status
+    Status of the recording
+  stop
+    Stop recording and write buffered changes
+"""
+        global wp_recorder
+        args = arg.split(' ')
+        if not self._ensure_connected():
+            return
+        if len(args) < 1 or arg == '':
+            print(f"ERROR: Wrong number of arguments!")
+        elif args[0] == 'start' and len(args) < 2:
+            print(f"ERROR: Wrong number of arguments!")
+        elif args[0] == 'start' and wp_recorder != None:
+            print(f"ERROR: Already recording to {wp_recorder.directory}")
+        elif args[0] == 'start':
+            fmt = args[2] if len(args) > 2 else 'ndjson'
+            keys = wp_get_parent_prop_names(args[3]) if len(args) > 3 else None
+            try:
+                wp_recorder = recorder.Recorder(args[1], fmt, keys, RECORD_BUFFER_ROWS,
+                                                RECORD_FLUSH_S, RECORD_ROTATE_S, RECORD_ROTATE_BYTES)
+                wp_recorder.start(wp_chargers)
+            except (ValueError, RuntimeError, OSError) as e:
+                wp_recorder = None
+                print(f"ERROR: Unable to start recording: {e}")
+        elif args[0] == 'status' and wp_recorder == None:
+            print(f"Not recording.")
+        elif args[0] == 'status':
+            status = wp_recorder.status()
+            print(
+                f"Recording to {status['directory']} ({status['format']}): {status['recorded']} property changes written, {status['buffered']} buffered")
+            for path in status['files']:
+                print(f"- {path}")
+        elif args[0] == 'stop' and wp_recorder == None:
+            print(f"ERROR: Not recording")
+        elif args[0] == 'stop':
+            wp_recorder.stop()
+            print(
+                f"Recorded {wp_recorder.recorded} property changes to {wp_recorder.directory}")
+            wp_recorder = None
+        else:
+            print(f"ERROR: Unsupported argument: {args[0]}")
+
+    def complete_record(self, text, line, begidx, endidx):
+        token = line.split(' ')
+        if len(token) == 2:
+            return self._complete_list(['start', 'status', 'stop'], text)
+        elif len(token) == 3 and token[1] == 'start':
+            return ['<directory>']
+        elif len(token) == 4 and token[1] == 'start':
+            return self._complete_list(list(recorder.RECORD_WRITERS.keys()), text)
+        elif len(token) == 5 and token[1] == 'start':
+            return self._complete_propname(text, rw=False, available_only=True) + ['<propRegex>']
+        return []
+
     def do_server(self, arg: str) -> bool | None:
         """Start in server mode (infinite wait loop)
 Usage: server"""
@@ -538,7 +959,7 @@ Usage: values [propRegex] [valueRegex]"""
         props = self._get_props_matching_regex(arg)
         for pd, value in sorted(props.items()):
             print(
-                f"- {pd}: {mqtt_get_encoded_property(wpdef['properties'][pd],value)}")
+                f"- {pd}: {wp_get_encoded_value(wp_get_prop_def(pd),value)}")
         print()
 
     def complete_values(self, text, line, begidx, endidx):
@@ -612,7 +1033,7 @@ Usage: watch <message|property> <msgType|propName>"""
     def _watched_property_changed(self, name, value):
         global wpdef
         if name in self.watching_properties:
-            pd = wpdef["properties"][name]
+            pd = wp_get_prop_def(name)
             _LOGGER.info(
                 f"Property {name} changed to {mqtt_get_encoded_property(pd,value)}")
 
@@ -634,14 +1055,10 @@ Usage: watch <message|property> <msgType|propName>"""
         prop_regex = '.*'
         if len(args) > 0 and args[0] != '':
             prop_regex = args[0]
-        props = {k: v for k, v in wp_get_all_props(available_only).items() if re.match(
-            r'^'+prop_regex+'$', k, flags=re.IGNORECASE)}
         value_regex = '.*'
         if len(args) > 1:
             value_regex = args[1]
-        props = {k: v for k, v in props.items() if re.match(r'^'+value_regex+'$',
-                                                            str(mqtt_get_encoded_property(wpdef["properties"][k], v)), flags=re.IGNORECASE)}
-        return props
+        return wp_search_props(prop_regex, value_regex, available_only)
 
 
 #### MQTT Functions ####
@@ -651,7 +1068,7 @@ def mqtt_get_mapped_value(pd, value):
     if value == None:
         mapped_value = None
     elif "valueMap" in pd:
-        if str(value) in list(pd["valueMap"].keys()):
+        if str(value) in pd["valueMap"]:
             mapped_value = pd["valueMap"][str(value)]
         else:
             _LOGGER.warning(
@@ -670,15 +1087,7 @@ def mqtt_get_mapped_property(pd, value):
 
 
 def mqtt_get_remapped_value(pd, mapped_value):
-    remapped_value = mapped_value
-    if "valueMap" in pd:
-        if mapped_value in pd["valueMap"].values():
-            remapped_value = json.loads(str(list(pd["valueMap"].keys())[
-                                        list(pd["valueMap"].values()).index(mapped_value)]))
-        else:
-            _LOGGER.warning(
-                f"Unable to remap value '{mapped_value}' of property '{pd['key']} - using mapped value!")
-    return remapped_value
+    return mqtt_get_codec(pd).remap(mapped_value)
 
 
 def mqtt_get_remapped_property(pd, mapped_value):
@@ -691,48 +1100,424 @@ def mqtt_get_remapped_property(pd, mapped_value):
     return remapped_value
 
 
-def mqtt_get_encoded_property(pd, value):
-    mapped_value = mqtt_get_mapped_property(pd, value)
-    if value == None or "jsonType" in pd and (
-            pd["jsonType"] == "array"
-            or pd["jsonType"] == "object"
-            or pd["jsonType"] == "boolean"):
-        return json.dumps(mapped_value, cls=JSONNamespaceEncoder)
+def mqtt_map_key(k):
+    """Converts a valueMap key (always a string in the YAML) to the value used by Wattpilot"""
+    try:
+        return json.loads(k)
+    except (TypeError, ValueError):
+        return k
+
+
+def mqtt_compile_codec(pd):
+    """Compiles encoder and decoder functions for a property definition"""
+    prop_name = pd["key"]
+    json_type = pd.get("jsonType", "")
+    encode_json = JSON_NAMESPACE_ENCODER.encode
+    value_map = None
+    reverse_map = None
+    if "valueMap" in pd:
+        value_map = {mqtt_map_key(k): v for k, v in pd["valueMap"].items()}
+        reverse_map = {v: mqtt_map_key(k) for k, v in pd["valueMap"].items()}
+
+    def map_value(v):
+        try:
+            if v.__class__ is not bool:  # True/False must not match the keys 1/0
+                return value_map[v]
+        except (KeyError, TypeError):
+            pass
+        _LOGGER.warning(
+            f"Unable to map value '{v}' of property '{prop_name} - using unmapped value!")
+        return v
+
+    def remap(v):
+        if reverse_map is None:
+            return v
+        try:
+            return reverse_map[v]
+        except (KeyError, TypeError):
+            _LOGGER.warning(
+                f"Unable to remap value '{v}' of property '{prop_name} - using mapped value!")
+            return v
+
+    if value_map is None and json_type in ("array", "object"):
+        encode = encode_json
+    elif value_map is None and json_type == "boolean":
+        def encode(v):
+            return "true" if v is True else "false" if v is False else encode_json(v)
+    elif value_map is None and json_type in ("integer", "float", "string"):
+        def encode(v):
+            return "null" if v is None else v
+    elif value_map is None:
+        # Untyped properties (e.g. 'unknown' or missing in wattpilot.yaml) may contain anything:
+        def encode(v):
+            return v if v.__class__ in (int, float, str) else encode_json(v)
+    elif json_type == "array":
+        def encode(v):
+            return encode_json([map_value(i) for i in v] if v else v)
+    elif json_type in ("object", "boolean"):
+        def encode(v):
+            return encode_json(None if v is None else map_value(v))
     else:
-        return mapped_value
+        def encode(v):
+            return "null" if v is None else map_value(v)
+
+    parse = json.loads if json_type in ("array", "object") else None
+    if json_type == "array" and reverse_map is not None:
+        def decode(v):
+            return [remap(i) for i in (parse(v) if parse else v)]
+    elif reverse_map is not None:
+        def decode(v):
+            return remap(parse(v) if parse else v)
+    elif parse is not None:
+        decode = parse
+    else:
+        def decode(v):
+            return v
+
+    writable = pd.get("rw", "R") == "R/W"
+    minimum = pd.get("min")
+    maximum = pd.get("max")
+
+    def coerce(v):
+        if json_type in ("integer", "float"):
+            if v.__class__ is int and json_type == "integer":
+                return v
+            try:
+                f = float(v)
+            except ValueError:
+                f = None
+            if f is None or v.__class__ is bool or json_type == "integer" and not f.is_integer():
+                raise ValueError(f"Value '{v}' is not of type {json_type}")
+            return int(f) if json_type == "integer" else f
+        if json_type == "boolean":
+            if v is True or v is False:
+                return v
+            s = str(v).lower()
+            if s in ("true", "on", "1"):
+                return True
+            if s in ("false", "off", "0"):
+                return False
+            raise ValueError(f"Value '{v}' is not a boolean")
+        return v
+
+    def validate_item(v):
+        try:
+            if reverse_map is not None:
+                v = reverse_map.get(v, v)
+            try:
+                v = coerce(v)
+            except ValueError:
+                if value_map is None:
+                    raise
+                v = None
+            if value_map is not None and (v is None or v.__class__ is bool or v not in value_map):
+                raise ValueError(
+                    f"Value is not one of {list(value_map.values())}")
+            if minimum is not None and v < minimum or maximum is not None and v > maximum:
+                # The documented ranges do not cover all models, so let Wattpilot decide:
+                _LOGGER.warning(
+                    f"Value {v} of property '{prop_name}' is out of the documented range [{minimum}, {maximum}] - sending it anyway")
+        except TypeError as e:
+            raise ValueError(f"Invalid {json_type} value '{v}'") from e
+        return v
+
+    def validate(payload):
+        """Decodes and checks a value received from MQTT (raises ValueError if it must not be sent to Wattpilot)"""
+        if not writable:
+            raise ValueError(f"Property '{prop_name}' is not writable")
+        if parse is None:
+            return validate_item(payload)
+        try:
+            v = parse(payload)
+        except ValueError as e:
+            raise ValueError(f"Invalid JSON value '{payload}'") from e
+        if json_type == "array" and reverse_map is not None and isinstance(v, list):
+            v = [validate_item(i) for i in v]
+        return v
+
+    return SimpleNamespace(key=prop_name, pd=pd, encode=encode, decode=decode, remap=remap, validate=validate)
+
+
+def mqtt_get_codec(pd):
+    codec = mqtt_codecs.get(pd["key"])
+    if codec is None:
+        # Compile from the full definition, as child properties may be passed without defaults
+        codec = mqtt_compile_codec(wpdef["properties"].get(pd["key"], pd) if wpdef else pd)
+        mqtt_codecs[pd["key"]] = codec
+    return codec
+
+
+def mqtt_get_encoded_property(pd, value):
+    return mqtt_get_codec(pd).encode(value)
 
 
 def mqtt_get_decoded_property(pd, value):
-    if "jsonType" in pd and (pd["jsonType"] == "array" or pd["jsonType"] == "object"):
-        decoded_value = json.loads(value)
-    else:
-        decoded_value = value
-    return mqtt_get_remapped_property(pd, decoded_value)
+    return mqtt_get_codec(pd).decode(value)
+
+
+def mqtt_get_base_topic(wp):
+    """Returns the base topic of a charger - namespaced by its serial number when bridging multiple chargers"""
+    if len(wp_chargers) > 1:
+        return f"{MQTT_TOPIC_BASE}/{wp.serial}"
+    return MQTT_TOPIC_BASE
+
+
+def mqtt_compile_topics(wp, pd):
+    """Resolve the MQTT topics of a property of a charger, so publishing does not need any templating"""
+    name = pd["key"]
+    unique_id = f"wattpilot_{wp.serial}_{name}"
+    topic_subst_map = {
+        "baseTopic": mqtt_get_base_topic(wp),
+        "propName": name,
+        "serialNumber": wp.serial,
+        "uniqueId": unique_id,
+    }
+    topics = SimpleNamespace(
+        subst_map=topic_subst_map,
+        unique_id=unique_id,
+        base=mqtt_subst_topic(MQTT_TOPIC_PROPERTY_BASE, topic_subst_map, False),
+        state=mqtt_subst_topic(MQTT_TOPIC_PROPERTY_STATE, topic_subst_map),
+        state_relative=mqtt_subst_topic(
+            MQTT_TOPIC_PROPERTY_STATE, topic_subst_map, False),
+        set=mqtt_subst_topic(MQTT_TOPIC_PROPERTY_SET, topic_subst_map),
+        set_relative=mqtt_subst_topic(
+            MQTT_TOPIC_PROPERTY_SET, topic_subst_map, False),
+        response=mqtt_subst_topic(
+            MQTT_TOPIC_PROPERTY_RESPONSE, topic_subst_map),
+        ha_config={},
+    )
+    if HA_ENABLED == 'true':
+        for component in {ha_get_discovery_component(pd), "sensor"}:
+            mqtt_get_ha_config_topic(topics, component)
+    return topics
+
+
+def mqtt_get_topics(wp, pd):
+    topics = mqtt_topics.get((wp.serial, pd["key"]))
+    if topics is None:
+        topics = mqtt_topics[(wp.serial, pd["key"])] = mqtt_compile_topics(wp, pd)
+        mqtt_set_topics[topics.set] = (
+            wp, wpdef["properties"].get(pd["key"], pd))
+    return topics
+
+
+def mqtt_get_ha_config_topic(topics, component):
+    topic = topics.ha_config.get(component)
+    if topic is None:
+        topic = topics.ha_config[component] = mqtt_subst_topic(
+            HA_TOPIC_CONFIG, topics.subst_map | {"component": component})
+    return topic
+
+
+def mqtt_get_message_topic(wp, msg_type):
+    topic = mqtt_message_topics.get((wp.serial, msg_type))
+    if topic is None:
+        topic = mqtt_message_topics[(wp.serial, msg_type)] = mqtt_subst_topic(MQTT_TOPIC_MESSAGES, {
+            "baseTopic": mqtt_get_base_topic(wp),
+            "serialNumber": wp.serial,
+            "messageType": msg_type,
+        })
+    return topic
+
 
+def mqtt_build_topics(chargers):
+    """Resolve the topics of all known properties of all chargers"""
+    global mqtt_available_topic
+    mqtt_available_topic = mqtt_subst_topic(MQTT_TOPIC_AVAILABLE, {})
+    for wp in chargers:
+        for pd in wpdef["properties"].values():
+            mqtt_get_topics(wp, pd)
 
-def mqtt_publish_property(wp, mqtt_client, pd, value, force_publish=False):
+
+def mqtt_publish_property(wp, mqtt_client, pd, value, force_publish=False, throttle=True):
     prop_name = pd["key"]
-    if not (force_publish or MQTT_PROPERTIES == [''] or prop_name in MQTT_PROPERTIES):
+    watched = mqtt_watched_properties.get(wp.serial, MQTT_PROPERTIES)
+    if not (force_publish or watched == [''] or prop_name in watched):
         _LOGGER.debug(f"Skipping publishing of property '{prop_name}' ...")
         return
-    property_topic = mqtt_subst_topic(MQTT_TOPIC_PROPERTY_STATE, {
-        "baseTopic": MQTT_TOPIC_BASE,
-        "serialNumber": wp.serial,
-        "propName": prop_name,
-    })
+    property_topic = mqtt_get_topics(wp, pd).state
+    if throttle and not mqtt_throttle_property(wp, mqtt_client, pd, property_topic, value):
+        _LOGGER.debug(f"Holding back property '{prop_name}' due to its publish limits ...")
+        return
+    if not throttle:
+        mqtt_throttle_published(property_topic, value)
     encoded_value = mqtt_get_encoded_property(pd, value)
     _LOGGER.debug(
         f"Publishing property '{prop_name}' with value '{encoded_value}' to MQTT ...")
-    mqtt_client.publish(property_topic, encoded_value, retain=True)
+    mqtt_publish_state(mqtt_client, property_topic, encoded_value)
     if WATTPILOT_SPLIT_PROPERTIES and "childProps" in pd:
-        _LOGGER.debug(
-            f"Splitting child props of property {prop_name} as {pd['jsonType']} for value {value} ...")
-        for cpd in pd["childProps"]:
-            _LOGGER.debug(f"Extracting child property {cpd['key']},  ...")
-            split_value = wp_get_child_prop_value(cpd['key'])
-            _LOGGER.debug(
-                f"Publishing sub-property {cpd['key']} with value {split_value} to MQTT ...")
-            mqtt_publish_property(wp, mqtt_client, cpd, split_value, True)
+        for cpd, split_value in wp_split_prop_value(pd, value):
+            mqtt_publish_property(wp, mqtt_client, cpd, split_value, True, throttle)
+
+
+def mqtt_parse_publish_limits(s):
+    """Parse a space-separated list of '<propName>:<value>' (propName '*' applies to all properties)"""
+    limits = {}
+    for item in s.split(sep=' '):
+        if item == '':
+            continue
+        prop_name, _, value = item.rpartition(':')
+        assert prop_name != '', f"Invalid publish limit '{item}' - expected '<propName>:<value>'!"
+        limits[prop_name] = value
+    return limits
+
+
+def mqtt_parse_deadband(deadband):
+    """Returns (absolute, relative) for a deadband like 0.5 or '2%'"""
+    if deadband is None or deadband == '':
+        return (0, 0)
+    if isinstance(deadband, str) and deadband.endswith('%'):
+        return (0, float(deadband[:-1]) / 100)
+    return (float(deadband), 0)
+
+
+def mqtt_get_publish_limits(pd):
+    """Returns (interval, deadband, relative deadband) for a property - environment variables override wattpilot.yaml"""
+    prop_name = pd["key"]
+    limits = mqtt_publish_limits.get(prop_name)
+    if limits is None:
+        ha_publish = (pd.get("homeAssistant") or {}).get("publish") or {}
+        interval = MQTT_PUBLISH_INTERVALS.get(
+            prop_name, ha_publish.get("interval", MQTT_PUBLISH_INTERVALS.get('*', 0)))
+        deadband = MQTT_PUBLISH_DEADBANDS.get(
+            prop_name, ha_publish.get("deadband", MQTT_PUBLISH_DEADBANDS.get('*')))
+        limits = (float(interval),) + mqtt_parse_deadband(deadband)
+        mqtt_publish_limits[prop_name] = limits
+    return limits
+
+
+def mqtt_within_deadband(value, last_value, deadband, relative):
+    numeric = (int, float)
+    if not isinstance(value, numeric) or not isinstance(last_value, numeric) \
+            or isinstance(value, bool) or isinstance(last_value, bool):
+        return False
+    return abs(value - last_value) < max(deadband, abs(last_value) * relative)
+
+
+def mqtt_throttle_property(wp, mqtt_client, pd, topic, value):
+    """Returns True if the property value may be published now
+
+    Changes within the deadband of the last published value are dropped. Values
+    held back by the publish interval are published by a timer later on (unless
+    a newer value is published before or the last held back value is within the
+    deadband), so the final value of a property reaches MQTT once it left the band.
+    """
+    interval, deadband, relative = mqtt_get_publish_limits(pd)
+    if interval <= 0 and deadband <= 0 and relative <= 0:
+        return True
+    now = monotonic()
+    with mqtt_throttles_lock:
+        t = mqtt_throttles.get(topic)
+        if t is None:
+            t = mqtt_throttles[topic] = SimpleNamespace(
+                published=-math.inf, value=None, pending=None, timer=None)
+        if now - t.published >= interval:
+            if mqtt_within_deadband(value, t.value, deadband, relative):
+                t.pending = None
+                return False
+            if t.timer != None:
+                t.timer.cancel()
+                t.timer = None
+            t.pending = None
+            t.published = now
+            t.value = value
+            return True
+        t.pending = (wp, mqtt_client, pd, value)
+        if t.timer == None:
+            t.timer = Timer(t.published + interval - now, mqtt_flush_property, [topic])
+            t.timer.daemon = True
+            t.timer.start()
+    return False
+
+
+def mqtt_throttle_published(topic, value):
+    """Records a value published without mqtt_throttle_property (e.g. a flushed or refreshed value)"""
+    with mqtt_throttles_lock:
+        t = mqtt_throttles.get(topic)
+        if t is None:
+            return
+        if t.timer != None:
+            t.timer.cancel()
+            t.timer = None
+        t.pending = None
+        t.published = monotonic()
+        t.value = value
+
+
+def mqtt_flush_property(topic):
+    """Publishes the value held back for a topic by mqtt_throttle_property"""
+    with mqtt_throttles_lock:
+        t = mqtt_throttles.get(topic)
+        if t is None:
+            # Throttles have been stopped meanwhile:
+            return
+        t.timer = None
+        pending = t.pending
+        if pending == None:
+            return
+        t.pending = None
+        _, deadband, relative = mqtt_get_publish_limits(pending[2])
+        if mqtt_within_deadband(pending[3], t.value, deadband, relative):
+            return
+    mqtt_publish_property(*pending, force_publish=True, throttle=False)
+
+
+def mqtt_stop_throttles():
+    with mqtt_throttles_lock:
+        for t in mqtt_throttles.values():
+            if t.timer != None:
+                t.timer.cancel()
+        mqtt_throttles.clear()
+
+
+def mqtt_publish_state(mqtt_client, topic, payload):
+    """Publish a retained state - unless the same payload has already been published to the topic"""
+    global mqtt_suppressed_publishes
+    last_payload = mqtt_last_payloads.get(topic, mqtt_last_payloads)
+    if last_payload == payload and last_payload.__class__ is payload.__class__:
+        mqtt_suppressed_publishes += 1
+        return False
+    mqtt_last_payloads[topic] = payload
+    mqtt_client.publish(topic, payload, retain=True)
+    return True
+
+
+def wp_get_props_snapshot(wp):
+    """Returns a copy of all properties of a charger (safe to call while its websocket thread adds properties)"""
+    while True:
+        try:
+            return list(wp.allProps.items())
+        except (RuntimeError, KeyError):
+            # A property has been added or removed by the websocket thread meanwhile
+            continue
+
+
+def mqtt_refresh_states(chargers, mqtt_client):
+    """Publish all property states again and schedule the next refresh after MQTT_REFRESH_INTERVAL_S"""
+    _LOGGER.debug(f"Refreshing all retained property states ...")
+    mqtt_last_payloads.clear()
+    for wp in chargers:
+        for prop_name, value in wp_get_props_snapshot(wp):
+            mqtt_publish_property(
+                wp, mqtt_client, wp_get_prop_def(prop_name), value, throttle=False)
+    mqtt_start_refresh(chargers, mqtt_client)
+
+
+def mqtt_start_refresh(chargers, mqtt_client):
+    global mqtt_refresh_timer
+    mqtt_stop_refresh()
+    if MQTT_REFRESH_INTERVAL_S > 0:
+        mqtt_refresh_timer = Timer(MQTT_REFRESH_INTERVAL_S, mqtt_refresh_states, [
+                                   chargers, mqtt_client])
+        mqtt_refresh_timer.daemon = True
+        mqtt_refresh_timer.start()
+
+
+def mqtt_stop_refresh():
+    global mqtt_refresh_timer
+    if mqtt_refresh_timer != None:
+        mqtt_refresh_timer.cancel()
+        mqtt_refresh_timer = None
 
 
 def mqtt_publish_message(wp, wsapp, msg, msg_json):
@@ -745,17 +1530,12 @@ def mqtt_publish_message(wp, wsapp, msg, msg_json):
     if mqtt_client == None:
         _LOGGER.debug(f"Skipping MQTT message publishing.")
         return
-    msg_dict = json.loads(msg_json)
     if MQTT_PUBLISH_MESSAGES == "true" and (MQTT_MESSAGES == [] or MQTT_MESSAGES == [''] or msg.type in MQTT_MESSAGES):
-        message_topic = mqtt_subst_topic(MQTT_TOPIC_MESSAGES, {
-            "baseTopic": MQTT_TOPIC_BASE,
-            "serialNumber": wp.serial,
-            "messageType": msg.type,
-        })
-        mqtt_client.publish(message_topic, msg_json)
+        mqtt_client.publish(mqtt_get_message_topic(wp, msg.type), msg_json)
     if MQTT_PUBLISH_PROPERTIES == "true" and msg.type in ["fullStatus", "deltaStatus"]:
-        for prop_name, value in msg_dict["status"].items():
-            pd = wpdef["properties"][prop_name]
+        # Use the status already decoded by the client instead of parsing msg_json again:
+        for prop_name, value in msg.status.__dict__.items():
+            pd = wp_get_prop_def(prop_name)
             mqtt_publish_property(wp, mqtt_client, pd, value)
 
 # Substitute topic patterns
@@ -770,42 +1550,67 @@ def mqtt_subst_topic(s, values, expand=True):
     return s.format(**all_values)
 
 
-def mqtt_setup_client(host, port, client_id, available_topic, command_topic):
-    # Connect to MQTT server:
+def mqtt_setup_client(host, port, client_id, available_topic, command_topics, attach_loop=None):
+    """Connect to the MQTT server - attach_loop may attach the client to an external network loop instead of a thread"""
     mqtt_client = mqtt.Client(client_id)
     mqtt_client.on_message = mqtt_set_value
     _LOGGER.info(f"Connecting to MQTT host {host} on port {port} ...")
     mqtt_client.will_set(
         available_topic, payload="offline", qos=0, retain=True)
+    if attach_loop != None:
+        attach_loop(mqtt_client)
     mqtt_client.connect(host, port)
-    mqtt_client.loop_start()
+    if attach_loop == None:
+        mqtt_client.loop_start()
     mqtt_client.publish(available_topic, payload="online", qos=0, retain=True)
-    _LOGGER.info(f"Subscribing to command topics {command_topic}")
-    mqtt_client.subscribe(command_topic)
+    _LOGGER.info(f"Subscribing to command topics {command_topics}")
+    for command_topic in command_topics:
+        mqtt_client.subscribe(command_topic)
     return mqtt_client
 
 
-def mqtt_setup(wp):
+def mqtt_setup(chargers, attach_loop=None, message_callback=None):
+    """Connect to the MQTT server - messages of the chargers are passed to message_callback (default: mqtt_publish_message)"""
     global MQTT_CLIENT_ID
     global MQTT_HOST
     global MQTT_PORT
-    global MQTT_PROPERTIES
-    global MQTT_TOPIC_AVAILABLE
     global MQTT_TOPIC_PROPERTY_SET
-    # Connect to MQTT server:
+    # A new connection may be to a different broker, so publish all states again:
+    mqtt_last_payloads.clear()
+    mqtt_publish_limits.clear()
+    mqtt_stop_throttles()
+    # Resolve all topics before receiving the first command:
+    mqtt_topics.clear()
+    mqtt_set_topics.clear()
+    mqtt_message_topics.clear()
+    mqtt_build_topics(chargers)
+    # Connect to MQTT server (one connection for all chargers):
     mqtt_client = mqtt_setup_client(MQTT_HOST, MQTT_PORT, MQTT_CLIENT_ID,
-                                    mqtt_subst_topic(MQTT_TOPIC_AVAILABLE, {}),
-                                    mqtt_subst_topic(MQTT_TOPIC_PROPERTY_SET, {
-                                                     "propName": "+"}),
-                                    )
-    MQTT_PROPERTIES = mqtt_get_watched_properties(wp)
-    _LOGGER.info(
-        f"Registering message callback to publish updates to the following properties to MQTT: {MQTT_PROPERTIES}")
-    wp.register_message_callback(mqtt_publish_message)
+                                    mqtt_available_topic,
+                                    [mqtt_subst_topic(MQTT_TOPIC_PROPERTY_SET, {
+                                        "baseTopic": mqtt_get_base_topic(wp),
+                                        "serialNumber": wp.serial,
+                                        "propName": "+",
+                                    }) for wp in chargers],
+                                    attach_loop)
+    mqtt_watched_properties.clear()
+    for wp in chargers:
+        mqtt_watched_properties[wp.serial] = mqtt_get_watched_properties(wp)
+        _LOGGER.info(
+            f"Registering message callback to publish updates to the following properties of Wattpilot {wp.serial} to MQTT: {mqtt_watched_properties[wp.serial]}")
+    for wp in chargers:
+        wp.register_message_callback(message_callback or mqtt_publish_message)
+        wp.add_event_handler(wattpilot.Event.WP_RESPONSE, mqtt_on_response)
+    mqtt_start_refresh(chargers, mqtt_client)
     return mqtt_client
 
 
 def mqtt_stop(mqtt_client):
+    mqtt_stop_refresh()
+    mqtt_stop_throttles()
+    mqtt_stop_commands()
+    for wp in wp_chargers:
+        wp.remove_event_handler(wattpilot.Event.WP_RESPONSE, mqtt_on_response)
     if mqtt_client.is_connected():
         _LOGGER.info(f"Disconnecting from MQTT server ...")
         mqtt_client.disconnect()
@@ -814,20 +1619,98 @@ def mqtt_stop(mqtt_client):
 
 
 def mqtt_set_value(client, userdata, message):
-    global wpdef
-    topic_regex = mqtt_subst_topic(
-        MQTT_TOPIC_PROPERTY_SET, {"propName": "([^/]+)"})
-    name = re.sub(topic_regex, r'\1', message.topic)
-    if not name or name == "" or not wpdef["properties"][name]:
-        _LOGGER.warning(f"Unknown property '{name}'!")
-    pd = wpdef["properties"][name]
-    if pd['rw'] == "R":
-        _LOGGER.warning(f"Property '{name}' is not writable!")
-    value = mqtt_get_decoded_property(
-        pd, str(message.payload.decode("utf-8")))
+    target = mqtt_set_topics.get(message.topic)
+    if target is None:
+        _LOGGER.warning(f"Unknown property set topic '{message.topic}'!")
+        return
+    wp, pd = target
+    name = pd["key"]
+    payload = message.payload.decode("utf-8")
+    try:
+        value = mqtt_get_codec(pd).validate(payload)
+    except ValueError as e:
+        _LOGGER.warning(f"Rejecting value '{payload}' for property '{name}': {e}")
+        mqtt_publish_response(client, wp, pd, payload, False, str(e))
+        return
     _LOGGER.info(
         f"MQTT Message received: topic={message.topic}, name={name}, value={value}")
-    wp.send_update(name, value)
+    mqtt_queue_command(client, wp, pd, value)
+
+
+def mqtt_queue_command(mqtt_client, wp, pd, value):
+    """Send a value to Wattpilot - values received within MQTT_SET_DEBOUNCE_MS after a sent value are coalesced"""
+    global mqtt_coalesced_commands
+    window = MQTT_SET_DEBOUNCE_MS / 1000
+    now = monotonic()
+    with mqtt_commands_lock:
+        c = mqtt_commands.get((wp.serial, pd["key"]))
+        if c is None:
+            c = mqtt_commands[(wp.serial, pd["key"])] = SimpleNamespace(
+                sent=-math.inf, pending=None, timer=None)
+        if c.timer == None and now - c.sent >= window:
+            c.sent = now
+        else:
+            if c.pending != None:
+                mqtt_coalesced_commands += 1
+            c.pending = (mqtt_client, wp, pd, value)
+            if c.timer == None:
+                c.timer = Timer(c.sent + window - now,
+                                mqtt_flush_command, [(wp.serial, pd["key"])])
+                c.timer.daemon = True
+                c.timer.start()
+            return
+    mqtt_send_command(mqtt_client, wp, pd, value)
+
+
+def mqtt_flush_command(command_key):
+    with mqtt_commands_lock:
+        c = mqtt_commands.get(command_key)
+        if c is None:
+            # Commands have been stopped meanwhile:
+            return
+        c.timer = None
+        pending = c.pending
+        if pending == None:
+            return
+        c.pending = None
+        c.sent = monotonic()
+    mqtt_send_command(*pending)
+
+
+def mqtt_send_command(mqtt_client, wp, pd, value):
+    request_id = wp.send_update(pd["key"], value)
+    with mqtt_commands_lock:
+        mqtt_pending_responses[(wp.serial, request_id)] = (
+            mqtt_client, pd, value)
+        # Forget the oldest requests in case Wattpilot does not respond:
+        while len(mqtt_pending_responses) > 100:
+            del mqtt_pending_responses[next(iter(mqtt_pending_responses))]
+
+
+def mqtt_on_response(wp, request_id, success, message):
+    with mqtt_commands_lock:
+        pending = mqtt_pending_responses.pop((wp.serial, request_id), None)
+    if pending != None:
+        mqtt_client, pd, value = pending
+        mqtt_publish_response(mqtt_client, wp, pd, value, success, message)
+
+
+def mqtt_publish_response(mqtt_client, wp, pd, value, success, message=None):
+    """Publish the result of a set command to the response topic of the property"""
+    response = {"value": value, "success": success}
+    if message != None:
+        response["message"] = message
+    mqtt_client.publish(mqtt_get_topics(wp, pd).response,
+                        utils_value2json(response))
+
+
+def mqtt_stop_commands():
+    with mqtt_commands_lock:
+        for c in mqtt_commands.values():
+            if c.timer != None:
+                c.timer.cancel()
+        mqtt_commands.clear()
+        mqtt_pending_responses.clear()
 
 
 def mqtt_get_watched_properties(wp):
@@ -835,9 +1718,22 @@ def mqtt_get_watched_properties(wp):
     if MQTT_PROPERTIES == [] or MQTT_PROPERTIES == ['']:
         return list(wp.allProps.keys())
     else:
+        # Configured properties are shared by all chargers, so changes by the shell apply to all of them:
         return MQTT_PROPERTIES
 
 
+def mqtt_watch_property(prop_name, watch=True):
+    """Adds or removes a property to publish for all chargers"""
+    lists = [w for w in mqtt_watched_properties.values() if w is not MQTT_PROPERTIES]
+    if not (MQTT_PROPERTIES == [] or MQTT_PROPERTIES == ['']) or not lists:
+        lists.append(MQTT_PROPERTIES)
+    for watched in lists:
+        if watch and prop_name not in watched:
+            watched.append(prop_name)
+        elif not watch and prop_name in watched:
+            watched.remove(prop_name)
+
+
 #### Home Assistant Functions ####
 
 # Generate device information for HA discovery
@@ -878,6 +1774,12 @@ def ha_get_component_for_prop(prop_info):
     return component
 
 
+def ha_get_discovery_component(pd):
+    """Returns the HA component of a property - the homeAssistant config may override the default"""
+    ha_info = pd.get("homeAssistant") or {}
+    return ha_info.get("component", ha_get_component_for_prop(pd))
+
+
 def ha_get_default_config_for_prop(prop_info):
     config = {}
     if "rw" in prop_info and prop_info["rw"] == "R/W":
@@ -904,43 +1806,34 @@ def ha_get_template_filter_from_json_type(json_type):
 # Publish HA discovery config for a single property
 
 
-def ha_discover_property(wp, mqtt_client, pd, disable_discovery=False, force_enablement=None):
-    global HA_TOPIC_CONFIG
+def ha_discover_property(wp, mqtt_client, pd, disable_discovery=False, force_enablement=None, batch=None):
     global WATTPILOT_SPLIT_PROPERTIES
-    global MQTT_TOPIC_PROPERTY_BASE
-    global MQTT_TOPIC_PROPERTY_SET
-    global MQTT_TOPIC_PROPERTY_STATE
+    if batch is None:
+        batch = []
+        ha_discover_property(wp, mqtt_client, pd,
+                             disable_discovery, force_enablement, batch)
+        ha_publish_configs(mqtt_client, batch)
+        return
     name = pd["key"]
-    ha_info = {}
-    if "homeAssistant" in pd:
-        ha_info = pd["homeAssistant"] or {}
-    component = ha_get_component_for_prop(pd)
-    if "component" in ha_info:  # Override component from config
-        component = ha_info["component"]
+    ha_info = pd.get("homeAssistant") or {}
+    component = ha_get_discovery_component(pd)
     _LOGGER.debug(
         f"Homeassistant config: haInfo={ha_info}, component={component}")
     title = pd.get("title", pd.get("alias", name))
     _LOGGER.debug(
         f"Publishing HA discovery config for property '{name}' ...")
     ha_config = ha_info.get("config", {})
-    unique_id = f"wattpilot_{wp.serial}_{name}"
-    object_id = f"wattpilot_{name}"
-    topic_subst_map = {
-        "component": component,
-        "propName": name,
-        "serialNumber": wp.serial,
-        "uniqueId": unique_id,
-    }
+    topics = mqtt_get_topics(wp, pd)
+    object_id = f"wattpilot_{wp.serial}_{name}" if len(
+        wp_chargers) > 1 else f"wattpilot_{name}"
     ha_device = ha_get_device_info(wp)
-    base_topic = mqtt_subst_topic(
-        MQTT_TOPIC_PROPERTY_BASE, topic_subst_map, False)
     ha_discovery_config = ha_get_default_config_for_prop(pd) | {
-        "~": base_topic,
+        "~": topics.base,
         "name": title,
         "object_id": object_id,
-        "unique_id": unique_id,
-        "state_topic": mqtt_subst_topic(MQTT_TOPIC_PROPERTY_STATE, topic_subst_map, False),
-        "availability_topic": mqtt_subst_topic(MQTT_TOPIC_AVAILABLE, {}),
+        "unique_id": topics.unique_id,
+        "state_topic": topics.state_relative,
+        "availability_topic": mqtt_available_topic,
         "payload_available": "online",
         "payload_not_available": "offline",
         "device": ha_device,
@@ -948,33 +1841,78 @@ def ha_discover_property(wp, mqtt_client, pd, disable_discovery=False, force_ena
     if "valueMap" in pd:
         ha_discovery_config["options"] = list(pd["valueMap"].values())
     if pd.get("rw", "") == "R/W":
-        ha_discovery_config["command_topic"] = mqtt_subst_topic(
-            MQTT_TOPIC_PROPERTY_SET, topic_subst_map, False)
+        ha_discovery_config["command_topic"] = topics.set_relative
     ha_discovery_config = dict(
         list(ha_discovery_config.items())
         + list(ha_config.items())
     )
     if force_enablement != None:
         ha_discovery_config["enabled_by_default"] = force_enablement
-    topic_cfg = mqtt_subst_topic(HA_TOPIC_CONFIG, topic_subst_map)
+    topic_cfg = mqtt_get_ha_config_topic(topics, component)
     if disable_discovery:
         payload = ''
     else:
         payload = utils_value2json(ha_discovery_config)
     _LOGGER.debug(
         f"Publishing property '{name}' to {topic_cfg}: {payload}")
-    mqtt_client.publish(topic_cfg, payload, retain=True)
+    batch.append((topic_cfg, payload))
     # Publish additional read-only sensor for special rw properties:
     if pd.get("rw", "") == "R/W" and component != "sensor":
         if payload != "":
             del ha_discovery_config["command_topic"]
             payload = utils_value2json(ha_discovery_config)
-        mqtt_client.publish(mqtt_subst_topic(HA_TOPIC_CONFIG, topic_subst_map | {
-                            "component": "sensor"}), payload, retain=True)
+        batch.append((mqtt_get_ha_config_topic(topics, "sensor"), payload))
     if WATTPILOT_SPLIT_PROPERTIES and "childProps" in pd:
         for p in pd["childProps"]:
             ha_discover_property(wp, mqtt_client, p,
-                                 disable_discovery, force_enablement)
+                                 disable_discovery, force_enablement, batch)
+
+
+def ha_get_config_topic_filter():
+    """Returns the subscription filter matching the discovery config topics (levels containing placeholders become wildcards)"""
+    return '/'.join('+' if '{' in level else level for level in HA_TOPIC_CONFIG.split('/'))
+
+
+def ha_on_config(client, userdata, message):
+    """Remembers the hash of a discovery config retained by the broker"""
+    if not message.retain and message.topic not in ha_discovery_state:
+        # Only retained configs (and updates of configs retained before) tell what the broker keeps:
+        return
+    if message.payload:
+        ha_discovery_state[message.topic] = hashlib.sha256(message.payload).hexdigest()
+    else:
+        ha_discovery_state.pop(message.topic, None)
+
+
+def ha_publish_configs(mqtt_client, configs):
+    """Publish a batch of retained discovery configs - skipping configs which are already retained by the broker
+
+    The retained configs are received by subscribing to the config topics in ha_setup, so configs lost
+    by the broker (e.g. after a restart without persistence) are published again.
+    """
+    global ha_skipped_configs
+    published = []
+    for topic, payload in configs:
+        digest = hashlib.sha256(payload.encode()).hexdigest() if payload != '' else None
+        if digest != None and ha_discovery_state.get(topic) == digest:
+            ha_skipped_configs += 1
+            continue
+        published.append(
+            (topic, digest, mqtt_client.publish(topic, payload, retain=True)))
+    if not published:
+        return
+    _LOGGER.debug(
+        f"Published {len(published)} of {len(configs)} HA discovery configs")
+    # Messages are sent in order, so waiting for the last one is sufficient:
+    try:
+        published[-1][2].wait_for_publish(WATTPILOT_CONNECT_TIMEOUT)
+    except (RuntimeError, ValueError) as e:
+        _LOGGER.warning(f"Unable to publish HA discovery configs: {e}")
+    for topic, digest, info in published:
+        if digest == None:
+            ha_discovery_state.pop(topic, None)
+        elif info.is_published():
+            ha_discovery_state[topic] = digest
 
 
 def ha_is_default_prop(pd):
@@ -1000,13 +1938,15 @@ def ha_get_discovery_properties():
     return ha_properties
 
 
-def ha_discover_properties(mqtt_client, ha_properties, disable_discovery=True):
+def ha_discover_properties(wp, mqtt_client, ha_properties, disable_discovery=True):
     global wpdef
     _LOGGER.info(
         f"{'Disabling' if disable_discovery else 'Enabling'} HA discovery for the following properties: {ha_properties}")
+    batch = []
     for name in ha_properties:
         ha_discover_property(
-            wp, mqtt_client, wpdef["properties"][name], disable_discovery)
+            wp, mqtt_client, wpdef["properties"][name], disable_discovery, batch=batch)
+    ha_publish_configs(mqtt_client, batch)
 
 
 def ha_publish_initial_properties(wp, mqtt_client):
@@ -1021,10 +1961,27 @@ def ha_publish_initial_properties(wp, mqtt_client):
             mqtt_publish_property(wp, mqtt_client, pd, value)
 
 
-def ha_setup(wp):
+def ha_announce(chargers, mqtt_client):
+    """Publish discovery configs and the current property values for HA"""
+    mqtt_client.publish(mqtt_available_topic, payload="online", qos=0, retain=True)
+    for wp in chargers:
+        ha_discover_properties(wp, mqtt_client, HA_PROPERTIES, False)
+    # HA may have missed earlier updates, so publish all values again:
+    mqtt_last_payloads.clear()
+    for wp in chargers:
+        ha_publish_initial_properties(wp, mqtt_client)
+
+
+def ha_on_status(client, userdata, message):
+    payload = message.payload.decode("utf-8")
+    _LOGGER.info(f"Home Assistant status changed to '{payload}'")
+    if payload == "online":
+        # Do not block the network loop of the MQTT client while publishing:
+        Thread(target=ha_announce, args=(wp_chargers, client), daemon=True).start()
+
+
+def ha_setup(chargers, attach_loop=None, message_callback=None):
     global HA_PROPERTIES
-    global HA_WAIT_INIT_S
-    global HA_WAIT_PROPS_MS
     global MQTT_PROPERTIES
     global wpdef
     # Configure list of relevant properties:
@@ -1032,25 +1989,33 @@ def ha_setup(wp):
     if MQTT_PROPERTIES == [] or MQTT_PROPERTIES == ['']:
         MQTT_PROPERTIES = HA_PROPERTIES
     # Setup MQTT client:
-    mqtt_client = mqtt_setup(wp)
-    # Publish HA discovery config:
-    ha_discover_properties(mqtt_client, HA_PROPERTIES, False)
-    # Wait a bit for HA to catch up:
-    wait_time = math.ceil(
-        HA_WAIT_INIT_S + len(HA_PROPERTIES)*HA_WAIT_PROPS_MS*0.001)
-    if wait_time > 0:
-        _LOGGER.info(
-            f"Waiting {wait_time}s to allow Home Assistant to discovery entities and subscribe MQTT topics before publishing initial values ...")
-        # Sleep to let HA discover the entities before publishing values
-        sleep(wait_time)
-    # Publish initial property values to MQTT:
-    ha_publish_initial_properties(wp, mqtt_client)
+    mqtt_client = mqtt_setup(chargers, attach_loop, message_callback)
+    # Receive the discovery configs retained by the broker, so only changed or missing configs are published.
+    # Retained messages are sent in the order of the subscriptions, so they arrive before HA's birth message:
+    ha_discovery_state.clear()
+    config_filter = ha_get_config_topic_filter()
+    mqtt_client.message_callback_add(config_filter, ha_on_config)
+    mqtt_client.subscribe(config_filter)
+    # Announce discovery configs and property values once HA is online (i.e. on its retained
+    # birth message) and again whenever HA restarts:
+    _LOGGER.info(f"Subscribing to HA status topic {HA_TOPIC_STATUS}")
+    mqtt_client.message_callback_add(HA_TOPIC_STATUS, ha_on_status)
+    mqtt_client.subscribe(HA_TOPIC_STATUS)
     return mqtt_client
 
 
 def ha_stop(mqtt_client):
     global HA_PROPERTIES
-    ha_discover_properties(mqtt_client, HA_PROPERTIES, True)
+    mqtt_client.unsubscribe(HA_TOPIC_STATUS)
+    mqtt_client.message_callback_remove(HA_TOPIC_STATUS)
+    mqtt_client.unsubscribe(ha_get_config_topic_filter())
+    mqtt_client.message_callback_remove(ha_get_config_topic_filter())
+    if HA_UNDISCOVER_ON_STOP == 'true':
+        for wp in wp_chargers:
+            ha_discover_properties(wp, mqtt_client, HA_PROPERTIES, True)
+    else:
+        # Keep the entities, but mark them as unavailable:
+        mqtt_client.publish(mqtt_available_topic, payload="offline", qos=0, retain=True)
     mqtt_stop(mqtt_client)
 
 
@@ -1061,8 +2026,8 @@ def main_setup_env():
     global HA_ENABLED
     global HA_PROPERTIES
     global HA_TOPIC_CONFIG
-    global HA_WAIT_INIT_S
-    global HA_WAIT_PROPS_MS
+    global HA_TOPIC_STATUS
+    global HA_UNDISCOVER_ON_STOP
     global MQTT_AVAILABLE_PAYLOAD
     global MQTT_CLIENT_ID
     global MQTT_ENABLED
@@ -1072,27 +2037,46 @@ def main_setup_env():
     global MQTT_PORT
     global MQTT_PROPERTIES
     global MQTT_PUBLISH_MESSAGES
+    global MQTT_PUBLISH_DEADBANDS
+    global MQTT_PUBLISH_INTERVALS
     global MQTT_PUBLISH_PROPERTIES
+    global MQTT_REFRESH_INTERVAL_S
+    global MQTT_SET_DEBOUNCE_MS
     global MQTT_TOPIC_AVAILABLE
     global MQTT_TOPIC_BASE
     global MQTT_TOPIC_MESSAGES
     global MQTT_TOPIC_PROPERTY_BASE
+    global MQTT_TOPIC_PROPERTY_RESPONSE
     global MQTT_TOPIC_PROPERTY_SET
     global MQTT_TOPIC_PROPERTY_STATE
+    global RECORD_BUFFER_ROWS
+    global RECORD_FLUSH_S
+    global RECORD_ROTATE_BYTES
+    global RECORD_ROTATE_S
+    global WATTPILOT_APIDEF_CACHE
     global WATTPILOT_AUTOCONNECT
     global WATTPILOT_CONNECT_TIMEOUT
     global WATTPILOT_DEBUG_LEVEL
+    global WATTPILOT_DECODE_PROPS
     global WATTPILOT_HOST
     global WATTPILOT_INIT_TIMEOUT
     global WATTPILOT_PASSWORD
+    global WATTPILOT_PASSWORDS
+    global WATTPILOT_PING_INTERVAL
+    global WATTPILOT_PING_TIMEOUT
     global WATTPILOT_SPLIT_PROPERTIES
+    global WATTPILOT_STALE_AFTER
     HA_DISABLED_ENTITIES = os.environ.get('HA_DISABLED_ENTITIES', 'false')
     HA_ENABLED = os.environ.get('HA_ENABLED', 'false')
     HA_PROPERTIES = os.environ.get('HA_PROPERTIES', '').split(sep=' ')
     HA_TOPIC_CONFIG = os.environ.get(
         'HA_TOPIC_CONFIG', 'homeassistant/{component}/{uniqueId}/config')
-    HA_WAIT_INIT_S = int(os.environ.get('HA_WAIT_INIT_S', '0'))
-    HA_WAIT_PROPS_MS = int(os.environ.get('HA_WAIT_PROPS_MS', '0'))
+    HA_TOPIC_STATUS = os.environ.get('HA_TOPIC_STATUS', 'homeassistant/status')
+    HA_UNDISCOVER_ON_STOP = os.environ.get('HA_UNDISCOVER_ON_STOP', 'true')
+    for name in ['HA_WAIT_INIT_S', 'HA_WAIT_PROPS_MS']:
+        if name in os.environ:
+            _LOGGER.warning(
+                f"{name} is deprecated and ignored - HA entities are announced as soon as HA is online")
     MQTT_AVAILABLE_PAYLOAD = os.environ.get('MQTT_AVAILABLE_PAYLOAD', 'online')
     MQTT_CLIENT_ID = os.environ.get('MQTT_CLIENT_ID', 'wattpilot2mqtt')
     MQTT_ENABLED = os.environ.get('MQTT_ENABLED', 'false')
@@ -1103,7 +2087,14 @@ def main_setup_env():
     MQTT_PORT = int(os.environ.get('MQTT_PORT', '1883'))
     MQTT_PROPERTIES = os.environ.get('MQTT_PROPERTIES', '').split(sep=' ')
     MQTT_PUBLISH_MESSAGES = os.environ.get('MQTT_PUBLISH_MESSAGES', 'false')
+    MQTT_PUBLISH_DEADBANDS = mqtt_parse_publish_limits(
+        os.environ.get('MQTT_PUBLISH_DEADBANDS', ''))
+    MQTT_PUBLISH_INTERVALS = mqtt_parse_publish_limits(
+        os.environ.get('MQTT_PUBLISH_INTERVALS', ''))
     MQTT_PUBLISH_PROPERTIES = os.environ.get('MQTT_PUBLISH_PROPERTIES', 'true')
+    MQTT_REFRESH_INTERVAL_S = int(
+        os.environ.get('MQTT_REFRESH_INTERVAL_S', '0'))
+    MQTT_SET_DEBOUNCE_MS = int(os.environ.get('MQTT_SET_DEBOUNCE_MS', '250'))
     MQTT_TOPIC_AVAILABLE = os.environ.get(
         'MQTT_TOPIC_AVAILABLE', '{baseTopic}/available')
     MQTT_TOPIC_BASE = os.environ.get('MQTT_TOPIC_BASE', 'wattpilot')
@@ -1111,20 +2102,40 @@ def main_setup_env():
         'MQTT_TOPIC_MESSAGES', '{baseTopic}/messages/{messageType}')
     MQTT_TOPIC_PROPERTY_BASE = os.environ.get(
         'MQTT_TOPIC_PROPERTY_BASE', '{baseTopic}/properties/{propName}')
+    MQTT_TOPIC_PROPERTY_RESPONSE = os.environ.get(
+        'MQTT_TOPIC_PROPERTY_RESPONSE', '~/response')
     MQTT_TOPIC_PROPERTY_SET = os.environ.get(
         'MQTT_TOPIC_PROPERTY_SET', '~/set')
     MQTT_TOPIC_PROPERTY_STATE = os.environ.get(
         'MQTT_TOPIC_PROPERTY_STATE', '~/state')
+    RECORD_BUFFER_ROWS = int(os.environ.get('RECORD_BUFFER_ROWS', '1000'))
+    RECORD_FLUSH_S = int(os.environ.get('RECORD_FLUSH_S', '5'))
+    RECORD_ROTATE_BYTES = int(
+        os.environ.get('RECORD_ROTATE_BYTES', '100000000'))
+    RECORD_ROTATE_S = int(os.environ.get('RECORD_ROTATE_S', '3600'))
+    WATTPILOT_APIDEF_CACHE = os.environ.get(
+        'WATTPILOT_APIDEF_CACHE', '~/.cache/wattpilot')
     WATTPILOT_AUTOCONNECT = os.environ.get('WATTPILOT_AUTOCONNECT', 'true')
     WATTPILOT_CONNECT_TIMEOUT = int(
         os.environ.get('WATTPILOT_CONNECT_TIMEOUT', '30'))
     WATTPILOT_DEBUG_LEVEL = os.environ.get('WATTPILOT_DEBUG_LEVEL', 'INFO')
+    WATTPILOT_DECODE_PROPS = os.environ.get('WATTPILOT_DECODE_PROPS', '')
     WATTPILOT_HOST = os.environ.get('WATTPILOT_HOST', '')
     WATTPILOT_INIT_TIMEOUT = int(
         os.environ.get('WATTPILOT_INIT_TIMEOUT', '30'))
     WATTPILOT_PASSWORD = os.environ.get('WATTPILOT_PASSWORD', '')
+    # Passwords of individual chargers (numbered in the order of WATTPILOT_HOST, starting at 1):
+    WATTPILOT_PASSWORDS = {n: os.environ[f'WATTPILOT_PASSWORD_{n}']
+                           for n in range(1, len(WATTPILOT_HOST.split()) + 1) if f'WATTPILOT_PASSWORD_{n}' in os.environ}
+    WATTPILOT_PING_INTERVAL = int(
+        os.environ.get('WATTPILOT_PING_INTERVAL', '30'))
+    WATTPILOT_PING_TIMEOUT = int(
+        os.environ.get('WATTPILOT_PING_TIMEOUT', '10'))
     WATTPILOT_SPLIT_PROPERTIES = bool(
         os.environ.get('WATTPILOT_SPLIT_PROPERTIES', 'true'))
+    WATTPILOT_STALE_AFTER = os.environ.get('WATTPILOT_STALE_AFTER', '')
+    WATTPILOT_STALE_AFTER = int(
+        WATTPILOT_STALE_AFTER) if WATTPILOT_STALE_AFTER != '' else None
 
     # Ensure wattpilot host an password are set:
     assert WATTPILOT_HOST != '', "WATTPILOT_HOST not set!"
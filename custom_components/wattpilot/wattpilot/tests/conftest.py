@@ -0,0 +1,29 @@
+import os
+
+import pytest
+
+SHELL_ENV = {
+    "WATTPILOT_HOST": "127.0.0.1",
+    "WATTPILOT_PASSWORD": "password",
+    "MQTT_HOST": "127.0.0.1",
+    "WATTPILOT_APIDEF_CACHE": "",
+}
+
+
+@pytest.fixture(scope="session")
+def sh():
+    """Returns the wattpilotshell module configured like the bridge (skipped without paho-mqtt)"""
+    pytest.importorskip("paho.mqtt.client")
+    from wattpilot import wattpilotshell as sh
+    saved = {k: os.environ.get(k) for k in SHELL_ENV}
+    os.environ.update(SHELL_ENV)
+    try:
+        sh.main_setup_env()
+    finally:
+        for k, v in saved.items():
+            if v is None:
+                del os.environ[k]
+            else:
+                os.environ[k] = v
+    sh.wpdef = sh.wp_read_apidef()
+    return sh
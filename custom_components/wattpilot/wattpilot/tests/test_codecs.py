@@ -0,0 +1,105 @@
+from types import SimpleNamespace
+
+import pytest
+
+VALUE_MAP = {"0": "Neutral", "1": "Off", "2": "On"}
+
+
+def codec(sh, json_type, value_map=None, **pd):
+    pd = dict(pd, key="test", jsonType=json_type)
+    if value_map is not None:
+        pd["valueMap"] = value_map
+    return sh.mqtt_compile_codec(pd)
+
+
+@pytest.mark.parametrize("json_type,value,encoded", [
+    ("integer", 16, 16),
+    ("integer", None, "null"),
+    ("float", 1.5, 1.5),
+    ("string", "abc", "abc"),
+    ("boolean", True, "true"),
+    ("boolean", False, "false"),
+    ("array", [1, 2], "[1, 2]"),
+    ("object", SimpleNamespace(a=1, b=[2]), '{"a": 1, "b": [2]}'),
+    ("unknown", 5, 5),
+    ("unknown", [5], "[5]"),
+])
+def test_encode(sh, json_type, value, encoded):
+    assert codec(sh, json_type).encode(value) == encoded
+
+
+def test_encode_mapped_values(sh):
+    c = codec(sh, "integer", VALUE_MAP)
+    assert c.encode(2) == "On"
+    assert c.encode(None) == "null"
+    # Unknown values and booleans (which equal 0 and 1) are published unmapped:
+    assert c.encode(7) == 7
+    assert c.encode(True) is True
+    assert codec(sh, "array", VALUE_MAP).encode([0, 2]) == '["Neutral", "On"]'
+
+
+def test_decode(sh):
+    assert codec(sh, "integer", VALUE_MAP).decode("Off") == 1
+    assert codec(sh, "integer", VALUE_MAP).decode("Other") == "Other"
+    assert codec(sh, "array", VALUE_MAP).decode('["On", "Off"]') == [2, 1]
+    assert codec(sh, "object").decode('{"a": 1}') == {"a": 1}
+    assert codec(sh, "string").decode("abc") == "abc"
+
+
+def test_codecs_are_compiled_once_per_key(sh):
+    pd = sh.wp_get_prop_def("car")
+    assert sh.mqtt_get_codec(pd) is sh.mqtt_get_codec(pd)
+    assert sh.mqtt_get_encoded_property(pd, 2) == "Charging"
+    assert sh.mqtt_get_decoded_property(pd, "Charging") == 2
+
+
+def test_child_properties_are_split(sh):
+    pd = sh.wp_get_prop_def("nrg")
+    children = dict((cpd["key"], v) for cpd, v in sh.wp_split_prop_value(pd, list(range(16))))
+    assert children["nrg_pl1"] == 7
+    assert len(children) == 16
+
+
+@pytest.mark.parametrize("json_type,payload,value", [
+    ("integer", "16", 16),
+    ("integer", "16.0", 16),
+    ("float", "1.5", 1.5),
+    ("boolean", "on", True),
+    ("boolean", "FALSE", False),
+    ("string", "abc", "abc"),
+    ("array", "[1, 2]", [1, 2]),
+])
+def test_validate(sh, json_type, payload, value):
+    assert codec(sh, json_type, rw="R/W").validate(payload) == value
+
+
+@pytest.mark.parametrize("json_type,payload", [
+    ("integer", "1.5"),
+    ("integer", "abc"),
+    ("boolean", "maybe"),
+    ("array", "[1,"),
+])
+def test_validate_rejects_invalid_values(sh, json_type, payload):
+    with pytest.raises(ValueError):
+        codec(sh, json_type, rw="R/W").validate(payload)
+
+
+def test_validate_mapped_values(sh):
+    c = codec(sh, "integer", VALUE_MAP, rw="R/W")
+    assert c.validate("On") == 2
+    assert c.validate("1") == 1
+    with pytest.raises(ValueError):
+        c.validate("Other")
+    with pytest.raises(ValueError):
+        c.validate("7")
+
+
+def test_validate_rejects_read_only_properties(sh):
+    with pytest.raises(ValueError):
+        codec(sh, "integer", rw="R").validate("1")
+
+
+def test_validate_passes_values_out_of_the_documented_range(sh, caplog):
+    c = codec(sh, "integer", rw="R/W", min=6, max=16)
+    assert c.validate("32") == 32
+    assert "out of the documented range" in caplog.text
@@ -0,0 +1,34 @@
+import os
+import pathlib
+import subprocess
+import sys
+
+SRC = pathlib.Path(__file__).parent.parent / 'src'
+
+# Modules which must not be loaded by "import wattpilot" (see "Import Time" in the README):
+DEFERRED_MODULES = ('websocket', 'bcrypt', 'yaml', 'paho', 'wattpilot.model', 'wattpilot.hedged')
+
+
+def import_times(statement):
+    """Returns the cumulative import time in µs per module reported by python -X importtime"""
+    env = dict(os.environ, PYTHONPATH=str(SRC))
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement], env=env, capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_import_defers_heavy_modules():
+    times = import_times('import wattpilot')
+    assert 'wattpilot' in times
+    loaded = [name for name in times if name.startswith(DEFERRED_MODULES)]
+    assert loaded == []
+
+
+def test_deferred_names_are_importable():
+    times = import_times('from wattpilot import *; HedgedWattpilot')
+    assert 'wattpilot.hedged' in times
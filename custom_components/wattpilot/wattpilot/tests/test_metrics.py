@@ -0,0 +1,93 @@
+import math
+
+import pytest
+
+pytest.importorskip("paho.mqtt.client")
+
+from wattpilot import metrics  # noqa: E402
+
+HEALTH = {
+    "chargers": {"111": {"connected": True, "pingRttMs": 12.5, "reconnects": 2}},
+    "mqttConnected": True,
+    "uptime": 60,
+    "queue": 0,
+    "received": 10,
+    "published": 9,
+    "dropped": 1,
+    "suppressed": 3,
+    "latencyMs": {"p50": 0.5, "max": None},
+}
+
+
+class FakeCharger:
+    def __init__(self, serial, props):
+        self.serial = serial
+        self.allProps = props
+        self.handlers = {}
+
+    def add_event_handler(self, event, callback_fn):
+        self.handlers[event] = callback_fn
+
+    def remove_event_handler(self, event, callback_fn):
+        del self.handlers[event]
+
+
+@pytest.mark.parametrize("value,sample", [
+    (True, "1"),
+    (False, "0"),
+    (16, "16"),
+    (0.1, "0.1"),
+    (math.nan, "NaN"),
+    (-math.inf, "-Inf"),
+    ("text", None),
+    (None, None),
+    ([1], None),
+])
+def test_metric_value(value, sample):
+    assert metrics.metric_value(value) == sample
+
+
+def test_numeric_properties_are_rendered_as_gauges(sh):
+    exporter = metrics.MetricsExporter()
+    wp = FakeCharger("111", {"amp": 16, "fna": "name", "nrg": list(range(16))})
+    exporter.start([wp])
+    text = exporter.render_properties()
+    assert "# TYPE wattpilot_amp gauge\n" in text
+    assert 'wattpilot_amp{serial="111"} 16\n' in text
+    assert "wattpilot_fna" not in text
+    # Array properties are exposed by their numeric child properties:
+    assert 'wattpilot_nrg_pl1{serial="111"} 7\n' in text
+    exporter.stop()
+    assert wp.handlers == {}
+
+
+def test_only_changed_properties_are_rendered_again(sh):
+    exporter = metrics.MetricsExporter()
+    wp1, wp2 = FakeCharger("111", {"amp": 16, "car": 2}), FakeCharger("222", {"amp": 10})
+    exporter.start([wp1, wp2])
+    text = exporter.render_properties()
+    assert exporter.renders == 2
+    assert exporter.render_properties() == text
+    assert exporter.renders == 2
+    exporter.on_property(wp2, "amp", 12)
+    text = exporter.render_properties()
+    assert exporter.renders == 3
+    assert 'wattpilot_amp{serial="111"} 16\nwattpilot_amp{serial="222"} 12\n' in text
+    assert text.count("# TYPE wattpilot_amp gauge") == 1
+
+
+def test_openmetrics_exposition(sh):
+    text = metrics.render(metrics.MetricsExporter(), HEALTH)
+    assert text.endswith("# EOF\n")
+    assert "# TYPE wattpilot_bridge_reconnects counter\n" in text
+    assert 'wattpilot_bridge_reconnects_total{serial="111"} 2\n' in text
+    assert 'wattpilot_bridge_up{serial="111"} 1\n' in text
+    assert 'wattpilot_bridge_latency_milliseconds{stat="p50"} 0.5\n' in text
+    assert 'stat="max"' not in text
+
+
+def test_prometheus_text_exposition(sh):
+    text = metrics.render(metrics.MetricsExporter(), HEALTH, openmetrics=False)
+    assert "# EOF" not in text
+    assert "# TYPE wattpilot_bridge_reconnects_total counter\n" in text
+    assert "wattpilot_bridge_dropped_frames_total 1\n" in text
@@ -0,0 +1,134 @@
+import asyncio
+import os
+import struct
+
+import pytest
+
+pytest.importorskip("paho.mqtt.client")
+
+from wattpilot import proxy  # noqa: E402
+
+MASK = b"\x01\x02\x03\x04"
+
+
+class FakeWriter:
+    def __init__(self):
+        self.data = b""
+        self.closed = False
+        self.transport = self
+
+    def write(self, data):
+        self.data += data
+
+    def is_closing(self):
+        return self.closed
+
+    def close(self):
+        self.closed = True
+
+    def get_write_buffer_size(self):
+        return len(self.data)
+
+
+def client_frame(opcode, payload, fin=True):
+    """Returns a masked frame as sent by a client"""
+    length = len(payload)
+    if length < 126:
+        header = struct.pack("!BB", (0x80 if fin else 0) | opcode, 0x80 | length)
+    elif length < 1 << 16:
+        header = struct.pack("!BBH", (0x80 if fin else 0) | opcode, 0x80 | 126, length)
+    else:
+        header = struct.pack("!BBQ", (0x80 if fin else 0) | opcode, 0x80 | 127, length)
+    return header + MASK + proxy.unmask(payload, MASK)
+
+
+def receive(*frames):
+    """Returns the results of recv for the frames and the data written to the client"""
+    async def run():
+        reader = asyncio.StreamReader()
+        for frame in frames:
+            reader.feed_data(frame)
+        reader.feed_eof()
+        ws = proxy.WebSocketConnection(reader, FakeWriter())
+        return await ws.recv(), ws.writer.data
+    return asyncio.run(run())
+
+
+def test_unmask_is_its_own_inverse():
+    data = os.urandom(37)
+    assert proxy.unmask(proxy.unmask(data, MASK), MASK) == data
+    assert proxy.unmask(b"", MASK) == b""
+
+
+@pytest.mark.parametrize("size", [0, 125, 126, 65535, 65536])
+def test_recv_text(size):
+    text = "x" * size
+    assert receive(client_frame(0x1, text.encode())) == (text, b"")
+
+
+def test_recv_fragmented_text():
+    frames = [client_frame(0x1, b'{"type":', fin=False), client_frame(0x0, b'"hello"}')]
+    assert receive(*frames)[0] == '{"type":"hello"}'
+
+
+def test_ping_is_answered_with_pong():
+    text, written = receive(client_frame(0x9, b"ping"), client_frame(0x1, b"text"))
+    assert text == "text"
+    assert written == b"\x8a\x04ping"
+
+
+def test_close_is_echoed():
+    assert receive(client_frame(0x8, b"\x03\xe8bye")) == (None, b"\x88\x02\x03\xe8")
+
+
+def test_messages_exceeding_the_maximum_size_are_rejected(monkeypatch):
+    monkeypatch.setattr(proxy, "MAX_MESSAGE_SIZE", 100)
+    with pytest.raises(proxy.WebSocketError):
+        receive(client_frame(0x1, b"x" * 60, fin=False), client_frame(0x0, b"x" * 60))
+
+
+@pytest.mark.parametrize("size,header", [
+    (5, b"\x81\x05"),
+    (126, b"\x81\x7e\x00\x7e"),
+    (65536, b"\x81\x7f" + struct.pack("!Q", 65536)),
+])
+def test_send(size, header):
+    ws = proxy.WebSocketConnection(None, FakeWriter())
+    ws.send("x" * size)
+    assert ws.writer.data == header + b"x" * size
+
+
+def test_send_to_a_slow_client_fails(monkeypatch):
+    monkeypatch.setattr(proxy, "MAX_WRITE_BUFFER", 10)
+    ws = proxy.WebSocketConnection(None, FakeWriter())
+    ws.send("x" * 20)
+    with pytest.raises(proxy.WebSocketError):
+        ws.send("x")
+
+
+def handshake(request, ready=True):
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(request)
+        ws = proxy.WebSocketConnection(reader, FakeWriter())
+        if ready:
+            await ws.handshake()
+        else:
+            with pytest.raises(proxy.WebSocketError):
+                await ws.handshake(ready)
+        return ws.writer.data
+    return asyncio.run(run())
+
+
+UPGRADE = b"GET /ws HTTP/1.1\r\nHost: x\r\nUpgrade: websocket\r\nConnection: Upgrade\r\nSec-WebSocket-Key: dGhlIHNhbXBsZSBub25jZQ==\r\n\r\n"
+
+
+def test_handshake():
+    # Example of RFC 6455 section 1.3:
+    assert b"Sec-WebSocket-Accept: s3pPLMBiTxaQ9kYGzzhZRbK+xOo=\r\n" in handshake(UPGRADE)
+
+
+def test_handshake_errors():
+    assert handshake(UPGRADE, ready=False).startswith(b"HTTP/1.1 503 ")
+    with pytest.raises(proxy.WebSocketError):
+        handshake(b"GET / HTTP/1.1\r\nHost: x\r\n\r\n")
@@ -0,0 +1,146 @@
+import io
+import json
+import os
+
+from types import SimpleNamespace
+
+import pytest
+
+from wattpilot import recorder
+
+START = 1700000000.0
+
+
+class FakeCharger:
+    def __init__(self, serial):
+        self.serial = serial
+        self.handlers = {}
+
+    def add_event_handler(self, event, callback_fn):
+        self.handlers[event] = callback_fn
+
+    def remove_event_handler(self, event, callback_fn):
+        del self.handlers[event]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [START]
+    monkeypatch.setattr(recorder, "time", lambda: now[0])
+    return now
+
+
+def record(rec, clock, rows):
+    for ts, wp, key, value in rows:
+        clock[0] = ts
+        rec.on_property(wp, key, value)
+    rec.flush()
+
+
+@pytest.mark.parametrize("fmt", ["ndjson", "csv"])
+def test_recorded_rows_are_read_back(tmp_path, clock, fmt):
+    wp = FakeCharger("111")
+    rec = recorder.Recorder(tmp_path, fmt=fmt, flush_s=0)
+    rec.start([wp])
+    record(rec, clock, [(START, wp, "amp", 16), (START + 1, wp, "nrg", [1, 2.5]), (START + 2, wp, "ccw", SimpleNamespace(ssid="x"))])
+    rec.stop()
+    assert wp.handlers == {}
+    assert rec.recorded == 3
+    assert list(recorder.read_records(tmp_path)) == [
+        (START, "111", "amp", "16"),
+        (START + 1, "111", "nrg", "[1,2.5]"),
+        (START + 2, "111", "ccw", '{"ssid":"x"}'),
+    ]
+
+
+def test_only_selected_keys_are_recorded(tmp_path, clock):
+    wp = FakeCharger("111")
+    rec = recorder.Recorder(tmp_path, keys=["amp"], flush_s=0)
+    record(rec, clock, [(START, wp, "amp", 16), (START, wp, "car", 2)])
+    rec.stop()
+    assert [row[2] for row in recorder.read_records(tmp_path)] == ["amp"]
+
+
+def test_rows_are_buffered(tmp_path, clock):
+    wp = FakeCharger("111")
+    rec = recorder.Recorder(tmp_path, buffer_rows=2, flush_s=0)
+    rec.on_property(wp, "amp", 1)
+    assert rec.status()["buffered"] == 1
+    assert rec.status()["files"] == []
+    rec.on_property(wp, "amp", 2)
+    assert rec.status()["buffered"] == 0
+    assert rec.recorded == 2
+    rec.stop()
+
+
+def test_files_are_rotated_by_age(tmp_path, clock):
+    wp = FakeCharger("111")
+    rec = recorder.Recorder(tmp_path, rotate_s=60, flush_s=0)
+    record(rec, clock, [(START, wp, "amp", 1)])
+    record(rec, clock, [(START + 30, wp, "amp", 2)])
+    record(rec, clock, [(START + 60, wp, "amp", 3)])
+    rec.stop()
+    files = recorder.list_record_files(tmp_path)
+    assert [os.path.basename(f[0]) for f in files] == [
+        "wattpilot-111-20231114T221320Z.ndjson",
+        "wattpilot-111-20231114T221420Z.ndjson",
+    ]
+    assert [row[3] for row in recorder.read_records(tmp_path)] == ["1", "2", "3"]
+
+
+def test_files_rotated_within_a_second_get_a_sequence_number(tmp_path, clock):
+    wp = FakeCharger("111")
+    rec = recorder.Recorder(tmp_path, rotate_s=0, rotate_bytes=1, flush_s=0)
+    for value in range(3):
+        record(rec, clock, [(START + value / 10, wp, "amp", value)])
+    rec.stop()
+    names = [os.path.basename(f[0]) for f in recorder.list_record_files(tmp_path)]
+    assert names == [
+        "wattpilot-111-20231114T221320Z.ndjson",
+        "wattpilot-111-20231114T221320Z-1.ndjson",
+        "wattpilot-111-20231114T221320Z-2.ndjson",
+    ]
+    assert [row[3] for row in recorder.read_records(tmp_path)] == ["0", "1", "2"]
+
+
+def test_records_of_chargers_are_merged_by_time(tmp_path, clock):
+    wp1, wp2 = FakeCharger("111"), FakeCharger("222")
+    rec = recorder.Recorder(tmp_path, rotate_s=10, flush_s=0)
+    record(rec, clock, [(START + t, wp1 if t % 2 else wp2, "amp", t) for t in range(30)])
+    rec.stop()
+    rows = list(recorder.read_records(tmp_path))
+    assert [row[0] for row in rows] == [START + t for t in range(30)]
+    assert {row[1] for row in rows} == {"111", "222"}
+
+
+def test_time_range_and_keys_are_filtered(tmp_path, clock):
+    wp = FakeCharger("111")
+    rec = recorder.Recorder(tmp_path, rotate_s=10, flush_s=0)
+    record(rec, clock, [(START + t, wp, "amp" if t % 2 else "car", t) for t in range(40)])
+    rec.stop()
+    rows = list(recorder.read_records(tmp_path, start=START + 15, end=START + 25, keys={"amp"}))
+    assert [row[3] for row in rows] == ["15", "17", "19", "21", "23"]
+
+
+def test_unsupported_format(tmp_path):
+    with pytest.raises(ValueError):
+        recorder.Recorder(tmp_path, fmt="xml")
+
+
+@pytest.mark.parametrize("fmt", ["ndjson", "csv"])
+def test_export(fmt):
+    rows = [(START, "111", "amp", "16"), (START + 1, "111", "nrg", "[1,2]")]
+    out = io.StringIO()
+    assert recorder.export_records(rows, out, fmt) == 2
+    if fmt == "ndjson":
+        assert [json.loads(line) for line in out.getvalue().splitlines()] == [
+            {"ts": START, "serial": "111", "key": "amp", "value": 16},
+            {"ts": START + 1, "serial": "111", "key": "nrg", "value": [1, 2]},
+        ]
+    else:
+        assert out.getvalue().splitlines() == ["ts,serial,key,value", f"{START},111,amp,16", f'{START + 1},111,nrg,"[1,2]"']
+
+
+def test_parse_time():
+    assert recorder.parse_time("1700000000") == START
+    assert recorder.parse_time("2023-11-14T22:13:20+00:00") == START
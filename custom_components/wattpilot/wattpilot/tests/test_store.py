@@ -0,0 +1,107 @@
+import json
+import threading
+
+from types import SimpleNamespace
+
+import pytest
+
+from wattpilot.store import PropertyStore, to_namespace
+
+
+def test_excluded_keys_are_not_stored():
+    store = PropertyStore(exclude=["ex"])
+    store["ex"] = 1
+    store.update_undecoded({"ex": 2, "a": 3})
+    assert "ex" not in store
+    assert dict(store.items()) == {"a": 3}
+
+
+def test_lazy_keys_are_stored_as_compact_json():
+    store = PropertyStore(lazy=["lz"])
+    store["lz"] = SimpleNamespace(a=[1, 2], b=None)
+    assert store.get_raw("lz") == b'{"a":[1,2],"b":null}'
+    assert store["lz"] == SimpleNamespace(a=[1, 2], b=None)
+    assert store.sizes()["lz"] > 0
+
+
+def test_undecoded_values_are_converted_on_access():
+    store = PropertyStore()
+    store.update_undecoded({"a": {"b": [{"c": 1}]}})
+    assert store["a"] == to_namespace({"b": [{"c": 1}]})
+    assert store.get_raw("a") == b'{"b":[{"c":1}]}'
+    assert repr(store) == "PropertyStore(0 values, 1 undecoded, 0 lazy)"
+
+
+def test_every_change_increments_the_version():
+    store = PropertyStore(lazy=["lz"])
+    store["a"] = 1
+    store.update_undecoded({"b": 2, "lz": [1]})
+    assert store.version == 3
+    assert store.changes_since(0) == ["a", "b", "lz"]
+    del store["a"]
+    assert store.version == 4
+    assert store.changes_since(3) == ["a"]
+    assert "a" not in store
+
+
+def test_unchanged_values_do_not_increment_the_version():
+    store = PropertyStore(lazy=["lz"])
+    store.update_undecoded({"a": 1, "b": {"x": 1}, "lz": [1, 2]})
+    version = store.version
+    store.update_undecoded({"a": 1, "b": {"x": 1}, "lz": [1, 2]})
+    store["a"] = 1
+    store["b"] = SimpleNamespace(x=1)
+    store["lz"] = [1, 2]
+    assert store.version == version
+
+
+def test_changing_the_type_is_a_change():
+    store = PropertyStore()
+    store["a"] = 1
+    store["a"] = True
+    assert store.version == 2
+    assert store["a"] is True
+
+
+def test_changes_are_ordered_by_their_last_change():
+    store = PropertyStore()
+    store.update_undecoded({"a": 1, "b": 1, "c": 1})
+    store["a"] = 2
+    assert store.changes_since(0) == ["b", "c", "a"]
+    assert store.changes_since(3) == ["a"]
+    assert store.changed("a")[0] == 4
+    assert store.changed("x") is None
+
+
+def test_mark_skipped_drops_values():
+    store = PropertyStore()
+    store["a"] = 1
+    store.mark_skipped(["a", "b"])
+    assert "a" not in store
+    assert store.skipped == frozenset(["a", "b"])
+
+
+def test_changes_since_while_another_thread_stores_values():
+    store = PropertyStore()
+    stop = threading.Event()
+
+    def writer():
+        i = 0
+        while not stop.is_set():
+            store[f"k{i % 1000}"] = i
+            i += 1
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        for _ in range(100):
+            keys = store.changes_since(0)
+            assert len(keys) == len(set(keys))
+    finally:
+        stop.set()
+        thread.join()
+
+
+@pytest.mark.parametrize("value", [1, 1.5, "s", None, [1, {"a": 2}], {"a": {"b": 1}}])
+def test_to_namespace_matches_object_hook(value):
+    assert to_namespace(value) == json.loads(json.dumps(value), object_hook=lambda d: SimpleNamespace(**d))
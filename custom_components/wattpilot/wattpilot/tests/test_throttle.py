@@ -0,0 +1,98 @@
+import threading
+
+import pytest
+
+TOPIC = "wattpilot/properties/test/state"
+
+
+@pytest.fixture
+def throttle(sh, monkeypatch):
+    """Returns a function throttling values of a property with the given publish limits - flushed values are collected in published"""
+    published = []
+    flushed = threading.Event()
+
+    def publish_property(wp, mqtt_client, pd, value, force_publish=False, throttle=True):
+        published.append(value)
+        flushed.set()
+
+    monkeypatch.setattr(sh, "mqtt_publish_property", publish_property)
+    sh.mqtt_stop_throttles()
+    sh.mqtt_publish_limits.clear()
+
+    def throttle(value, interval=0, deadband=None):
+        pd = {"key": "test", "homeAssistant": {"publish": {"interval": interval, "deadband": deadband}}}
+        return sh.mqtt_throttle_property(None, None, pd, TOPIC, value)
+
+    throttle.published = published
+    throttle.flushed = flushed
+    yield throttle
+    sh.mqtt_stop_throttles()
+    sh.mqtt_publish_limits.clear()
+
+
+@pytest.mark.parametrize("deadband,limits", [
+    (None, (0, 0)),
+    ("", (0, 0)),
+    (0.5, (0.5, 0)),
+    ("2", (2.0, 0)),
+    ("10%", (0, 0.1)),
+])
+def test_parse_deadband(sh, deadband, limits):
+    assert sh.mqtt_parse_deadband(deadband) == limits
+
+
+def test_without_limits_every_value_is_published(throttle):
+    assert throttle(1)
+    assert throttle(1)
+
+
+def test_changes_within_the_deadband_are_dropped(throttle):
+    assert throttle(10, deadband=0.5)
+    assert not throttle(10.4, deadband=0.5)
+    assert not throttle(9.6, deadband=0.5)
+    assert throttle(10.6, deadband=0.5)
+    assert throttle.published == []
+
+
+def test_relative_deadband(throttle):
+    assert throttle(100, deadband="10%")
+    assert not throttle(105, deadband="10%")
+    assert throttle(111, deadband="10%")
+
+
+def test_non_numeric_values_are_not_within_the_deadband(throttle):
+    assert throttle(1, deadband=5)
+    assert throttle("text", deadband=5)
+    assert throttle(True, deadband=5)
+
+
+def test_last_value_held_back_by_the_interval_is_flushed(throttle):
+    assert throttle(10, interval=0.05)
+    assert not throttle(11, interval=0.05)
+    assert not throttle(12, interval=0.05)
+    assert throttle.flushed.wait(2)
+    assert throttle.published == [12]
+
+
+def test_held_back_value_within_the_deadband_is_dropped(sh, throttle):
+    assert throttle(10, interval=0.05, deadband=1)
+    assert not throttle(12, interval=0.05, deadband=1)
+    assert not throttle(10.5, interval=0.05, deadband=1)
+    sh.mqtt_flush_property(TOPIC)
+    assert throttle.published == []
+
+
+def test_unthrottled_publishes_are_recorded(sh, throttle):
+    assert throttle(10, deadband=1)
+    sh.mqtt_throttle_published(TOPIC, 20)
+    assert not throttle(20.5, deadband=1)
+    assert throttle(10, deadband=1)
+
+
+def test_stopped_throttles_do_not_flush(sh, throttle):
+    assert throttle(10, interval=0.05)
+    assert not throttle(11, interval=0.05)
+    sh.mqtt_stop_throttles()
+    assert not throttle.flushed.wait(0.2)
+    sh.mqtt_flush_property(TOPIC)
+    assert throttle.published == []